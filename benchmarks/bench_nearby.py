@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark for /places/nearby/gps query strategies
+
+Compares rows fetched from the database and latency per query for:
+- full scan      (previous behaviour: load every active place)
+- bounding box   (SQL prefilter on the is_active/latitude/longitude index)
+- grid index     (in-memory cells, loads only the returned rows)
+
+Usage:
+    python3 benchmarks/bench_nearby.py --places 50000 --queries 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from db.session import Base
+from models.place import Place
+from services import location
+from services.indexes import build_indexes
+from services.spatial_index import place_grid
+
+# Rough bounding box of Germany
+LAT_RANGE = (47.3, 55.0)
+LNG_RANGE = (5.9, 15.0)
+
+
+def seed(db, count: int, rng: random.Random) -> None:
+    rows = [
+        {
+            "name": f"Place {i}",
+            "address": f"Straße {i}",
+            "city": "Synthetic",
+            "latitude": rng.uniform(*LAT_RANGE),
+            "longitude": rng.uniform(*LNG_RANGE),
+            "category": rng.choice(["cafe", "bar", "restaurant", "library"]),
+            "is_active": True,
+        }
+        for i in range(count)
+    ]
+    db.execute(insert(Place), rows)
+    db.commit()
+
+
+def full_scan(db, lat, lng, radius_km, limit):
+    """The pre-index implementation, kept here for comparison"""
+    places = db.query(Place).filter(
+        Place.is_active == True,
+        Place.latitude.isnot(None),
+        Place.longitude.isnot(None)
+    ).all()
+    hits = []
+    for place in places:
+        distance = location.calculate_distance(lat, lng, place.latitude, place.longitude)
+        if distance <= radius_km:
+            hits.append((place, distance))
+    hits.sort(key=lambda x: x[1])
+    return hits[:limit]
+
+
+def indexed(db, lat, lng, radius_km, limit):
+    return location.get_places_near_location(db, lat, lng, radius_km=radius_km, limit=limit)
+
+
+def run(name, strategy, session_factory, queries, radius_km, limit, rows_counter):
+    rows_counter["rows"] = 0
+    started = time.perf_counter()
+    for lat, lng in queries:
+        db = session_factory()
+        strategy(db, lat, lng, radius_km, limit)
+        db.close()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<14} {rows_counter['rows'] / len(queries):>14.1f} {elapsed / len(queries) * 1000:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--places", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--radius", type=float, default=10.0)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+
+        db = session_factory()
+        seed(db, args.places, rng)
+        db.close()
+
+        rows_counter = {"rows": 0}
+
+        @event.listens_for(Place, "load")
+        def count_rows(target, context):
+            rows_counter["rows"] += 1
+
+        queries = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(args.queries)]
+
+        print(f"{args.places} places, {args.queries} queries, radius {args.radius} km, limit {args.limit}\n")
+        print(f"{'strategy':<14} {'rows/query':>14} {'ms/query':>12}")
+
+        run("full scan", full_scan, session_factory, queries, args.radius, args.limit, rows_counter)
+
+        place_grid.ready = False
+        run("bounding box", indexed, session_factory, queries, args.radius, args.limit, rows_counter)
+
+        db = session_factory()
+        build_indexes(db)
+        db.close()
+        run("grid index", indexed, session_factory, queries, args.radius, args.limit, rows_counter)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark for /places/search/text backends
+
+Compares latency per query on a synthetic catalog for:
+- like         (substring LIKE over five columns, the fallback)
+- sqlite-fts5  (external-content FTS5 table ranked with bm25)
+- memory       (in-process inverted index)
+- postgres-tsvector, when --postgres-url points at an empty scratch database
+
+Usage:
+    python3 benchmarks/bench_search.py --places 100000 --queries 200
+    python3 benchmarks/bench_search.py --postgres-url postgresql://localhost/bench
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from db.session import Base
+from models.place import Place
+from services.fulltext import LikeBackend, get_search_backend, memory_backend
+from services.indexes import build_indexes
+
+CITIES = ["Berlin", "Hamburg", "München", "Köln", "Frankfurt", "Düsseldorf", "Leipzig", "Nürnberg"]
+CATEGORIES = ["cafe", "bar", "restaurant", "library", "coworking"]
+NAME_WORDS = [
+    "Café", "Kaffeehaus", "Rösterei", "Bäckerei", "Kneipe", "Bücherei", "Bistro", "Weinbar",
+    "Einstein", "Sonne", "Mond", "Hafen", "Garten", "Ecke", "Stern", "Brücke", "Markt", "Linde",
+]
+STREETS = ["Hauptstraße", "Bahnhofstraße", "Gartenweg", "Marktplatz", "Schillerstraße", "Lindenallee"]
+QUERIES = [
+    "cafe", "kaffee", "muenchen", "rösterei berlin", "bäckerei", "koeln bar", "hafen",
+    "weinbar", "stern", "garten cafe", "bruecke", "einstein", "markt", "linde", "10115",
+]
+
+
+def seed(db, count: int, rng: random.Random) -> None:
+    rows = []
+    for i in range(count):
+        city = rng.choice(CITIES)
+        rows.append({
+            "name": f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {i}",
+            "description": " ".join(rng.choices(NAME_WORDS, k=6)),
+            "address": f"{rng.choice(STREETS)} {rng.randint(1, 200)}",
+            "city": city,
+            "postal_code": f"{rng.randint(10000, 99999)}",
+            "category": rng.choice(CATEGORIES),
+            "is_active": True,
+        })
+    for start in range(0, count, 10000):
+        db.execute(insert(Place), rows[start:start + 10000])
+    db.commit()
+
+
+def run(name, backend, session_factory, queries, limit):
+    started = time.perf_counter()
+    hits = 0
+    for query in queries:
+        db = session_factory()
+        hits += len(backend.search(db, query, None, None, limit))
+        db.close()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<18} {hits / len(queries):>10.1f} {elapsed / len(queries) * 1000:>12.2f}")
+
+
+def bench_database(label, engine, args, rng, queries):
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+
+    db = session_factory()
+    started = time.perf_counter()
+    seed(db, args.places, rng)
+    print(f"\n{label}: seeded in {time.perf_counter() - started:.1f}s (triggers included)\n")
+    print(f"{'backend':<18} {'hits/query':>10} {'ms/query':>12}")
+    native = get_search_backend(db, "native")
+    db.close()
+
+    run("like", LikeBackend(), session_factory, queries, args.limit)
+    run(native.name, native, session_factory, queries, args.limit)
+    return session_factory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--places", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--postgres-url", help="empty scratch database; tables are created and dropped")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    queries = [rng.choice(QUERIES) for _ in range(args.queries)]
+    print(f"{args.places} places, {args.queries} queries, limit {args.limit}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        session_factory = bench_database("sqlite", engine, args, rng, queries)
+
+        db = session_factory()
+        build_indexes(db)
+        db.close()
+        run("memory", memory_backend, session_factory, queries, args.limit)
+        engine.dispose()
+
+    if args.postgres_url:
+        engine = create_engine(args.postgres_url)
+        try:
+            bench_database("postgres", engine, args, rng, queries)
+        finally:
+            Base.metadata.drop_all(bind=engine)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
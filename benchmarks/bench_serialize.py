@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the FAST_JSON serialization path of the place listings
+
+Requests/sec on a single core (one process, in-process ASGI client) for
+/places/?limit=500 and /places/nearby/gps?limit=500, with the default
+response_model validation + stdlib json and with the orjson fast path.
+
+Usage:
+    python3 benchmarks/bench_serialize.py --places 5000 --requests 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from core.config import config
+from db.session import Base, get_db
+from main import app
+from models.place import Place
+from services.indexes import build_indexes
+from services.response_cache import response_cache
+
+CENTER = (52.52, 13.405)
+
+ENDPOINTS = [
+    ("/places/", {"limit": 500}),
+    ("/places/", {"limit": 500, "view": "card"}),
+    ("/places/nearby/gps", {"lat": CENTER[0], "lng": CENTER[1], "radius": 50, "limit": 500}),
+]
+
+
+def seed(db, count: int, rng: random.Random) -> None:
+    rows = [
+        {
+            "name": f"Place {i}",
+            "description": "Gemütliches Café mit Blick auf den Hof. " * 3,
+            "address": f"Straße {i}",
+            "city": "Berlin",
+            "postal_code": f"10{i % 1000:03d}",
+            "latitude": CENTER[0] + rng.uniform(-0.3, 0.3),
+            "longitude": CENTER[1] + rng.uniform(-0.3, 0.3),
+            "category": rng.choice(["cafe", "bar", "restaurant", "library"]),
+            "opening_hours": ["Mo-Fr 08:00-18:00", "Sa 10:00-16:00"],
+            "rating": round(rng.uniform(3, 5), 1),
+            "user_ratings_total": rng.randint(0, 2000),
+            "price_level": rng.randint(0, 4),
+            "website": f"https://example.org/{i}",
+            "is_active": True,
+        }
+        for i in range(count)
+    ]
+    db.execute(insert(Place), rows)
+    db.commit()
+
+
+def run(client, path, params, requests) -> float:
+    url = f"{config.API_V1_STR}{path}"
+    client.get(url, params=params)  # warm up
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get(url, params=params)
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--places", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+
+        db = session_factory()
+        seed(db, args.places, random.Random(7))
+        build_indexes(db)
+        db.close()
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        # Measure encoding, not hits of the response cache
+        response_cache.backend = None
+        client = TestClient(app)
+
+        print(f"{args.places} places, {args.requests} requests per endpoint, one core\n")
+        print(f"{'endpoint':<44} {'default req/s':>14} {'fast req/s':>12} {'speedup':>8}")
+        for path, params in ENDPOINTS:
+            config.FAST_JSON = False
+            default = run(client, path, params, args.requests)
+            config.FAST_JSON = True
+            fast = run(client, path, params, args.requests)
+            label = path + ("?view=card" if params.get("view") else "")
+            print(f"{label:<44} {default:>14.1f} {fast:>12.1f} {fast / default:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Alternative spellings of German city names (English/German, without umlauts)
+
+Kept free of app imports so the standalone scraper can use it too.
+"""
+
+CITY_ALTERNATIVES = {
+    'Munich': ['München', 'Munchen'],
+    'Cologne': ['Köln', 'Koln'],
+    'Nuremberg': ['Nürnberg', 'Nurnberg'],
+    'Hanover': ['Hannover'],
+    'Brunswick': ['Braunschweig'],
+    'Mönchengladbach': ['Monchengladbach'],
+    'Düsseldorf': ['Dusseldorf'],
+    'Saarbrücken': ['Saarbrucken'],
+    'Göttingen': ['Gottingen'],
+    'Würzburg': ['Wurzburg'],
+    'Fürth': ['Furth'],
+    'Kaiserslautern': ['K-Town'],  # US military nickname
+    'Lübeck': ['Lubeck'],
+    'Münster': ['Munster'],
+    'Osnabrück': ['Osnabruck'],
+    'Düren': ['Duren'],
+    'Gütersloh': ['Gutersloh'],
+    'Lüdenscheid': ['Ludenscheid'],
+}
@@ -12,7 +12,37 @@ class Config(BaseSettings):
     
     # Additional settings
     PLACES_PER_PAGE: int = 20
+    BULK_MAX_ITEMS: int = 1000  # places per /places/bulk request
     MAX_CHECKINS_PER_USER: int = 5
+    CHECKIN_SWEEP_INTERVAL: int = 60  # seconds between expired check-in sweeps, at most
+    CHECKIN_STREAM_HEARTBEAT: int = 15  # seconds between keepalives on /checkins/stream
+    OCCUPANCY_MAX_PLACES: int = 500  # place ids per /checkins/occupancy request
+    
+    # Cells (so clusters) per /places/viewport response; larger viewports get a coarser zoom
+    VIEWPORT_MAX_CELLS: int = 2048
+    
+    # Map tiles
+    TILE_CACHE_DIR: str = "tile_cache"
+    TILE_CACHE_MAX_AGE: int = 3600  # seconds clients may reuse a tile
+    TILE_CACHE_TTL: int = 300  # seconds a stored tile is served before it is rendered again
+    
+    # Text search: auto, memory, native (FTS5/tsvector) or like
+    SEARCH_BACKEND: str = "auto"
+    
+    # Encode large place listings with orjson, skipping response validation
+    FAST_JSON: bool = False
+    
+    # Places whose serialized JSON is kept in memory
+    PLACE_CACHE_SIZE: int = 10000
+    
+    # Anonymous GET response cache: memory, redis (shared, needs REDIS_URL) or off
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_TTL: int = 30  # seconds
+    RESPONSE_CACHE_SIZE: int = 1024  # responses per process (memory backend)
+    REDIS_URL: Optional[str] = None
+    
+    # Let concurrent identical nearby/search requests share one query
+    SINGLEFLIGHT_ENABLED: bool = True
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,42 @@
+"""
+In-process counters, served at /health/metrics
+"""
+import threading
+from collections import Counter
+from typing import Dict, Union
+
+
+class Metrics:
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a duration as {name}.count, {name}.total_ms, {name}.max_ms and {name}.last_ms"""
+        ms = seconds * 1000
+        with self._lock:
+            self._counts[f"{name}.count"] += 1
+            self._timings[f"{name}.total_ms"] = self._timings.get(f"{name}.total_ms", 0.0) + ms
+            self._timings[f"{name}.max_ms"] = max(self._timings.get(f"{name}.max_ms", 0.0), ms)
+            self._timings[f"{name}.last_ms"] = ms
+
+    def get(self, name: str) -> Union[int, float]:
+        return self._timings.get(name, self._counts[name])
+
+    def snapshot(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            values = {**self._counts, **{name: round(ms, 3) for name, ms in self._timings.items()}}
+        return dict(sorted(values.items()))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._timings.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,86 @@
+"""
+Database-native full-text search structures for the places table.
+
+SQLite gets an external-content FTS5 table, PostgreSQL a weighted
+tsvector column with a GIN index; triggers keep both in sync with
+places. The same statements run from the Alembic migration and, for
+databases created with Base.metadata.create_all, after the table is
+created.
+"""
+from sqlalchemy import DDL, event
+
+FTS_TABLE = "places_fts"
+SEARCH_VECTOR_COLUMN = "search_vector"
+
+_FTS_COLUMNS = "name, description, address, city, postal_code"
+_NEW_VALUES = "new.id, new.name, new.description, new.address, new.city, new.postal_code"
+_OLD_VALUES = "old.id, old.name, old.description, old.address, old.city, old.postal_code"
+
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_FTS_COLUMNS},
+        content='places', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS places_fts_ai AFTER INSERT ON places BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES ({_NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS places_fts_ad AFTER DELETE ON places BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS}) VALUES ('delete', {_OLD_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS places_fts_au AFTER UPDATE ON places BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS}) VALUES ('delete', {_OLD_VALUES});
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES ({_NEW_VALUES});
+    END""",
+]
+
+SQLITE_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS places_fts_au",
+    "DROP TRIGGER IF EXISTS places_fts_ad",
+    "DROP TRIGGER IF EXISTS places_fts_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _pg_folded(column: str) -> str:
+    """Lowercase with ß -> ss and umlauts/accents folded, matching services.text_index.normalize"""
+    return (
+        f"translate(replace(lower(coalesce(NEW.{column}, '')), 'ß', 'ss'), "
+        "'äöüáàâéèêíìîóòôúùûç', 'aouaaaeeeiiiooouuuc')"
+    )
+
+
+POSTGRES_DDL = [
+    f"ALTER TABLE places ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector",
+    f"CREATE INDEX IF NOT EXISTS ix_places_search_vector ON places USING gin ({SEARCH_VECTOR_COLUMN})",
+    f"""CREATE OR REPLACE FUNCTION places_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.{SEARCH_VECTOR_COLUMN} :=
+            setweight(to_tsvector('simple', {_pg_folded('name')}), 'A') ||
+            setweight(to_tsvector('simple', {_pg_folded('city')}), 'B') ||
+            setweight(to_tsvector('simple', {_pg_folded('postal_code')}), 'B') ||
+            setweight(to_tsvector('simple', {_pg_folded('address')}), 'C') ||
+            setweight(to_tsvector('simple', {_pg_folded('description')}), 'D');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS places_search_vector_trigger ON places",
+    """CREATE TRIGGER places_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, description, address, city, postal_code ON places
+        FOR EACH ROW EXECUTE FUNCTION places_search_vector_update()""",
+]
+
+POSTGRES_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS places_search_vector_trigger ON places",
+    "DROP FUNCTION IF EXISTS places_search_vector_update()",
+    "DROP INDEX IF EXISTS ix_places_search_vector",
+    f"ALTER TABLE places DROP COLUMN IF EXISTS {SEARCH_VECTOR_COLUMN}",
+]
+
+
+def attach_fulltext_ddl(table) -> None:
+    """Create the native search structures whenever create_all creates `table`"""
+    for statement in SQLITE_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    for statement in POSTGRES_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
@@ -661,6 +661,33 @@ async function filterPlaces() {
     }
 }
 
+let suggestTimer = null;
+
+function suggestPlaces() {
+    clearTimeout(suggestTimer);
+    suggestTimer = setTimeout(async () => {
+        const prefix = document.getElementById('place-search').value.trim();
+        const list = document.getElementById('place-suggestions');
+        if (!prefix) {
+            list.innerHTML = '';
+            return;
+        }
+
+        try {
+            const completions = await apiRequest(`/places/autocomplete?prefix=${encodeURIComponent(prefix)}&limit=8`);
+            list.innerHTML = '';
+            completions.forEach(completion => {
+                const option = document.createElement('option');
+                option.value = completion.text;
+                option.label = completion.kind === 'place' ? completion.text : `${completion.text} (${completion.score})`;
+                list.appendChild(option);
+            });
+        } catch (error) {
+            list.innerHTML = '';
+        }
+    }, 150);
+}
+
 // GPS Location Function
 async function useMyLocation() {
     if (!navigator.geolocation) {
@@ -1062,10 +1089,29 @@ async function showCheckinModal(placeId, placeName) {
     
     // Load active users at this place
     await loadActiveUsersAtPlace(placeId);
+    watchPlaceCheckins(placeId);
     
     document.getElementById('checkin-modal').classList.add('show');
 }
 
+// Live check-in events of the place shown in the check-in modal
+let placeCheckinStream = null;
+
+function watchPlaceCheckins(placeId) {
+    stopWatchingCheckins();
+    placeCheckinStream = new EventSource(`${API_BASE}/checkins/stream?place_id=${placeId}`);
+    const refresh = () => loadActiveUsersAtPlace(placeId);
+    placeCheckinStream.addEventListener('checkin', refresh);
+    placeCheckinStream.addEventListener('checkout', refresh);
+}
+
+function stopWatchingCheckins() {
+    if (placeCheckinStream) {
+        placeCheckinStream.close();
+        placeCheckinStream = null;
+    }
+}
+
 async function loadActiveUsersAtPlace(placeId) {
     const listContainer = document.getElementById('active-users-list');
     
@@ -1112,12 +1158,18 @@ async function loadActiveUsersAtPlace(placeId) {
 
 function closeModal(modalId) {
     document.getElementById(modalId).classList.remove('show');
+    if (modalId === 'checkin-modal') {
+        stopWatchingCheckins();
+    }
 }
 
 // Close modals when clicking outside
 window.addEventListener('click', function(event) {
     if (event.target.classList.contains('modal')) {
         event.target.classList.remove('show');
+        if (event.target.id === 'checkin-modal') {
+            stopWatchingCheckins();
+        }
     }
 });
 
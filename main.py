@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -6,8 +7,18 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from routes.api import api_router
 from core.config import config
+from db.session import SessionLocal
+from services.cities import city_directory
+from services.indexes import build_indexes
+from services.presence import presence
+from services.response_cache import ResponseCacheMiddleware
+from services.sweeper import checkin_sweeper
+from sqlalchemy.exc import SQLAlchemyError
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # Middleware to disable caching for frontend files
 class NoCacheMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
@@ -18,15 +29,35 @@ class NoCacheMiddleware(BaseHTTPMiddleware):
             response.headers["Expires"] = "0"
         return response
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the in-memory place indexes before serving traffic
+    db = SessionLocal()
+    try:
+        city_directory.load(db)
+        build_indexes(db)
+        presence.load(db)
+    except SQLAlchemyError as e:
+        logger.warning(f"Place indexes not built, falling back to database scans: {e}")
+    finally:
+        db.close()
+    
+    # End expired check-ins in the background instead of on read
+    checkin_sweeper.start()
+    yield
+    await checkin_sweeper.stop()
+
 def create_app() -> FastAPI:
     app = FastAPI(
     title=config.PROJECT_NAME,
         version="1.0.0",
     openapi_url=f"{config.API_V1_STR}/openapi.json",
+        lifespan=lifespan,
     )
     
     # Add no-cache middleware first
     app.add_middleware(NoCacheMiddleware)
+    app.add_middleware(ResponseCacheMiddleware)
     
     # Set up CORS - Allow frontend to access API
     app.add_middleware(
@@ -35,6 +66,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
     
     # Include API router
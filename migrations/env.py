@@ -0,0 +1,77 @@
+"""
+Alembic environment for the Zutreffen schema.
+
+Run from the project root:
+    alembic upgrade head
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from core.config import config as app_config
+from db.fulltext import FTS_TABLE, SEARCH_VECTOR_COLUMN
+from db.session import Base
+import models  # noqa: F401  registers every table on Base.metadata
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+# Callers (e.g. tests) may point at another database; default to the app's
+if not config.get_main_option("sqlalchemy.url"):
+    config.set_main_option("sqlalchemy.url", app_config.DATABASE_URL.replace("%", "%%"))
+
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """
+    Leave the full-text structures of 0003 out of autogenerate: the FTS5
+    table and its shadow tables on SQLite, the tsvector column and its
+    index on PostgreSQL. None of them are models.
+    """
+    if type_ == "table":
+        return not (name == FTS_TABLE or name.startswith(f"{FTS_TABLE}_"))
+    if type_ == "column":
+        return name != SEARCH_VECTOR_COLUMN
+    if type_ == "index":
+        return name != f"ix_places_{SEARCH_VECTOR_COLUMN}"
+    return True
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=True,
+            include_name=include_name,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
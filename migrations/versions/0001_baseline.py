@@ -0,0 +1,99 @@
+"""Baseline schema for users, places and check-ins
+
+Databases created earlier through Base.metadata.create_all (the import
+scripts) already have these tables; they are only created when missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=True),
+            sa.Column("username", sa.String(), nullable=True),
+            sa.Column("full_name", sa.String(), nullable=True),
+            sa.Column("hashed_password", sa.String(), nullable=True),
+            sa.Column("avatar_url", sa.String(), nullable=True),
+            sa.Column("bio", sa.String(), nullable=True),
+            sa.Column("languages", sa.JSON(), nullable=True),
+            sa.Column("interests", sa.JSON(), nullable=True),
+            sa.Column("why_here", sa.String(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    if "places" not in existing:
+        op.create_table(
+            "places",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("address", sa.String(), nullable=True),
+            sa.Column("city", sa.String(), nullable=True),
+            sa.Column("postal_code", sa.String(), nullable=True),
+            sa.Column("country", sa.String(), nullable=True),
+            sa.Column("latitude", sa.Float(), nullable=True),
+            sa.Column("longitude", sa.Float(), nullable=True),
+            sa.Column("category", sa.String(), nullable=True),
+            sa.Column("image_url", sa.String(), nullable=True),
+            sa.Column("phone", sa.String(), nullable=True),
+            sa.Column("website", sa.String(), nullable=True),
+            sa.Column("opening_hours", sa.JSON(), nullable=True),
+            sa.Column("rating", sa.Float(), nullable=True),
+            sa.Column("user_ratings_total", sa.Integer(), nullable=True),
+            sa.Column("price_level", sa.Integer(), nullable=True),
+            sa.Column("business_status", sa.String(), nullable=True),
+            sa.Column("google_place_id", sa.String(), nullable=True),
+            sa.Column("osm_id", sa.String(), nullable=True),
+            sa.Column("data_source", sa.String(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        for column in ("id", "name", "city", "postal_code", "category", "google_place_id", "osm_id"):
+            op.create_index(f"ix_places_{column}", "places", [column])
+
+    if "checkins" not in existing:
+        op.create_table(
+            "checkins",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("place_id", sa.Integer(), sa.ForeignKey("places.id"), nullable=False),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("message", sa.Text(), nullable=True),
+            sa.Column("duration_hours", sa.Integer(), nullable=True),
+            sa.Column("check_in_time", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("check_out_time", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index("ix_checkins_id", "checkins", ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("checkins")
+    op.drop_table("places")
+    op.drop_table("users")
@@ -0,0 +1,35 @@
+"""Composite index backing the nearby bounding-box prefilter
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created with create_all already have it
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("places")}
+    if "ix_places_active_lat_lng" not in existing:
+        op.create_index(
+            "ix_places_active_lat_lng",
+            "places",
+            ["is_active", "latitude", "longitude"],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_places_active_lat_lng", table_name="places")
@@ -0,0 +1,108 @@
+"""Native full-text search over places: SQLite FTS5 or PostgreSQL tsvector
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5(
+        name, description, address, city, postal_code,
+        content='places', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS places_fts_ai AFTER INSERT ON places BEGIN
+        INSERT INTO places_fts(rowid, name, description, address, city, postal_code)
+        VALUES (new.id, new.name, new.description, new.address, new.city, new.postal_code);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS places_fts_ad AFTER DELETE ON places BEGIN
+        INSERT INTO places_fts(places_fts, rowid, name, description, address, city, postal_code)
+        VALUES ('delete', old.id, old.name, old.description, old.address, old.city, old.postal_code);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS places_fts_au AFTER UPDATE ON places BEGIN
+        INSERT INTO places_fts(places_fts, rowid, name, description, address, city, postal_code)
+        VALUES ('delete', old.id, old.name, old.description, old.address, old.city, old.postal_code);
+        INSERT INTO places_fts(rowid, name, description, address, city, postal_code)
+        VALUES (new.id, new.name, new.description, new.address, new.city, new.postal_code);
+    END""",
+    # Index the rows that already exist
+    "INSERT INTO places_fts(places_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS places_fts_au",
+    "DROP TRIGGER IF EXISTS places_fts_ad",
+    "DROP TRIGGER IF EXISTS places_fts_ai",
+    "DROP TABLE IF EXISTS places_fts",
+]
+
+
+def _pg_folded(column: str) -> str:
+    return (
+        f"translate(replace(lower(coalesce(NEW.{column}, '')), 'ß', 'ss'), "
+        "'äöüáàâéèêíìîóòôúùûç', 'aouaaaeeeiiiooouuuc')"
+    )
+
+
+POSTGRES_UPGRADE = [
+    "ALTER TABLE places ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE INDEX IF NOT EXISTS ix_places_search_vector ON places USING gin (search_vector)",
+    f"""CREATE OR REPLACE FUNCTION places_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', {_pg_folded('name')}), 'A') ||
+            setweight(to_tsvector('simple', {_pg_folded('city')}), 'B') ||
+            setweight(to_tsvector('simple', {_pg_folded('postal_code')}), 'B') ||
+            setweight(to_tsvector('simple', {_pg_folded('address')}), 'C') ||
+            setweight(to_tsvector('simple', {_pg_folded('description')}), 'D');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS places_search_vector_trigger ON places",
+    """CREATE TRIGGER places_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, description, address, city, postal_code ON places
+        FOR EACH ROW EXECUTE FUNCTION places_search_vector_update()""",
+    # Fire the trigger once for the rows that already exist
+    "UPDATE places SET name = name",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS places_search_vector_trigger ON places",
+    "DROP FUNCTION IF EXISTS places_search_vector_update()",
+    "DROP INDEX IF EXISTS ix_places_search_vector",
+    "ALTER TABLE places DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _statements(sqlite, postgres):
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite
+    if dialect == "postgresql":
+        return postgres
+    # Other databases keep using the LIKE fallback
+    return []
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for statement in _statements(SQLITE_UPGRADE, POSTGRES_UPGRADE):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for statement in _statements(SQLITE_DOWNGRADE, POSTGRES_DOWNGRADE):
+        op.execute(statement)
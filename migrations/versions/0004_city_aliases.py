@@ -0,0 +1,133 @@
+"""Cities with alias spellings, and places.city_id resolved through them
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 13:00:00
+
+"""
+import re
+import unicodedata
+from typing import Dict, List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# core.cities.CITY_ALTERNATIVES as of this revision
+CITY_ALTERNATIVES = {
+    "Munich": ["München", "Munchen"],
+    "Cologne": ["Köln", "Koln"],
+    "Nuremberg": ["Nürnberg", "Nurnberg"],
+    "Hanover": ["Hannover"],
+    "Brunswick": ["Braunschweig"],
+    "Mönchengladbach": ["Monchengladbach"],
+    "Düsseldorf": ["Dusseldorf"],
+    "Saarbrücken": ["Saarbrucken"],
+    "Göttingen": ["Gottingen"],
+    "Würzburg": ["Wurzburg"],
+    "Fürth": ["Furth"],
+    "Kaiserslautern": ["K-Town"],
+    "Lübeck": ["Lubeck"],
+    "Münster": ["Munster"],
+    "Osnabrück": ["Osnabruck"],
+    "Düren": ["Duren"],
+    "Gütersloh": ["Gutersloh"],
+    "Lüdenscheid": ["Ludenscheid"],
+}
+
+UMLAUTS = {"ä": "ae", "ö": "oe", "ü": "ue"}
+
+
+def _tokens(text: str) -> List[str]:
+    folded = unicodedata.normalize("NFKD", text.lower().replace("ß", "ss"))
+    return re.findall(r"[0-9a-z]+", "".join(ch for ch in folded if not unicodedata.combining(ch)))
+
+
+def _city_keys(name: str) -> List[str]:
+    """services.cities.city_keys as of this revision"""
+    keys = [" ".join(_tokens(name))]
+    lowered = name.lower()
+    if any(umlaut in lowered for umlaut in UMLAUTS):
+        for umlaut, replacement in UMLAUTS.items():
+            lowered = lowered.replace(umlaut, replacement)
+        keys.append(" ".join(_tokens(lowered)))
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # Databases created with create_all after this revision already have these
+    if "cities" not in inspector.get_table_names():
+        op.create_table(
+            "cities",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False, unique=True),
+        )
+        op.create_index("ix_cities_id", "cities", ["id"])
+    if "city_aliases" not in inspector.get_table_names():
+        op.create_table(
+            "city_aliases",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("city_id", sa.Integer(), sa.ForeignKey("cities.id"), nullable=False),
+            sa.Column("key", sa.String(), nullable=False, unique=True),
+        )
+        op.create_index("ix_city_aliases_id", "city_aliases", ["id"])
+        op.create_index("ix_city_aliases_city_id", "city_aliases", ["city_id"])
+    if "city_id" not in {column["name"] for column in inspector.get_columns("places")}:
+        # Plain ADD COLUMN: a batch rebuild of places on SQLite would drop the
+        # full-text triggers, and SQLite cannot add the foreign key otherwise
+        op.add_column("places", sa.Column("city_id", sa.Integer(), nullable=True))
+        op.create_index("ix_places_city_id", "places", ["city_id"])
+        if bind.dialect.name != "sqlite":
+            op.create_foreign_key("fk_places_city_id", "places", "cities", ["city_id"], ["id"])
+
+    # Backfill: the known alternative spellings, then every city in use
+    cities = sa.table("cities", sa.column("id", sa.Integer), sa.column("name", sa.String))
+    aliases = sa.table("city_aliases", sa.column("city_id", sa.Integer), sa.column("key", sa.String))
+    places = sa.table("places", sa.column("city", sa.String), sa.column("city_id", sa.Integer))
+
+    ids: Dict[str, int] = dict(bind.execute(sa.select(aliases.c.key, aliases.c.city_id)).all())
+
+    def ensure(name: str, alternatives: List[str]) -> int:
+        keys = [key for spelling in (name, *alternatives) for key in _city_keys(spelling)]
+        city_id = next((ids[key] for key in keys if key in ids), None)
+        if city_id is None:
+            city_id = bind.execute(sa.insert(cities).values(name=name).returning(cities.c.id)).scalar_one()
+        for key in dict.fromkeys(keys):
+            if key not in ids:
+                bind.execute(sa.insert(aliases).values(city_id=city_id, key=key))
+                ids[key] = city_id
+        return city_id
+
+    for name, alternatives in CITY_ALTERNATIVES.items():
+        ensure(name, alternatives)
+
+    used = bind.execute(
+        sa.select(places.c.city).where(places.c.city.isnot(None), places.c.city_id.is_(None)).distinct()
+    ).scalars().all()
+    for name in used:
+        if not _city_keys(name):
+            continue
+        bind.execute(
+            sa.update(places).where(places.c.city == name, places.c.city_id.is_(None)).values(city_id=ensure(name, []))
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        op.drop_constraint("fk_places_city_id", "places", type_="foreignkey")
+    op.drop_index("ix_places_city_id", table_name="places")
+    op.drop_column("places", "city_id")
+    op.drop_table("city_aliases")
+    op.drop_table("cities")
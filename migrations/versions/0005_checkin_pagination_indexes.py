@@ -0,0 +1,34 @@
+"""Indexes backing keyset pagination of the check-in listings
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created with create_all already have them
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("checkins")}
+    if "ix_checkins_status_time_id" not in existing:
+        op.create_index("ix_checkins_status_time_id", "checkins", ["status", "check_in_time", "id"])
+    if "ix_checkins_user_time_id" not in existing:
+        op.create_index("ix_checkins_user_time_id", "checkins", ["user_id", "check_in_time", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_checkins_user_time_id", table_name="checkins")
+    op.drop_index("ix_checkins_status_time_id", table_name="checkins")
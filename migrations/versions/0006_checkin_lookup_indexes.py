@@ -0,0 +1,37 @@
+"""Indexes for the check-in lookups by user and by place
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created with create_all already have them
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("checkins")}
+    if "ix_checkins_user_status" not in existing:
+        op.create_index("ix_checkins_user_status", "checkins", ["user_id", "status"])
+    if "ix_checkins_place_status" not in existing:
+        op.create_index("ix_checkins_place_status", "checkins", ["place_id", "status"])
+    if "ix_checkins_time_id" not in existing:
+        op.create_index("ix_checkins_time_id", "checkins", ["check_in_time", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_checkins_time_id", table_name="checkins")
+    op.drop_index("ix_checkins_place_status", table_name="checkins")
+    op.drop_index("ix_checkins_user_status", table_name="checkins")
@@ -0,0 +1,76 @@
+"""Foreign key from places.city_id to cities on SQLite
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 20:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The full-text triggers of 0003; SQLite drops them with the old table
+# when a batch operation rebuilds places
+SQLITE_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS places_fts_ai AFTER INSERT ON places BEGIN
+        INSERT INTO places_fts(rowid, name, description, address, city, postal_code)
+        VALUES (new.id, new.name, new.description, new.address, new.city, new.postal_code);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS places_fts_ad AFTER DELETE ON places BEGIN
+        INSERT INTO places_fts(places_fts, rowid, name, description, address, city, postal_code)
+        VALUES ('delete', old.id, old.name, old.description, old.address, old.city, old.postal_code);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS places_fts_au AFTER UPDATE ON places BEGIN
+        INSERT INTO places_fts(places_fts, rowid, name, description, address, city, postal_code)
+        VALUES ('delete', old.id, old.name, old.description, old.address, old.city, old.postal_code);
+        INSERT INTO places_fts(rowid, name, description, address, city, postal_code)
+        VALUES (new.id, new.name, new.description, new.address, new.city, new.postal_code);
+    END""",
+]
+
+
+def _city_foreign_keys(bind):
+    return [
+        foreign_key for foreign_key in sa.inspect(bind).get_foreign_keys("places")
+        if foreign_key["constrained_columns"] == ["city_id"]
+    ]
+
+
+def _rebuild_places(operation) -> None:
+    """Run `operation(batch)` in a batch rebuild of places, keeping its triggers"""
+    bind = op.get_bind()
+    with op.batch_alter_table("places", recreate="always") as batch:
+        operation(batch)
+    if sa.inspect(bind).has_table("places_fts"):
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 0004 adds the key everywhere but SQLite, whose ALTER TABLE cannot, and
+    # databases created with create_all already have it
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite" or _city_foreign_keys(bind):
+        return
+    _rebuild_places(lambda batch: batch.create_foreign_key("fk_places_city_id", "cities", ["city_id"], ["id"]))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Without the key 0004 can drop the column again
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    names = [foreign_key["name"] for foreign_key in _city_foreign_keys(bind)]
+    if "fk_places_city_id" in names:
+        _rebuild_places(lambda batch: batch.drop_constraint("fk_places_city_id", type_="foreignkey"))
@@ -1,5 +1,6 @@
 from models.user import User
 from models.place import Place
 from models.checkin import CheckIn
+from models.city import City, CityAlias
 
-__all__ = ["User", "Place", "CheckIn"]
+__all__ = ["User", "Place", "CheckIn", "City", "CityAlias"]
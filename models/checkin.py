@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from db.session import Base
@@ -18,3 +18,13 @@ class CheckIn(Base):
     # Relationships
     user = relationship("User", back_populates="checkins")
     place = relationship("Place", back_populates="checkins")
+    
+    __table_args__ = (
+        # Keyset pagination of the check-in listings, newest first
+        Index("ix_checkins_status_time_id", "status", "check_in_time", "id"),
+        Index("ix_checkins_user_time_id", "user_id", "check_in_time", "id"),
+        Index("ix_checkins_time_id", "check_in_time", "id"),
+        # One active check-in per user, active check-ins at a place
+        Index("ix_checkins_user_status", "user_id", "status"),
+        Index("ix_checkins_place_status", "place_id", "status"),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy.orm import relationship
+from db.session import Base
+
+class City(Base):
+    __tablename__ = "cities"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)  # Canonical spelling
+    
+    # Relationships
+    aliases = relationship("CityAlias", back_populates="city")
+
+
+class CityAlias(Base):
+    __tablename__ = "city_aliases"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    city_id = Column(Integer, ForeignKey("cities.id"), nullable=False, index=True)
+    key = Column(String, unique=True, nullable=False)  # Normalized spelling, see services.cities.city_keys
+    
+    # Relationships
+    city = relationship("City", back_populates="aliases")
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, JSON, Index, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from db.session import Base
+from db.fulltext import attach_fulltext_ddl
 
 class Place(Base):
     __tablename__ = "places"
@@ -12,6 +13,7 @@ class Place(Base):
     description = Column(Text)
     address = Column(String)
     city = Column(String, index=True)
+    city_id = Column(Integer, ForeignKey("cities.id"), nullable=True, index=True)  # Resolved through city aliases
     postal_code = Column(String, index=True)
     country = Column(String, default="Germany")
     latitude = Column(Float)
@@ -40,3 +42,11 @@ class Place(Base):
     
     # Relationships
     checkins = relationship("CheckIn", back_populates="place")
+    
+    __table_args__ = (
+        # Serves the bounding-box prefilter of nearby queries
+        Index("ix_places_active_lat_lng", "is_active", "latitude", "longitude"),
+    )
+
+
+attach_fulltext_ddl(Place.__table__)
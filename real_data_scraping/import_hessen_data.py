@@ -16,6 +16,7 @@ from models.user import User
 from models.place import Place
 from models.checkin import CheckIn
 from core.security import get_password_hash
+from services.cities import ensure_city
 
 def import_hessen_data():
     db = SessionLocal()
@@ -47,12 +48,19 @@ def import_hessen_data():
         
         # Import places
         imported_places = []
+        city_ids = {}  # city name -> id, resolved once per import
         for place_data in hessen_places:
             try:
+                city = place_data.get('city', '')
+                if city not in city_ids:
+                    resolved = ensure_city(db, city, place_data.get('city_alternatives', []))
+                    city_ids[city] = resolved.id if resolved else None
+
                 place = Place(
                     name=place_data.get('name'),
                     address=place_data.get('address', ''),
-                    city=place_data.get('city', ''),
+                    city=city,
+                    city_id=city_ids[city],
                     postal_code=place_data.get('postal_code'),
                     country='Germany',
                     latitude=place_data.get('latitude'),
@@ -24,6 +24,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 try:
     from sqlalchemy.orm import Session
     from models.place import Place
+    from services.cities import ensure_city
     from db.session import SessionLocal, engine, Base
 except ImportError:
     print("❌ Error: Cannot import Zutreffen modules")
@@ -79,6 +80,7 @@ class DatabaseImporter:
         """Import places to database."""
         imported = 0
         skipped = 0
+        city_ids = {}  # city name -> id, resolved once per import
         
         logger.info(f"Starting import of {len(places)} places...")
         
@@ -127,6 +129,12 @@ class DatabaseImporter:
                     is_active=True
                 )
                 
+                city = place_data['city']
+                if city not in city_ids:
+                    resolved = ensure_city(self.db, city, place_data.get('city_alternatives', []))
+                    city_ids[city] = resolved.id if resolved else None
+                new_place.city_id = city_ids[city]
+                
                 self.db.add(new_place)
                 imported += 1
                 
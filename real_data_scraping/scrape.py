@@ -31,6 +31,11 @@ from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional
 from collections import defaultdict
+import sys
+
+# Shared with the app's city alias index
+sys.path.append(str(Path(__file__).parent.parent))
+from core.cities import CITY_ALTERNATIVES
 
 # =============================================================================
 # CONFIGURATION
@@ -98,27 +103,8 @@ GERMAN_CITIES = {
               'Neustadt', 'Landau', 'Pirmasens', 'Homburg', 'Zweibrücken']
 }
 
-# Alternative city names (German/English variations for search)
-CITY_ALTERNATIVES = {
-    'Munich': ['München', 'Munchen'],
-    'Cologne': ['Köln', 'Koln'],
-    'Nuremberg': ['Nürnberg', 'Nurnberg'],
-    'Hanover': ['Hannover'],
-    'Brunswick': ['Braunschweig'],
-    'Mönchengladbach': ['Monchengladbach'],
-    'Düsseldorf': ['Dusseldorf'],
-    'Saarbrücken': ['Saarbrucken'],
-    'Göttingen': ['Gottingen'],
-    'Würzburg': ['Wurzburg'],
-    'Fürth': ['Furth'],
-    'Kaiserslautern': ['K-Town'],  # US military nickname
-    'Lübeck': ['Lubeck'],
-    'Münster': ['Munster'],
-    'Osnabrück': ['Osnabruck'],
-    'Düren': ['Duren'],
-    'Gütersloh': ['Gutersloh'],
-    'Lüdenscheid': ['Ludenscheid'],
-}
+# Alternative city names (German/English variations for search) live in
+# core/cities.py as CITY_ALTERNATIVES
 
 # OSM to App category mapping
 OSM_CATEGORY_MAP = {
@@ -1,48 +1,124 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional
 from datetime import datetime
 from db.session import get_db
 from models.checkin import CheckIn
 from models.place import Place
 from models.user import User
 from schemas.checkin import CheckIn as CheckInSchema, CheckInCreate, CheckInUpdate
+from core.config import config
 from core.deps import get_current_active_user
+from services.checkin_events import check_filter, checkin_broker, sse_events
+from services.pagination import paginate
+from services.presence import Presence, expiry_of, naive_utc, occupancy, presence
+from services.response_cache import response_cache
 
 router = APIRouter()
 
+
+def page_response(response: Response, query, cursor: Optional[str], skip: int, limit: int) -> List[CheckIn]:
+    """Page of check-ins by (check_in_time, id), newest first; sets X-Next-Cursor"""
+    try:
+        checkins, next_cursor = paginate(
+            query, (CheckIn.check_in_time, CheckIn.id), limit, cursor=cursor, skip=skip, descending=True
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return checkins
+
 @router.get("/", response_model=List[CheckInSchema])
 async def list_checkins(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     active_only: bool = True,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     db: Session = Depends(get_db)
 ):
     """
-    List all checkins. By default shows only active check-ins.
+    List all checkins, newest first. By default shows only active check-ins.
     """
     query = db.query(CheckIn)
     
     if active_only:
         query = query.filter(CheckIn.status == "active")
     
-    checkins = query.order_by(CheckIn.check_in_time.desc()).offset(skip).limit(limit).all()
-    return checkins
+    return page_response(response, query, cursor, skip, limit)
 
 @router.get("/my", response_model=List[CheckInSchema])
 async def my_checkins(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Get current user's check-ins.
+    Get current user's check-ins, newest first.
     """
-    checkins = db.query(CheckIn).filter(
-        CheckIn.user_id == current_user.id
-    ).order_by(CheckIn.check_in_time.desc()).offset(skip).limit(limit).all()
-    return checkins
+    query = db.query(CheckIn).filter(CheckIn.user_id == current_user.id)
+    return page_response(response, query, cursor, skip, limit)
+
+# Declared before /{checkin_id} so "stream" is not parsed as an id
+@router.get("/stream")
+async def stream_checkins(
+    place_id: Optional[int] = Query(None, description="Events of one place"),
+    city: Optional[str] = Query(None, description="Events of places in a city"),
+    bbox: Optional[str] = Query(None, description="Events of places in min_lng,min_lat,max_lng,max_lat"),
+):
+    """
+    Live check-in and check-out events as Server-Sent Events, for exactly
+    one of a place, a city or a bounding box.
+    """
+    bounds = None
+    if bbox is not None:
+        try:
+            bounds = tuple(float(value) for value in bbox.split(","))
+        except ValueError:
+            bounds = ()
+        if len(bounds) != 4:
+            raise HTTPException(status_code=400, detail="bbox must be min_lng,min_lat,max_lng,max_lat")
+        if bounds[0] > bounds[2] or bounds[1] > bounds[3]:
+            raise HTTPException(status_code=400, detail="bbox minimums must not exceed maximums")
+    try:
+        check_filter(place_id, city, bounds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        sse_events(config.CHECKIN_STREAM_HEARTBEAT, place_id=place_id, city=city, bbox=bounds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Also declared before /{checkin_id}
+@router.get("/occupancy", response_model=Dict[int, int])
+async def get_occupancy(
+    place_ids: str = Query(..., description="Comma-separated place ids"),
+    db: Session = Depends(get_db)
+):
+    """
+    Number of users currently checked in at each of the places, e.g. for
+    the badges of a card grid or nearby list in one request with the ids of
+    the page just loaded. The place listings themselves don't carry the
+    counts, which change with every check-in, so they stay cacheable.
+    """
+    try:
+        ids = [int(value) for value in place_ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="place_ids must be comma-separated integers")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > config.OCCUPANCY_MAX_PLACES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.OCCUPANCY_MAX_PLACES} place ids per request"
+        )
+    return occupancy(db, ids)
 
 @router.get("/{checkin_id}", response_model=CheckInSchema)
 async def get_checkin(checkin_id: int, db: Session = Depends(get_db)):
@@ -68,17 +144,22 @@ async def create_checkin(
     if not place:
         raise HTTPException(status_code=404, detail="Place not found")
     
-    # Check if user already has an active checkin
-    active_checkin = db.query(CheckIn).filter(
+    # Check if user already has an active checkin. Ones whose time ran out
+    # but that the sweeper hasn't reached yet are ended here instead.
+    now = datetime.utcnow()
+    expired = []
+    for active_checkin in db.query(CheckIn).filter(
         CheckIn.user_id == current_user.id,
         CheckIn.status == "active"
-    ).first()
-    
-    if active_checkin:
-        raise HTTPException(
-            status_code=400,
-            detail="You already have an active check-in. Please end it first."
-        )
+    ).all():
+        if expiry_of(active_checkin) > now:
+            raise HTTPException(
+                status_code=400,
+                detail="You already have an active check-in. Please end it first."
+            )
+        active_checkin.status = "ended"
+        active_checkin.check_out_time = expiry_of(active_checkin)
+        expired.append(active_checkin)
     
     # Create new check-in with duration
     new_checkin = CheckIn(
@@ -92,6 +173,12 @@ async def create_checkin(
     db.add(new_checkin)
     db.commit()
     db.refresh(new_checkin)
+    for checkin in expired:
+        presence.discard(checkin.id)
+        checkin_broker.publish("checkout", checkin.id, checkin.place_id, checkin.user_id, checkin.check_out_time)
+    presence.add(new_checkin)
+    checkin_broker.publish("checkin", new_checkin.id, new_checkin.place_id, new_checkin.user_id, new_checkin.check_in_time)
+    await response_cache.invalidate("checkins")
     return new_checkin
 
 @router.post("/{checkin_id}/end", response_model=CheckInSchema)
@@ -122,6 +209,9 @@ async def end_checkin(
     
     db.commit()
     db.refresh(checkin)
+    presence.discard(checkin.id)
+    checkin_broker.publish("checkout", checkin.id, checkin.place_id, checkin.user_id, checkin.check_out_time)
+    await response_cache.invalidate("checkins")
     return checkin
 
 @router.delete("/{checkin_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -144,8 +234,13 @@ async def delete_checkin(
             detail="You can only delete your own check-ins"
         )
     
+    place_id, user_id, was_active = checkin.place_id, checkin.user_id, checkin.status == "active"
     db.delete(checkin)
     db.commit()
+    presence.discard(checkin_id)
+    if was_active:
+        checkin_broker.publish("checkout", checkin_id, place_id, user_id, datetime.utcnow())
+    await response_cache.invalidate("checkins")
     return {"message": "Check-in deleted successfully"}
 
 @router.get("/place/{place_id}/active", response_model=List[dict])
@@ -157,33 +252,34 @@ async def get_active_users_at_place(
     Get all active users currently checked in at a specific place.
     Returns user info with time remaining.
     """
-    from datetime import datetime, timedelta
+    now = datetime.utcnow()
+    if presence.ready:
+        active = presence.at_place(place_id, now)
+    else:
+        # Registry not loaded: read the check-ins, skipping expired ones
+        rows = db.query(CheckIn).filter(
+            CheckIn.place_id == place_id,
+            CheckIn.status == "active"
+        ).order_by(CheckIn.id).all()
+        active = [Presence(
+            checkin.id, checkin.user_id, checkin.place_id, checkin.message,
+            checkin.duration_hours, naive_utc(checkin.check_in_time), expiry_of(checkin),
+        ) for checkin in rows if expiry_of(checkin) > now]
+    if not active:
+        return []
     
-    # Get active checkins at this place
-    active_checkins = db.query(CheckIn, User).join(
-        User, CheckIn.user_id == User.id
-    ).filter(
-        CheckIn.place_id == place_id,
-        CheckIn.status == "active"
-    ).all()
+    users = {user.id: user for user in db.query(User).filter(User.id.in_({item.user_id for item in active}))}
     
     result = []
-    now = datetime.utcnow()
-    
-    for checkin, user in active_checkins:
+    for item in active:
+        user = users.get(item.user_id)
+        if user is None:
+            continue
         # Calculate time remaining
-        checkin_end = checkin.check_in_time + timedelta(hours=checkin.duration_hours)
-        time_left = checkin_end - now
+        time_left = item.expires_at - now
         hours_left = max(0, int(time_left.total_seconds() / 3600))
         minutes_left = max(0, int((time_left.total_seconds() % 3600) / 60))
         
-        # Auto-checkout if time expired
-        if time_left.total_seconds() <= 0:
-            checkin.status = "ended"
-            checkin.check_out_time = checkin_end
-            db.commit()
-            continue
-        
         result.append({
             "user_id": user.id,
             "username": user.username or user.full_name or "Anonymous",
@@ -192,11 +288,11 @@ async def get_active_users_at_place(
             "languages": user.languages or [],
             "interests": user.interests or [],
             "why_here": user.why_here,
-            "message": checkin.message,
-            "duration_hours": checkin.duration_hours,
+            "message": item.message,
+            "duration_hours": item.duration_hours,
             "hours_left": hours_left,
             "minutes_left": minutes_left,
-            "checked_in_at": checkin.check_in_time.isoformat()
+            "checked_in_at": item.check_in_time.isoformat()
         })
     
-    return result
\ No newline at end of file
+    return result
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
+from core.metrics import metrics
+from services.response_cache import response_cache
 
 router = APIRouter()
 
@@ -8,4 +10,16 @@ async def health_check():
     return {
         "status": "healthy",
         "version": "1.0.0"
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK)
+async def get_metrics():
+    """
+    In-process counters, e.g. response cache hits and misses.
+    """
+    backend = response_cache.backend
+    return {
+        "response_cache_backend": backend.name if backend is not None else "off",
+        "counters": metrics.snapshot(),
+    }
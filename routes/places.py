@@ -1,18 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from db.session import get_db
 from models.place import Place
 from models.user import User
-from schemas.place import Place as PlaceSchema, PlaceCreate, PlaceUpdate
+from schemas.place import (
+    Place as PlaceSchema,
+    BulkResult,
+    Completion,
+    FacetedSearchResults,
+    PlaceBulkUpdate,
+    PlaceCard,
+    PlaceCreate,
+    PlaceList,
+    PlaceUpdate,
+    ViewportClusters,
+    by_view,
+)
+from core.config import config
 from core.deps import get_current_active_user
-from services.location import get_all_cities, get_places_near_location, search_places
+from services.location import (
+    get_all_cities,
+    get_completions,
+    get_nearest_places,
+    get_places_near_location,
+    get_viewport_clusters,
+    search_places,
+    search_places_with_facets,
+)
+from services.knn import decode_cursor, encode_cursor
+from services.cities import assign_city, city_clause
+from services.bulk import bulk_create, bulk_update
+from services.indexes import sync_place, sync_places
+from services.pagination import paginate
+from services.tiles import MAX_TILE_ZOOM, tile_cache
+from services.place_cache import encode_places, encode_places_with_distance, place_json_cache
+from services.response_cache import response_cache
+from services.singleflight import nearby_flight, search_flight
+from services.serialization import RawJSONResponse
+from services.views import PlaceView, place_load_options, project_places
 
 
 router = APIRouter()
 
 
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header names the current ETag (weak comparison)"""
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
 class PlaceWithDistance(BaseModel):
     place: PlaceSchema
     distance_km: float
@@ -20,36 +58,156 @@ class PlaceWithDistance(BaseModel):
     class Config:
         orm_mode = True
 
-@router.get("/", response_model=List[PlaceSchema])
+
+class PlaceCardWithDistance(BaseModel):
+    place: PlaceCard
+    distance_km: float
+
+
+class NearestPlacesPage(BaseModel):
+    items: List[PlaceWithDistance]
+    next_cursor: Optional[str] = None
+
+@router.get("/", response_model=PlaceList)
 async def list_places(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     city: str = None,
     category: str = None,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    view: PlaceView = Query("full", description="card: only the fields the card grid shows"),
     db: Session = Depends(get_db)
 ):
     """
-    List all places with optional filters.
+    List all places with optional filters, by id.
     """
-    query = db.query(Place).filter(Place.is_active == True)
+    query = db.query(Place).options(*place_load_options(view)).filter(Place.is_active == True)
     
     if city:
-        query = query.filter(Place.city == city)
+        query = query.filter(city_clause(city))
     if category:
         query = query.filter(Place.category == category)
     
-    places = query.offset(skip).limit(limit).all()
-    return places
+    try:
+        places, next_cursor = paginate(query, (Place.id,), limit, cursor=cursor, skip=skip)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if config.FAST_JSON:
+        return encode_places(places, view, headers=headers)
+    response.headers.update(headers)
+    return project_places(places, view)
+
+# Declared before /{place_id} so "viewport" is not parsed as an id
+@router.get("/viewport", response_model=ViewportClusters)
+async def get_viewport(
+    bbox: str = Query(..., description="min_lng,min_lat,max_lng,max_lat"),
+    zoom: int = Query(..., ge=0, le=22, description="Map zoom level"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get marker clusters for a map viewport at a zoom level.
+    Each cluster has a count, centroid and most common category. Viewports
+    too large for the zoom are clustered at the coarser zoom returned.
+    """
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lng,min_lat,max_lng,max_lat")
+    if min_lng > max_lng or min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="bbox minimums must not exceed maximums")
+    
+    zoom, clusters = get_viewport_clusters(db, min_lng, min_lat, max_lng, max_lat, zoom)
+    return {"zoom": zoom, "clusters": clusters}
+
+@router.get("/autocomplete", response_model=List[Completion])
+async def autocomplete(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Typed prefix"),
+    limit: int = Query(10, ge=1, le=20, description="Max completions"),
+    db: Session = Depends(get_db)
+):
+    """
+    Complete a typed prefix to place names, cities and postal codes,
+    most popular first.
+    """
+    return get_completions(db, prefix, limit)
+
+def check_batch_size(items: list) -> None:
+    if len(items) > config.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {config.BULK_MAX_ITEMS} places per batch")
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_places_bulk(
+    items: List[PlaceCreate],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Create a batch of places in one transaction (requires authentication).
+    """
+    check_batch_size(items)
+    ids = bulk_create(db, items)
+    db.commit()
+    
+    sync_places(db.query(Place).filter(Place.id.in_(ids)).all())
+    await response_cache.invalidate("places")
+    return {
+        "created": len(ids),
+        "items": [{"index": index, "id": place_id, "status": "created"} for index, place_id in enumerate(ids)],
+    }
+
+
+@router.patch("/bulk", response_model=BulkResult)
+async def update_places_bulk(
+    items: List[PlaceBulkUpdate],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Apply a batch of partial updates in one transaction (requires
+    authentication). Items naming an unknown place are reported as
+    not_found; the rest are applied.
+    """
+    check_batch_size(items)
+    updated, missing = bulk_update(db, items)
+    db.commit()
+    
+    if updated:
+        ids = {items[index].id for index in updated}
+        sync_places(db.query(Place).filter(Place.id.in_(ids)).all())
+        await response_cache.invalidate("places")
+    
+    results = [{"index": index, "id": items[index].id, "status": "updated"} for index in updated]
+    results += [{"index": index, "id": items[index].id, "status": "not_found"} for index in missing]
+    results.sort(key=lambda result: result["index"])
+    return {"updated": len(updated), "items": results}
+
 
 @router.get("/{place_id}", response_model=PlaceSchema)
-async def get_place(place_id: int, db: Session = Depends(get_db)):
+async def get_place(
+    place_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
     Get a specific place by ID.
+    Sends an ETag; a matching If-None-Match gets 304 Not Modified.
     """
-    place = db.query(Place).filter(Place.id == place_id).first()
-    if not place:
+    # Only the version column unless the place changed since it was cached
+    version = db.query(Place.updated_at).filter(Place.id == place_id).first()
+    if version is None:
         raise HTTPException(status_code=404, detail="Place not found")
-    return place
+    entry = place_json_cache.lookup(place_id, version.updated_at)
+    if entry is None:
+        entry = place_json_cache.store(db.query(Place).filter(Place.id == place_id).first())
+    body, etag = entry
+    
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return RawJSONResponse(body, headers=headers)
 
 @router.post("/", response_model=PlaceSchema, status_code=status.HTTP_201_CREATED)
 async def create_place(
@@ -62,8 +220,11 @@ async def create_place(
     """
     new_place = Place(**place_data.dict())
     db.add(new_place)
+    assign_city(db, new_place)
     db.commit()
     db.refresh(new_place)
+    sync_place(new_place)
+    await response_cache.invalidate("places")
     return new_place
 
 @router.put("/{place_id}", response_model=PlaceSchema)
@@ -84,9 +245,13 @@ async def update_place(
     update_data = place_data.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(place, field, value)
+    if "city" in update_data:
+        assign_city(db, place)
     
     db.commit()
     db.refresh(place)
+    sync_place(place)
+    await response_cache.invalidate("places")
     return place
 
 @router.delete("/{place_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -104,54 +269,144 @@ async def delete_place(
     
     place.is_active = False
     db.commit()
+    sync_place(place)
+    await response_cache.invalidate("places")
     return None
 
 
 @router.get("/cities/all", response_model=List[str])
-async def get_cities(db: Session = Depends(get_db)):
+async def get_cities(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
     Get list of all unique cities in the database.
+    Sends an ETag; a matching If-None-Match gets 304 Not Modified.
     """
-    cities = get_all_cities(db)
+    cities, etag = get_all_cities(db)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
     return cities
 
 
-@router.get("/search/text", response_model=List[PlaceSchema])
+@router.get("/search/text", response_model=PlaceList)
 async def search_places_endpoint(
     q: Optional[str] = Query(None, description="Search query"),
     city: Optional[str] = Query(None, description="Filter by city"),
     category: Optional[str] = Query(None, description="Filter by category"),
     limit: int = Query(100, le=500, description="Max results"),
+    fuzzy: bool = Query(False, description="Also match misspelled words"),
+    view: PlaceView = Query("full", description="card: only the fields the card grid shows"),
     db: Session = Depends(get_db)
 ):
     """
     Search places by text query with optional filters.
+    Concurrent identical searches share one query.
+    """
+    places = await search_flight.run_with_session(
+        ("text", q, city, category, limit, fuzzy, view), db.get_bind(),
+        search_places, query=q, city=city, category=category, limit=limit, fuzzy=fuzzy,
+        options=place_load_options(view)
+    )
+    return project_places(places, view)
+
+
+@router.get("/search/faceted", response_model=FacetedSearchResults)
+async def search_places_faceted(
+    q: Optional[str] = Query(None, description="Search query"),
+    city: Optional[str] = Query(None, description="Filter by city"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    limit: int = Query(100, le=500, description="Max results"),
+    fuzzy: bool = Query(False, description="Also match misspelled words"),
+    db: Session = Depends(get_db)
+):
     """
-    places = search_places(db, query=q, city=city, category=category, limit=limit)
-    return places
+    Search places like /search/text, plus category, city and price level
+    counts over all matches.
+    """
+    places, facets = search_places_with_facets(db, query=q, city=city, category=category, limit=limit, fuzzy=fuzzy)
+    return {"items": places, "facets": facets}
 
 
-@router.get("/nearby/gps", response_model=List[PlaceWithDistance])
+@router.get("/nearby/gps", response_model=by_view(PlaceWithDistance, PlaceCardWithDistance))
 async def get_nearby_places(
     lat: float = Query(..., description="Latitude"),
     lng: float = Query(..., description="Longitude"),
     radius: float = Query(10.0, ge=0.1, le=50, description="Search radius in km"),
     limit: int = Query(100, le=500, description="Max results"),
+    view: PlaceView = Query("full", description="card: only the fields the card grid shows"),
     db: Session = Depends(get_db)
 ):
     """
     Get places near a GPS location within a radius.
-    Returns places sorted by distance.
+    Returns places sorted by distance. Concurrent identical requests share
+    one query.
     """
-    places_with_distance = get_places_near_location(
-        db, latitude=lat, longitude=lng, radius_km=radius, limit=limit
+    places_with_distance = await nearby_flight.run_with_session(
+        (lat, lng, radius, limit, view), db.get_bind(),
+        get_places_near_location,
+        latitude=lat, longitude=lng, radius_km=radius, limit=limit, options=place_load_options(view)
     )
+    if config.FAST_JSON:
+        return encode_places_with_distance(places_with_distance, view)
     
+    schema, wrapper = (PlaceCard, PlaceCardWithDistance) if view == "card" else (PlaceSchema, PlaceWithDistance)
     result = []
     for place, distance in places_with_distance:
-        result.append({
-            "place": PlaceSchema.from_orm(place),
-            "distance_km": round(distance, 2)
-        })
+        result.append(wrapper(
+            place=schema.model_validate(place),
+            distance_km=round(distance, 2)
+        ))
     
-    return result
\ No newline at end of file
+    return result
+
+
+@router.get("/nearby/knn", response_model=NearestPlacesPage)
+async def get_nearest_places_endpoint(
+    lat: float = Query(..., description="Latitude"),
+    lng: float = Query(..., description="Longitude"),
+    k: int = Query(20, ge=1, le=200, description="Number of places to return"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the k closest active places to a GPS location, nearest first.
+    Pass next_cursor back to page outward.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    places_with_distance, last = get_nearest_places(
+        db, latitude=lat, longitude=lng, k=k, category=category, after=after
+    )
+    
+    items = [
+        {"place": PlaceSchema.from_orm(place), "distance_km": round(distance, 2)}
+        for place, distance in places_with_distance
+    ]
+    next_cursor = encode_cursor(last) if last is not None else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/tiles/{z}/{x}/{y}.json")
+async def get_place_tile(z: int, x: int, y: int, db: Session = Depends(get_db)):
+    """
+    Get a z/x/y map tile of active places (clusters below the detail zoom).
+    Tiles are kept on disk and re-rendered when a place in them changes or they age out.
+    """
+    if not 0 <= z <= MAX_TILE_ZOOM or not 0 <= x < (1 << z) or not 0 <= y < (1 << z):
+        raise HTTPException(status_code=404, detail="Tile not found")
+    
+    return Response(
+        content=await tile_cache.get(db, z, x, y),
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={config.TILE_CACHE_MAX_AGE}"},
+    )
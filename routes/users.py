@@ -1,24 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from core.security import get_password_hash
 from schemas.user import UserCreate, User, UserUpdate
 from db.session import get_db
 from models.user import User as UserModel
 from core.deps import get_current_active_user
-from typing import List
+from services.pagination import paginate
+from typing import List, Optional
 
 router = APIRouter()
 
 @router.get("/", response_model=List[User])
 async def list_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     db: Session = Depends(get_db)
 ):
     """
-    List all users.
+    List all users, by id.
     """
-    users = db.query(UserModel).filter(UserModel.is_active == True).offset(skip).limit(limit).all()
+    query = db.query(UserModel).filter(UserModel.is_active == True)
+    try:
+        users, next_cursor = paginate(query, (UserModel.id,), limit, cursor=cursor, skip=skip)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return users
 
 @router.get("/{user_id}", response_model=User)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List, Union
+from pydantic import BaseModel, Discriminator, Tag, model_validator
+from typing import Annotated, Optional, List, Union
 from datetime import datetime
 
 class PlaceBase(BaseModel):
@@ -47,6 +47,30 @@ class PlaceUpdate(BaseModel):
     business_status: Optional[str] = None
     is_active: Optional[bool] = None
 
+# Fields of PlaceUpdate that Place requires
+BULK_NOT_NULL_FIELDS = ("name", "address", "city", "latitude", "longitude", "category", "is_active")
+
+class PlaceBulkUpdate(PlaceUpdate):
+    id: int
+
+    @model_validator(mode="after")
+    def required_fields_not_null(self):
+        """Leaving a field out keeps it; an explicit null would leave a place the Place schema can't return"""
+        nulls = [field for field in BULK_NOT_NULL_FIELDS if field in self.model_fields_set and getattr(self, field) is None]
+        if nulls:
+            raise ValueError(f"{', '.join(nulls)} cannot be null")
+        return self
+
+class BulkItemResult(BaseModel):
+    index: int  # Position in the request batch
+    id: Optional[int] = None
+    status: str  # created, updated or not_found
+
+class BulkResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    items: List[BulkItemResult]
+
 class Place(PlaceBase):
     id: int
     is_active: bool
@@ -55,3 +79,66 @@ class Place(PlaceBase):
     
     class Config:
         from_attributes = True
+
+
+class PlaceCard(BaseModel):
+    """Compact place for the card grid (view=card)"""
+    id: int
+    name: str
+    category: str
+    city: str
+    image_url: Optional[str] = None
+    latitude: float
+    longitude: float
+
+    class Config:
+        from_attributes = True
+
+
+def by_view(full, card):
+    """
+    Response model of a list of `full` items, or of `card` items for
+    view=card. The branch is picked from the item type instead of
+    validating the list against both.
+    """
+    def view(items) -> str:
+        return "card" if items and isinstance(items[0], card) else "full"
+    return Annotated[
+        Union[Annotated[List[full], Tag("full")], Annotated[List[card], Tag("card")]],
+        Discriminator(view),
+    ]
+
+PlaceList = by_view(Place, PlaceCard)
+
+
+class PlaceCluster(BaseModel):
+    count: int
+    latitude: float
+    longitude: float
+    top_category: Optional[str] = None
+    place_id: Optional[int] = None  # Set when the cluster is a single place
+
+class ViewportClusters(BaseModel):
+    zoom: int
+    clusters: List[PlaceCluster]
+
+
+class FacetValue(BaseModel):
+    value: Optional[Union[str, int]] = None  # None counts places without a value
+    count: int
+
+class SearchFacets(BaseModel):
+    category: List[FacetValue]
+    city: List[FacetValue]
+    price_level: List[FacetValue]
+
+class FacetedSearchResults(BaseModel):
+    items: List[Place]
+    facets: SearchFacets
+
+
+class Completion(BaseModel):
+    text: str
+    kind: str  # place, city or postal_code
+    place_id: Optional[int] = None  # Set for place completions
+    score: int  # Ratings of a place, places in a city or postal code
@@ -0,0 +1,209 @@
+"""
+Typeahead completions over place names, cities and postal codes
+"""
+import bisect
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from models.place import Place
+from services.indexes import register_index
+from services.text_index import UMLAUTS, tokenize
+
+# Results for prefixes up to this length are cached; longer prefixes cover
+# few enough keys to rank on every request
+CACHED_PREFIX_LENGTH = 3
+CACHED_RESULTS = 20
+
+# ("place", place_id), ("city", city) or ("postal_code", code)
+EntryKey = Tuple[str, object]
+
+
+def completion_keys(label: Optional[str], words: bool = False) -> List[str]:
+    """
+    Normalized strings a label is found under: the whole label, its German
+    umlaut spelling and, with `words`, the label from each later word on
+    so "ein" completes "Café Einstein"
+    """
+    if not label:
+        return []
+    spellings = [label]
+    lowered = label.lower()
+    if any(umlaut in lowered for umlaut in UMLAUTS):
+        for umlaut, replacement in UMLAUTS.items():
+            lowered = lowered.replace(umlaut, replacement)
+        spellings.append(lowered)
+
+    keys = []
+    for spelling in spellings:
+        tokens = tokenize(spelling)
+        starts = range(len(tokens)) if words else range(min(len(tokens), 1))
+        for start in starts:
+            key = " ".join(tokens[start:])
+            if key not in keys:
+                keys.append(key)
+    return keys
+
+
+class CompletionIndex:
+    """
+    Sorted array of (normalized key, entry) pairs searched with bisect,
+    with each key's score in a parallel numpy array so the best entries of
+    a prefix's key range are selected without a Python-level sort.
+    Entries are places ranked by their number of ratings, and cities and
+    postal codes ranked by how many places they hold; ties go to the
+    alphabetically first key. The results of short prefixes, whose key
+    ranges are large, are cached and dropped when an entry under that
+    prefix changes. Writes that add or remove keys only mark the score
+    array stale; it is rebuilt once on the next read, so a batch of place
+    writes costs one pass over the keys instead of a copy per key.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._keys: List[Tuple[str, EntryKey]] = []
+        self._scores = np.zeros(0, dtype=np.int64)
+        # entry -> (label, score)
+        self._entries: Dict[EntryKey, Tuple[str, int]] = {}
+        self._places: Dict[int, Tuple[str, Optional[str], Optional[str]]] = {}
+        self._counts: Counter = Counter()
+        self._cache: Dict[str, List[EntryKey]] = {}
+        self._stale = False
+
+    def build(self, places) -> None:
+        self._entries = {}
+        self._places = {}
+        self._counts = Counter()
+        self._cache = {}
+        for place in places:
+            self._places[place.id] = (place.name, place.city, place.postal_code)
+            if place.name:
+                self._entries["place", place.id] = (place.name, place.user_ratings_total or 0)
+            for kind, value in (("city", place.city), ("postal_code", place.postal_code)):
+                if value:
+                    self._counts[kind, value] += 1
+        for (kind, value), count in self._counts.items():
+            self._entries[kind, value] = (value, count)
+
+        # One sort instead of an insert per key
+        self._keys = sorted(
+            (key, entry)
+            for entry, (label, _) in self._entries.items()
+            for key in completion_keys(label, words=entry[0] == "place")
+        )
+        self._refresh_scores()
+        self.ready = True
+
+    def _refresh_scores(self) -> None:
+        self._scores = np.fromiter(
+            (self._entries[entry][1] for _, entry in self._keys), dtype=np.int64, count=len(self._keys)
+        )
+        self._stale = False
+
+    def add(self, place: Place) -> None:
+        self._places[place.id] = (place.name, place.city, place.postal_code)
+        if place.name:
+            self._put(("place", place.id), place.name, place.user_ratings_total or 0)
+        for kind, value in (("city", place.city), ("postal_code", place.postal_code)):
+            if value:
+                self._counts[kind, value] += 1
+                self._put((kind, value), value, self._counts[kind, value])
+
+    def discard(self, place_id: int) -> None:
+        fields = self._places.pop(place_id, None)
+        if fields is None:
+            return
+        name, city, postal_code = fields
+        self._remove(("place", place_id), name)
+        for kind, value in (("city", city), ("postal_code", postal_code)):
+            if not value:
+                continue
+            self._counts[kind, value] -= 1
+            if self._counts[kind, value] > 0:
+                self._put((kind, value), value, self._counts[kind, value])
+            else:
+                del self._counts[kind, value]
+                self._remove((kind, value), value)
+
+    def _put(self, entry: EntryKey, label: str, score: int) -> None:
+        new = entry not in self._entries
+        self._entries[entry] = (label, score)
+        for key in completion_keys(label, words=entry[0] == "place"):
+            position = bisect.bisect_left(self._keys, (key, entry))
+            if new:
+                self._keys.insert(position, (key, entry))
+                self._stale = True
+            elif not self._stale:
+                self._scores[position] = score
+        self._invalidate(label)
+
+    def _remove(self, entry: EntryKey, label: Optional[str]) -> None:
+        if self._entries.pop(entry, None) is None:
+            return
+        for key in completion_keys(label, words=entry[0] == "place"):
+            position = bisect.bisect_left(self._keys, (key, entry))
+            if position < len(self._keys) and self._keys[position] == (key, entry):
+                del self._keys[position]
+                self._stale = True
+        self._invalidate(label)
+
+    def _invalidate(self, label: str) -> None:
+        for key in completion_keys(label, words=True):
+            for length in range(1, CACHED_PREFIX_LENGTH + 1):
+                self._cache.pop(key[:length], None)
+
+    def _rank(self, prefix: str, limit: int) -> List[EntryKey]:
+        if self._stale:
+            self._refresh_scores()
+        start = bisect.bisect_left(self._keys, (prefix,))
+        end = bisect.bisect_left(self._keys, (prefix + "\uffff",))
+        scores = self._scores[start:end]
+
+        # An entry can sit under several keys of the range (each word of a
+        # name), so widen the selection until it holds enough distinct ones
+        wanted = limit
+        while True:
+            positions = _best_positions(scores, wanted)
+            entries = list(dict.fromkeys(self._keys[start + int(p)][1] for p in positions))
+            if len(entries) >= limit or wanted >= len(scores):
+                return entries[:limit]
+            wanted *= 2
+
+    def complete(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Best `limit` completions of a typed prefix, most popular first"""
+        prefix = " ".join(tokenize(prefix)) + (" " if prefix[-1:].isspace() else "")
+        if not prefix.strip():
+            return []
+
+        if len(prefix) <= CACHED_PREFIX_LENGTH and limit <= CACHED_RESULTS:
+            entries = self._cache.get(prefix)
+            if entries is None:
+                entries = self._cache[prefix] = self._rank(prefix, CACHED_RESULTS)
+            entries = entries[:limit]
+        else:
+            entries = self._rank(prefix, limit)
+
+        results = []
+        for kind, value in entries:
+            label, score = self._entries[kind, value]
+            results.append({
+                "text": label,
+                "kind": kind,
+                "place_id": value if kind == "place" else None,
+                "score": score,
+            })
+        return results
+
+
+def _best_positions(scores: np.ndarray, n: int) -> np.ndarray:
+    """Positions of the n highest scores, best first; equal scores keep array order"""
+    if n < len(scores):
+        kth = np.partition(scores, len(scores) - n)[len(scores) - n]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:n - len(above)]
+        positions = np.concatenate([above, ties])
+    else:
+        positions = np.arange(len(scores))
+    return positions[np.argsort(-scores[positions], kind="stable")]
+
+
+place_completions = register_index(CompletionIndex())
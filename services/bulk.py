@@ -0,0 +1,72 @@
+"""
+Batch writes behind POST and PATCH /places/bulk
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from models.place import Place
+from schemas.place import PlaceBulkUpdate, PlaceCreate
+from services.cities import ensure_city
+
+
+class CityIds:
+    """city_id of each city string in a batch, resolved once per distinct city"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._ids: Dict[str, Optional[int]] = {}
+
+    def __call__(self, city: Optional[str]) -> Optional[int]:
+        if city not in self._ids:
+            found = ensure_city(self.db, city)
+            self._ids[city] = found.id if found is not None else None
+        return self._ids[city]
+
+
+def bulk_create(db: Session, items: Sequence[PlaceCreate]) -> List[int]:
+    """
+    Insert a batch of places with one multi-row INSERT and return their
+    ids in item order. Flushes but does not commit.
+    """
+    if not items:
+        return []
+    city_ids = CityIds(db)
+    rows = [
+        {**item.model_dump(), "city_id": city_ids(item.city), "is_active": True}
+        for item in items
+    ]
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite honours sort_by_parameter_order only row by row. Its rowids
+        # are handed out in VALUES order under the write lock, batch after
+        # batch, so there the sorted ids line up with the items.
+        return sorted(db.execute(insert(Place).returning(Place.id), rows).scalars())
+    # Elsewhere RETURNING order is not guaranteed; have it follow the items
+    result = db.execute(insert(Place).returning(Place.id, sort_by_parameter_order=True), rows)
+    return list(result.scalars())
+
+
+def bulk_update(db: Session, items: Sequence[PlaceBulkUpdate]) -> Tuple[List[int], List[int]]:
+    """
+    Apply a batch of partial updates as executemany UPDATEs by primary key.
+    Returns (positions updated, positions whose place doesn't exist).
+    Flushes but does not commit.
+    """
+    ids = {item.id for item in items}
+    existing = {place_id for place_id, in db.query(Place.id).filter(Place.id.in_(ids))} if ids else set()
+
+    city_ids = CityIds(db)
+    rows, updated, missing = [], [], []
+    for position, item in enumerate(items):
+        if item.id not in existing:
+            missing.append(position)
+            continue
+        row = item.model_dump(exclude_unset=True)
+        if "city" in row:
+            row["city_id"] = city_ids(row["city"])
+        rows.append(row)
+        updated.append(position)
+
+    if rows:
+        # Grouped into one executemany per set of updated columns
+        db.execute(update(Place), rows)
+    return updated, missing
@@ -0,0 +1,184 @@
+"""
+In-process pub/sub of check-in events, behind /checkins/stream
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+from core.metrics import metrics
+from models.place import Place
+from services.cities import city_directory
+from services.indexes import register_index
+
+logger = logging.getLogger(__name__)
+
+# min_lng, min_lat, max_lng, max_lat
+BBox = Tuple[float, float, float, float]
+
+
+class PlaceLocations:
+    """city_id, city and coordinates of every active place, for routing events"""
+
+    def __init__(self):
+        self.ready = False
+        self._places: Dict[int, Tuple[Optional[int], Optional[str], Optional[float], Optional[float]]] = {}
+
+    def build(self, places) -> None:
+        self._places = {}
+        for place in places:
+            self.add(place)
+        self.ready = True
+
+    def add(self, place: Place) -> None:
+        self._places[place.id] = (place.city_id, place.city, place.latitude, place.longitude)
+
+    def discard(self, place_id: int) -> None:
+        self._places.pop(place_id, None)
+
+    def get(self, place_id: int):
+        return self._places.get(place_id, (None, None, None, None))
+
+
+place_locations = register_index(PlaceLocations())
+
+
+class Subscription:
+    """
+    One stream's filter and pending events. The queue is bounded: a client
+    that stops reading loses its oldest events rather than growing memory.
+    """
+    __slots__ = ("queue", "place_id", "city_id", "city", "bbox")
+
+    def __init__(self, maxsize: int, place_id: Optional[int] = None, city_id: Optional[int] = None,
+                 city: Optional[str] = None, bbox: Optional[BBox] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.place_id = place_id
+        self.city_id = city_id
+        self.city = city
+        self.bbox = bbox
+
+    def push(self, event: dict) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            metrics.incr("checkin_stream.dropped")
+        self.queue.put_nowait(event)
+
+
+def _in_bbox(bbox: BBox, latitude: Optional[float], longitude: Optional[float]) -> bool:
+    if latitude is None or longitude is None:
+        return False
+    min_lng, min_lat, max_lng, max_lat = bbox
+    return min_lng <= longitude <= max_lng and min_lat <= latitude <= max_lat
+
+
+def check_filter(place_id: Optional[int], city: Optional[str], bbox: Optional[BBox]) -> None:
+    """Raises ValueError unless exactly one of place_id, city or bbox is given"""
+    if sum(value is not None for value in (place_id, city, bbox)) != 1:
+        raise ValueError("Subscribe to one of place_id, city or bbox")
+
+
+class CheckinBroker:
+    """
+    Fans check-in events out to subscribers of a place, a city or a
+    bounding box. Place and city subscribers are found by dictionary
+    lookup, so idle subscribers cost nothing per event; only bbox
+    subscribers are tested one by one. Publish and subscribe must be
+    called on the event loop.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._by_place: Dict[int, Set[Subscription]] = {}
+        self._by_city_id: Dict[int, Set[Subscription]] = {}
+        self._by_city: Dict[str, Set[Subscription]] = {}
+        self._by_bbox: Set[Subscription] = set()
+
+    def subscribe(self, place_id: Optional[int] = None, city: Optional[str] = None,
+                  bbox: Optional[BBox] = None) -> Subscription:
+        """Subscribe to exactly one of a place id, a city (any spelling) or a bbox"""
+        check_filter(place_id, city, bbox)
+        city_id = city_directory.resolve(city) if city is not None else None
+        subscription = Subscription(self.queue_size, place_id, city_id, city, bbox)
+        index, key = self._slot(subscription)
+        if index is None:
+            self._by_bbox.add(subscription)
+        else:
+            index.setdefault(key, set()).add(subscription)
+        metrics.incr("checkin_stream.subscribed")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        index, key = self._slot(subscription)
+        if index is None:
+            self._by_bbox.discard(subscription)
+            return
+        group = index.get(key)
+        if group is not None:
+            group.discard(subscription)
+            if not group:
+                del index[key]
+
+    def _slot(self, subscription: Subscription):
+        """(index, key) a subscription is filed under; (None, None) for bbox subscriptions"""
+        if subscription.place_id is not None:
+            return self._by_place, subscription.place_id
+        if subscription.city_id is not None:
+            return self._by_city_id, subscription.city_id
+        if subscription.city is not None:
+            return self._by_city, subscription.city
+        return None, None
+
+    def publish(self, kind: str, checkin_id: int, place_id: int, user_id: int, at: datetime) -> int:
+        """Deliver a checkin/checkout event; returns the number of subscribers reached"""
+        city_id, city, latitude, longitude = place_locations.get(place_id)
+        event = {
+            "type": kind,
+            "checkin_id": checkin_id,
+            "place_id": place_id,
+            "user_id": user_id,
+            "city": city_directory.name(city_id) if city_id is not None else city,
+            "at": at.isoformat(),
+        }
+        receivers = set(self._by_place.get(place_id, ()))
+        if city_id is not None:
+            receivers.update(self._by_city_id.get(city_id, ()))
+        if city is not None:
+            receivers.update(self._by_city.get(city, ()))
+        receivers.update(sub for sub in self._by_bbox if _in_bbox(sub.bbox, latitude, longitude))
+
+        for subscription in receivers:
+            subscription.push(event)
+        metrics.incr("checkin_stream.events")
+        return len(receivers)
+
+    def __len__(self) -> int:
+        groups = (*self._by_place.values(), *self._by_city_id.values(), *self._by_city.values(), self._by_bbox)
+        return sum(len(group) for group in groups)
+
+
+checkin_broker = CheckinBroker()
+
+
+async def sse_events(
+    heartbeat: float, place_id: Optional[int] = None, city: Optional[str] = None, bbox: Optional[BBox] = None
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events of the check-ins at a place, in a city or in a bbox
+    (see subscribe), with a comment line every `heartbeat` seconds so
+    proxies keep idle streams open. The subscription is taken when the
+    stream starts and dropped when the client goes away, so a response
+    that is never sent leaves nothing behind.
+    """
+    subscription = checkin_broker.subscribe(place_id=place_id, city=city, bbox=bbox)
+    try:
+        yield ": connected\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['type']}\nid: {event['checkin_id']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        checkin_broker.unsubscribe(subscription)
@@ -0,0 +1,180 @@
+"""
+City alias directory: resolves any spelling of a city to its canonical id
+"""
+import hashlib
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from core.cities import CITY_ALTERNATIVES
+from models.city import City, CityAlias
+from models.place import Place
+from services.indexes import register_index
+from services.text_index import UMLAUTS, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def city_keys(name: Optional[str]) -> List[str]:
+    """
+    Normalized lookup keys of a city name: accents folded (München ->
+    munchen), its ae/oe/ue spelling (muenchen) and punctuation collapsed
+    (K-Town -> k town)
+    """
+    if not name:
+        return []
+    keys = [" ".join(tokenize(name))]
+    lowered = name.lower()
+    if any(umlaut in lowered for umlaut in UMLAUTS):
+        for umlaut, replacement in UMLAUTS.items():
+            lowered = lowered.replace(umlaut, replacement)
+        keys.append(" ".join(tokenize(lowered)))
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+class CityDirectory:
+    """
+    Alias key -> city id, loaded from city_aliases with the place indexes
+    and extended as writes create cities. Until it is loaded, resolve()
+    returns None and callers fall back to comparing city strings.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+
+    def load(self, db: Session) -> None:
+        self._ids = dict(db.query(CityAlias.key, CityAlias.city_id).all())
+        self._names = dict(db.query(City.id, City.name).all())
+        self.ready = True
+        logger.info(f"Loaded {len(self._ids)} aliases of {len(self._names)} cities")
+
+    def add(self, city_id: int, name: str, keys: Iterable[str]) -> None:
+        self._names[city_id] = name
+        for key in keys:
+            self._ids[key] = city_id
+
+    def resolve(self, name: Optional[str]) -> Optional[int]:
+        """Canonical city id of any known spelling"""
+        if not self.ready:
+            return None
+        for key in city_keys(name):
+            city_id = self._ids.get(key)
+            if city_id is not None:
+                return city_id
+        return None
+
+    def name(self, city_id: int) -> Optional[str]:
+        return self._names.get(city_id)
+
+
+city_directory = CityDirectory()
+
+# Alias key -> every known spelling of that city, so databases created
+# with create_all (which skip the 0004 backfill) still merge them
+_KNOWN_SPELLINGS: Dict[str, List[str]] = {
+    key: [name, *alternatives]
+    for name, alternatives in CITY_ALTERNATIVES.items()
+    for spelling in (name, *alternatives)
+    for key in city_keys(spelling)
+}
+
+
+def city_clause(city: str):
+    """Place filter for a city: indexed id equality when the spelling is known"""
+    city_id = city_directory.resolve(city)
+    if city_id is None:
+        return Place.city == city
+    return Place.city_id == city_id
+
+
+def ensure_city(db: Session, name: Optional[str], alternatives: Iterable[str] = ()) -> Optional[City]:
+    """
+    City that `name` or one of its alternative spellings belongs to, created
+    with aliases for every spelling if none matches. The spellings in
+    CITY_ALTERNATIVES are added for the cities listed there. Flushes but
+    does not commit.
+    """
+    spellings = [spelling for spelling in (name, *alternatives) if spelling]
+    for key in city_keys(name):
+        spellings.extend(_KNOWN_SPELLINGS.get(key, ()))
+    keys = [key for spelling in spellings for key in city_keys(spelling)]
+    if not keys:
+        return None
+
+    known = {alias.key: alias for alias in db.query(CityAlias).filter(CityAlias.key.in_(keys)).all()}
+    if known:
+        city = known[next(key for key in keys if key in known)].city
+    else:
+        city = City(name=name or spellings[0])
+        db.add(city)
+
+    added = [key for key in dict.fromkeys(keys) if key not in known]
+    for key in added:
+        db.add(CityAlias(city=city, key=key))
+    db.flush()
+    city_directory.add(city.id, city.name, keys)
+    return city
+
+
+def assign_city(db: Session, place, alternatives: Iterable[str] = ()) -> None:
+    """Point place.city_id at the city its city string names"""
+    city = ensure_city(db, place.city, alternatives)
+    place.city_id = city.id if city is not None else None
+
+
+def catalog_etag(cities: List[str]) -> str:
+    """Content hash of a city list, stable across restarts and workers"""
+    digest = hashlib.sha1("\n".join(cities).encode()).hexdigest()[:16]
+    return f'"cities-{digest}"'
+
+
+class CityCatalog:
+    """
+    Sorted list of the cities that have active places, with an ETag.
+    Place counts per city are kept current by the write routes, but the
+    list and its ETag only change when a city gains its first or loses its
+    last active place.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._counts: Counter = Counter()
+        self._cities: Dict[int, Optional[str]] = {}
+        self._snapshot: Optional[Tuple[List[str], str]] = None
+
+    def build(self, places) -> None:
+        self._counts = Counter()
+        self._cities = {}
+        self._snapshot = None
+        for place in places:
+            self.add(place)
+        self.ready = True
+
+    def add(self, place: Place) -> None:
+        self._cities[place.id] = place.city
+        if not place.city:
+            return
+        self._counts[place.city] += 1
+        if self._counts[place.city] == 1:
+            self._snapshot = None
+
+    def discard(self, place_id: int) -> None:
+        city = self._cities.pop(place_id, None)
+        if not city:
+            return
+        self._counts[city] -= 1
+        if self._counts[city] <= 0:
+            del self._counts[city]
+            self._snapshot = None
+
+    def snapshot(self) -> Tuple[List[str], str]:
+        """(sorted cities, ETag), recomputed only after the set of cities changed"""
+        if self._snapshot is None:
+            cities = sorted(self._counts)
+            self._snapshot = (cities, catalog_etag(cities))
+        return self._snapshot
+
+
+city_catalog = register_index(CityCatalog())
@@ -0,0 +1,187 @@
+"""
+Precomputed marker clusters per map zoom level
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+from models.place import Place
+from services.indexes import register_index
+
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def mercator(latitude: float, longitude: float) -> Tuple[float, float]:
+    """Normalized Web Mercator position, both axes in [0, 1), y growing southwards"""
+    lat = math.radians(max(min(latitude, MAX_MERCATOR_LAT), -MAX_MERCATOR_LAT))
+    x = (longitude + 180.0) / 360.0
+    y = (1.0 - math.log(math.tan(lat) + 1.0 / math.cos(lat)) / math.pi) / 2.0
+    return min(max(x, 0.0), 1.0 - 1e-12), min(max(y, 0.0), 1.0 - 1e-12)
+
+
+class Cluster:
+    """Running aggregate of the places in one cell"""
+
+    __slots__ = ("count", "latitude_sum", "longitude_sum", "id_sum", "category", "mixed")
+
+    def __init__(self):
+        self.count = 0
+        self.latitude_sum = 0.0
+        self.longitude_sum = 0.0
+        # With a single member this is that member's id
+        self.id_sum = 0
+        # Most cells hold one category; per-category counts are only
+        # allocated once a second category joins
+        self.category: Optional[str] = None
+        self.mixed: Optional[Dict[Optional[str], int]] = None
+
+    def add_category(self, category: Optional[str], sign: int) -> None:
+        if self.mixed is None:
+            if self.count == 0 or category == self.category:
+                self.category = category
+                return
+            self.mixed = {self.category: self.count}
+        remaining = self.mixed.get(category, 0) + sign
+        if remaining > 0:
+            self.mixed[category] = remaining
+        else:
+            self.mixed.pop(category, None)
+        if len(self.mixed) == 1:
+            self.category = next(iter(self.mixed))
+            self.mixed = None
+
+    @property
+    def top_category(self) -> Optional[str]:
+        if self.mixed is None:
+            return self.category
+        return max(self.mixed, key=self.mixed.get)
+
+
+class ClusterIndex:
+    """
+    Aggregates active places into screen-space grid cells of cell_px pixels
+    at every zoom level, so a viewport request only reads the cells it
+    covers regardless of how many places they contain.
+
+    Levels above max_zoom are served from max_zoom, where clusters are
+    already mostly single places; this bounds memory to max_zoom + 1
+    aggregates per place.
+    """
+
+    def __init__(self, min_zoom: int = 0, max_zoom: int = 15, cell_px: int = 64):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.cell_px = cell_px
+        self.ready = False
+        # zoom -> {cell number (row * cells_per_axis + column): cluster}
+        self._levels: Dict[int, Dict[int, Cluster]] = {z: {} for z in self.zooms}
+        self._entries: Dict[int, Tuple[float, float, Optional[str]]] = {}
+
+    @property
+    def zooms(self) -> range:
+        return range(self.min_zoom, self.max_zoom + 1)
+
+    def cells_per_axis(self, zoom: int) -> int:
+        return max((256 << zoom) // self.cell_px, 1)
+
+    def _cell(self, zoom: int, x: float, y: float) -> Tuple[int, int]:
+        n = self.cells_per_axis(zoom)
+        return int(x * n), int(y * n)
+
+    def build(self, places) -> None:
+        self._levels = {z: {} for z in self.zooms}
+        self._entries = {}
+        for place in places:
+            self.add(place)
+        self.ready = True
+
+    def add(self, place: Place) -> None:
+        if place.latitude is None or place.longitude is None:
+            return
+        self._entries[place.id] = (place.latitude, place.longitude, place.category)
+        self._apply(place.id, place.latitude, place.longitude, place.category, 1)
+
+    def discard(self, place_id: int) -> None:
+        entry = self._entries.pop(place_id, None)
+        if entry is not None:
+            self._apply(place_id, *entry, -1)
+
+    def _apply(self, place_id: int, latitude: float, longitude: float, category: Optional[str], sign: int) -> None:
+        x, y = mercator(latitude, longitude)
+        for zoom, cells in self._levels.items():
+            column, row = self._cell(zoom, x, y)
+            key = row * self.cells_per_axis(zoom) + column
+            cluster = cells.get(key)
+            if cluster is None:
+                cluster = cells[key] = Cluster()
+            cluster.add_category(category, sign)
+            cluster.count += sign
+            cluster.latitude_sum += sign * latitude
+            cluster.longitude_sum += sign * longitude
+            cluster.id_sum += sign * place_id
+            if cluster.count <= 0:
+                del cells[key]
+
+    def _cell_range(
+        self, zoom: int, min_lng: float, min_lat: float, max_lng: float, max_lat: float
+    ) -> Tuple[int, int, int, int]:
+        """(west, north, east, south) cells, inclusive, of a bounding box"""
+        west, north = self._cell(zoom, *mercator(max_lat, min_lng))
+        east, south = self._cell(zoom, *mercator(min_lat, max_lng))
+        return west, north, east, south
+
+    def fit_zoom(
+        self, min_lng: float, min_lat: float, max_lng: float, max_lat: float, zoom: int, max_cells: int
+    ) -> int:
+        """
+        The zoom clamped to the index's levels, then lowered until the
+        bounding box covers at most max_cells cells. A cell holds at most
+        one cluster, so this bounds the size of a viewport response.
+        """
+        zoom = min(max(zoom, self.min_zoom), self.max_zoom)
+        while zoom > self.min_zoom:
+            west, north, east, south = self._cell_range(zoom, min_lng, min_lat, max_lng, max_lat)
+            if (east - west + 1) * (south - north + 1) <= max_cells:
+                break
+            zoom -= 1
+        return zoom
+
+    def query(self, min_lng: float, min_lat: float, max_lng: float, max_lat: float, zoom: int) -> List[dict]:
+        """Clusters whose cell overlaps the bounding box at the given zoom"""
+        zoom = min(max(zoom, self.min_zoom), self.max_zoom)
+        return self._collect(zoom, *self._cell_range(zoom, min_lng, min_lat, max_lng, max_lat))
+
+    def tile(self, zoom: int, x: int, y: int) -> List[dict]:
+        """Clusters inside XYZ tile x/y; zoom must be between min_zoom and max_zoom"""
+        per_tile = max(256 // self.cell_px, 1)
+        return self._collect(zoom, x * per_tile, y * per_tile, (x + 1) * per_tile - 1, (y + 1) * per_tile - 1)
+
+    def _collect(self, zoom: int, west: int, north: int, east: int, south: int) -> List[dict]:
+        """Clusters of the cells in an inclusive column/row range"""
+        cells = self._levels[zoom]
+        n = self.cells_per_axis(zoom)
+
+        span = (east - west + 1) * (south - north + 1)
+        if span <= len(cells):
+            keys = (
+                row * n + column
+                for row in range(north, south + 1)
+                for column in range(west, east + 1)
+                if row * n + column in cells
+            )
+        else:
+            # Viewport covers more cells than are populated
+            keys = (key for key in cells if north <= key // n <= south and west <= key % n <= east)
+
+        return [self._serialize(cells[key]) for key in keys]
+
+    @staticmethod
+    def _serialize(cluster: Cluster) -> dict:
+        return {
+            "count": cluster.count,
+            "latitude": cluster.latitude_sum / cluster.count,
+            "longitude": cluster.longitude_sum / cluster.count,
+            "top_category": cluster.top_category,
+            "place_id": cluster.id_sum if cluster.count == 1 else None,
+        }
+
+
+place_clusters = register_index(ClusterIndex())
@@ -0,0 +1,101 @@
+"""
+Facet counts (category, city, price level) for search results
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from models.place import Place
+from services.cities import city_directory
+from services.indexes import register_index
+
+FACETS = ("category", "city", "price_level")
+
+# (category, city, price_level) of one place
+FacetValues = Tuple[Optional[str], Optional[str], Optional[int]]
+
+
+def city_label(city_id: Optional[int], city: Optional[str]) -> Optional[str]:
+    """Canonical city name, so every spelling of a city is one facet value"""
+    if city_id is not None:
+        return city_directory.name(city_id) or city
+    return city
+
+
+def facet_columns():
+    """Columns to select for tally(), in FacetValues order after the city id"""
+    return Place.category, Place.city_id, Place.city, Place.price_level
+
+
+def tally(rows: Iterable[Tuple]) -> Dict[str, List[dict]]:
+    """Count every facet in a single pass over (category, city_id, city, price_level) rows"""
+    counters = {facet: Counter() for facet in FACETS}
+    for category, city_id, city, price_level in rows:
+        counters["category"][category] += 1
+        counters["city"][city_label(city_id, city)] += 1
+        counters["price_level"][price_level] += 1
+    return _serialize(counters)
+
+
+def _serialize(counters: Dict[str, Counter]) -> Dict[str, List[dict]]:
+    return {
+        facet: [
+            {"value": value, "count": count}
+            # Most frequent first; None (unknown) sorts after every value
+            for value, count in sorted(counter.items(), key=lambda item: (-item[1], item[0] is None, str(item[0])))
+            if count > 0
+        ]
+        for facet, counter in counters.items()
+    }
+
+
+class FacetIndex:
+    """
+    Facet counters over all active places, kept current by the place write
+    routes so unfiltered facets cost nothing, plus each place's facet values
+    so the facets of an id candidate set are counted without the database.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._values: Dict[int, FacetValues] = {}
+        self._counters: Dict[str, Counter] = {facet: Counter() for facet in FACETS}
+
+    def build(self, places) -> None:
+        self._values = {}
+        self._counters = {facet: Counter() for facet in FACETS}
+        for place in places:
+            self.add(place)
+        self.ready = True
+
+    def add(self, place: Place) -> None:
+        values = (place.category, city_label(place.city_id, place.city), place.price_level)
+        self._values[place.id] = values
+        for facet, value in zip(FACETS, values):
+            self._counters[facet][value] += 1
+
+    def discard(self, place_id: int) -> None:
+        values = self._values.pop(place_id, None)
+        if values is None:
+            return
+        for facet, value in zip(FACETS, values):
+            counter = self._counters[facet]
+            counter[value] -= 1
+            if counter[value] <= 0:
+                del counter[value]
+
+    def counts(self) -> Dict[str, List[dict]]:
+        """Facets of every active place"""
+        return _serialize(self._counters)
+
+    def count_ids(self, place_ids: Iterable[int]) -> Dict[str, List[dict]]:
+        """Facets of a candidate set of place ids, in one pass"""
+        counters = {facet: Counter() for facet in FACETS}
+        for place_id in place_ids:
+            values = self._values.get(place_id)
+            if values is None:
+                continue
+            for facet, value in zip(FACETS, values):
+                counters[facet][value] += 1
+        return _serialize(counters)
+
+
+place_facets = register_index(FacetIndex())
@@ -0,0 +1,253 @@
+"""
+Text search backends behind search_places
+
+- memory: the in-process inverted index (services.text_index)
+- sqlite-fts5 / postgres-tsvector: the database's native full-text index
+- like: substring matching with LIKE, used when nothing better is available
+"""
+import re
+import weakref
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import column, func, inspect, literal_column, or_, table, text
+from sqlalchemy.orm import Query, Session
+from core.config import config
+from db.fulltext import FTS_TABLE, SEARCH_VECTOR_COLUMN
+from models.place import Place
+from services.cities import city_clause, city_directory
+from services.facets import facet_columns, place_facets, tally
+from services.indexes import index_lock
+from services.text_index import FIELD_WEIGHTS, MIN_PREFIX_LENGTH, normalize, text_index, tokenize
+
+BACKEND_CHOICES = ("auto", "memory", "native", "like")
+WORD_RE = re.compile(r"\w+")
+UMLAUT_SPELLINGS = {"ae": "a", "oe": "o", "ue": "u"}
+
+# Column order of the FTS5 table, see db.fulltext
+FTS_COLUMNS = ("name", "description", "address", "city", "postal_code")
+places_fts = table(FTS_TABLE, column("rowid"))
+
+
+def _fold_umlaut_spellings(word: str) -> str:
+    """muenchen -> munchen, the form the native indexes store for München"""
+    for spelling, letter in UMLAUT_SPELLINGS.items():
+        word = word.replace(spelling, letter)
+    return word
+
+
+def _active_place_filters(city: Optional[str], category: Optional[str]) -> list:
+    filters = [Place.is_active == True]
+    if city:
+        filters.append(city_clause(city))
+    if category:
+        filters.append(Place.category == category)
+    return filters
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, fuzzy: bool = False):
+        # Also match index terms within a few edits of each query word
+        self.fuzzy = fuzzy
+
+    def search(
+        self, db: Session, query: str, city: Optional[str], category: Optional[str], limit: int, options: Sequence = ()
+    ) -> List[Place]:
+        # Ranked lookup in the inverted index, then load only the result rows
+        with index_lock:
+            ids = text_index.search(
+                query, city=city, city_id=city_directory.resolve(city), category=category, limit=limit, fuzzy=self.fuzzy
+            )
+        return self._load(db, ids, options)
+
+    def facets(self, db: Session, query: str, city: Optional[str], category: Optional[str]) -> Dict[str, List[dict]]:
+        return self._count(db, self._candidates(query, city, category))
+
+    def faceted(
+        self, db: Session, query: str, city: Optional[str], category: Optional[str], limit: int
+    ) -> Tuple[List[Place], Dict[str, List[dict]]]:
+        """search() and facets() from one scoring of the candidates"""
+        ids = self._candidates(query, city, category)
+        return self._load(db, ids[:limit]), self._count(db, ids)
+
+    def _candidates(self, query: str, city: Optional[str], category: Optional[str]) -> List[int]:
+        with index_lock:
+            scored = text_index.scored(
+                query, city=city, city_id=city_directory.resolve(city), category=category, fuzzy=self.fuzzy
+            )
+        return [place_id for place_id, _ in scored]
+
+    def _load(self, db: Session, ids: List[int], options: Sequence = ()) -> List[Place]:
+        if not ids:
+            return []
+        places = db.query(Place).options(*options).filter(Place.id.in_(ids)).all()
+        places_by_id = {place.id: place for place in places if place.is_active}
+        return [places_by_id[place_id] for place_id in ids if place_id in places_by_id]
+
+    def _count(self, db: Session, ids: List[int]) -> Dict[str, List[dict]]:
+        if place_facets.ready:
+            return place_facets.count_ids(ids)
+        rows = db.query(*facet_columns()).filter(Place.id.in_(ids), Place.is_active == True) if ids else []
+        return tally(rows)
+
+
+class SqlBackend(ABC):
+    """Backends that match in SQL; search() and facets() share matches()"""
+
+    @abstractmethod
+    def matches(self, db: Session, query: str, city: Optional[str], category: Optional[str]) -> Optional[Query]:
+        """Ranked query over the matching active places, None if the query has no searchable words"""
+
+    def search(
+        self, db: Session, query: str, city: Optional[str], category: Optional[str], limit: int, options: Sequence = ()
+    ) -> List[Place]:
+        matches = self.matches(db, query, city, category)
+        return matches.options(*options).limit(limit).all() if matches is not None else []
+
+    def facets(self, db: Session, query: str, city: Optional[str], category: Optional[str]) -> Dict[str, List[dict]]:
+        matches = self.matches(db, query, city, category)
+        if matches is None:
+            return tally([])
+        return tally(matches.with_entities(*facet_columns()).order_by(None))
+
+    def faceted(
+        self, db: Session, query: str, city: Optional[str], category: Optional[str], limit: int
+    ) -> Tuple[List[Place], Dict[str, List[dict]]]:
+        """search() and facets() from one pass over the ranked matches"""
+        matches = self.matches(db, query, city, category)
+        if matches is None:
+            return [], tally([])
+        rows = matches.with_entities(Place.id, *facet_columns()).all()
+        ids = [row[0] for row in rows[:limit]]
+        places = {place.id: place for place in db.query(Place).filter(Place.id.in_(ids))} if ids else {}
+        return [places[place_id] for place_id in ids], tally(row[1:] for row in rows)
+
+
+class SqliteFts5Backend(SqlBackend):
+    """
+    External-content FTS5 table ranked with bm25. The unicode61 tokenizer
+    folds accents (München -> munchen) but not ß, and knows nothing of the
+    ae/oe/ue spellings, so each query word is OR-ed with those variants.
+    """
+    name = "sqlite-fts5"
+
+    def match_expression(self, query: str) -> Optional[str]:
+        groups = []
+        for word in dict.fromkeys(WORD_RE.findall(query.lower())):
+            folded = normalize(word)
+            variants = {word, folded, _fold_umlaut_spellings(folded)}
+            if "ss" in folded:
+                variants.add(folded.replace("ss", "ß"))
+            terms = [
+                f'"{variant}"*' if len(variant) >= MIN_PREFIX_LENGTH else f'"{variant}"'
+                for variant in sorted(variants)
+                if variant and '"' not in variant
+            ]
+            if terms:
+                groups.append("(" + " OR ".join(terms) + ")")
+        return " AND ".join(groups) or None
+
+    def matches(self, db: Session, query: str, city: Optional[str], category: Optional[str]) -> Optional[Query]:
+        match = self.match_expression(query)
+        if match is None:
+            return None
+        weights = ", ".join(str(FIELD_WEIGHTS[field]) for field in FTS_COLUMNS)
+        return db.query(Place).join(places_fts, places_fts.c.rowid == Place.id).filter(
+            text(f"{FTS_TABLE} MATCH :match"),
+            *_active_place_filters(city, category)
+        ).order_by(
+            text(f"bm25({FTS_TABLE}, {weights})"), Place.id
+        ).params(match=match)
+
+
+class PostgresTsvectorBackend(SqlBackend):
+    """Weighted tsvector column with a GIN index, ranked with ts_rank"""
+    name = "postgres-tsvector"
+
+    def tsquery(self, query: str) -> Optional[str]:
+        groups = []
+        for token in dict.fromkeys(tokenize(query)):
+            variants = sorted({token, _fold_umlaut_spellings(token)})
+            suffix = ":*" if len(token) >= MIN_PREFIX_LENGTH else ""
+            groups.append("(" + " | ".join(f"{variant}{suffix}" for variant in variants) + ")")
+        return " & ".join(groups) or None
+
+    def matches(self, db: Session, query: str, city: Optional[str], category: Optional[str]) -> Optional[Query]:
+        tsquery = self.tsquery(query)
+        if tsquery is None:
+            return None
+        vector = literal_column(f"places.{SEARCH_VECTOR_COLUMN}")
+        ts_query = func.to_tsquery("simple", tsquery)
+        return db.query(Place).filter(
+            vector.op("@@")(ts_query),
+            *_active_place_filters(city, category)
+        ).order_by(func.ts_rank(vector, ts_query).desc(), Place.id)
+
+
+class LikeBackend(SqlBackend):
+    name = "like"
+
+    def matches(self, db: Session, query: str, city: Optional[str], category: Optional[str]) -> Optional[Query]:
+        normalized_query = query.lower()
+        search_filter = or_(
+            func.lower(Place.name).contains(normalized_query),
+            func.lower(Place.description).contains(normalized_query),
+            func.lower(Place.address).contains(normalized_query),
+            func.lower(Place.city).contains(normalized_query),
+            func.lower(Place.postal_code).contains(normalized_query)
+        )
+        return db.query(Place).filter(search_filter, *_active_place_filters(city, category))
+
+
+memory_backend = MemoryBackend()
+fuzzy_memory_backend = MemoryBackend(fuzzy=True)
+like_backend = LikeBackend()
+
+# Native backend per engine, None where the schema lacks the search structures
+_native_backends: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def native_backend(db: Session):
+    """The database's full-text backend if its migration has been applied"""
+    engine = db.get_bind()
+    if engine in _native_backends:
+        return _native_backends[engine]
+
+    backend = None
+    inspector = inspect(engine)
+    if engine.dialect.name == "sqlite":
+        if inspector.has_table(FTS_TABLE):
+            backend = SqliteFts5Backend()
+    elif engine.dialect.name == "postgresql":
+        columns = {info["name"] for info in inspector.get_columns("places")}
+        if SEARCH_VECTOR_COLUMN in columns:
+            backend = PostgresTsvectorBackend()
+    _native_backends[engine] = backend
+    return backend
+
+
+def get_search_backend(db: Session, choice: Optional[str] = None, fuzzy: bool = False):
+    """
+    Resolve the backend to use. `auto` prefers the in-memory index once it
+    is built, then the native index, and falls back to LIKE.
+
+    Fuzzy matching is only implemented by the in-memory index; without it
+    fuzzy searches get the configured backend's exact matching rather than
+    a scan over every place.
+    """
+    choice = choice or config.SEARCH_BACKEND
+    if choice not in BACKEND_CHOICES:
+        raise ValueError(f"Unknown search backend {choice!r}")
+
+    if fuzzy and text_index.ready:
+        return fuzzy_memory_backend
+    if choice == "like":
+        return like_backend
+    if choice in ("auto", "memory") and text_index.ready:
+        return memory_backend
+    if choice in ("auto", "native"):
+        backend = native_backend(db)
+        if backend is not None:
+            return backend
+    return like_backend
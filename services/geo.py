@@ -0,0 +1,68 @@
+"""
+Geometry helpers shared by the location services and spatial indexes
+"""
+import math
+from typing import Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Smallest lat/lng box containing every point within radius_km of the origin
+    Returns (min_lat, max_lat, min_lng, max_lng)
+    """
+    delta_lat = radius_km / KM_PER_DEGREE_LAT
+    min_lat = max(latitude - delta_lat, -90.0)
+    max_lat = min(latitude + delta_lat, 90.0)
+
+    # Near the poles the circle wraps every meridian
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return min_lat, max_lat, -180.0, 180.0
+
+    # Widest longitude span of the circle, reached poleward of the origin
+    ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))
+    if ratio >= 1.0:
+        return min_lat, max_lat, -180.0, 180.0
+    delta_lng = math.degrees(math.asin(ratio))
+    return min_lat, max_lat, max(longitude - delta_lng, -180.0), min(longitude + delta_lng, 180.0)
+
+
+def haversine_km(latitude: float, longitude: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """
+    Vectorized Haversine distance from one origin to arrays of coordinates
+    Returns distances in kilometers as a float64 array
+    """
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(lats)
+    delta_lat = lat2 - lat1
+    delta_lng = np.radians(lngs) - math.radians(longitude)
+
+    a = np.sin(delta_lat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(delta_lng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_within(
+    latitude: float,
+    longitude: float,
+    lats: np.ndarray,
+    lngs: np.ndarray,
+    radius_km: float,
+    limit: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Distances, radius mask and top-k selection in one pass
+    Returns (positions, distances) of the closest points within radius_km,
+    sorted by distance
+    """
+    distances = haversine_km(latitude, longitude, lats, lngs)
+    within = np.flatnonzero(distances <= radius_km)
+    if limit <= 0 or within.size == 0:
+        return within[:0], distances[:0]
+
+    if within.size > limit:
+        within = within[np.argpartition(distances[within], limit - 1)[:limit]]
+    order = within[np.argsort(distances[within], kind="stable")]
+    return order, distances[order]
@@ -0,0 +1,53 @@
+"""
+Registry of in-process place indexes.
+
+Indexes are built once from the database at startup and then kept in sync
+by the place write routes, so read paths never have to scan the table.
+"""
+import logging
+import threading
+from typing import Iterable, List
+from sqlalchemy.orm import Session
+from models.place import Place
+
+logger = logging.getLogger(__name__)
+
+_indexes: List = []
+
+# Writes hold this, and so do index reads that run in the thread pool
+# (the coalesced searches), so a read never walks a set or dict that a
+# write on the event loop is changing. Reads on the event loop itself
+# can't interleave with a write and go without it.
+index_lock = threading.RLock()
+
+
+def register_index(index):
+    """Register an index exposing build(places), add(place) and discard(place_id)"""
+    _indexes.append(index)
+    return index
+
+
+def build_indexes(db: Session) -> int:
+    """(Re)build every registered index from the active places in the database"""
+    places = db.query(Place).filter(Place.is_active == True).all()
+    with index_lock:
+        for index in _indexes:
+            index.build(places)
+    logger.info(f"Built {len(_indexes)} place indexes over {len(places)} places")
+    return len(places)
+
+
+def sync_place(place: Place) -> None:
+    """Reflect a committed create/update/soft-delete in every index"""
+    with index_lock:
+        for index in _indexes:
+            index.discard(place.id)
+            if place.is_active:
+                index.add(place)
+
+
+def sync_places(places: Iterable[Place]) -> None:
+    """sync_place() for a committed batch"""
+    with index_lock:
+        for place in places:
+            sync_place(place)
@@ -0,0 +1,230 @@
+"""
+k-nearest-neighbour index over active places
+"""
+import base64
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from models.place import Place
+from services.geo import EARTH_RADIUS_KM
+from services.indexes import register_index
+
+# (squared chord distance on the unit sphere, place id)
+Cursor = Tuple[float, int]
+
+
+def to_unit_sphere(latitude, longitude):
+    """Map lat/lng (degrees, scalars or arrays) to xyz on the unit sphere"""
+    lat = np.radians(latitude)
+    lng = np.radians(longitude)
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord_sq):
+    """Great-circle distance in km for a squared unit-sphere chord length"""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.sqrt(chord_sq) / 2, 1.0))
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    chord_sq, place_id = cursor
+    return base64.urlsafe_b64encode(f"{chord_sq!r}:{place_id}".encode()).decode()
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Raises ValueError for malformed cursors"""
+    try:
+        chord_sq, place_id = base64.urlsafe_b64decode(token.encode()).decode().split(":")
+        return float(chord_sq), int(place_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class KDTreeIndex:
+    """
+    KD-tree over unit-sphere coordinates. Chord length is monotonic in
+    great-circle distance, so Euclidean nearest neighbours in xyz are the
+    nearest places on the globe.
+
+    The tree is static; writes since the last build go to a small overlay
+    that is scanned brute force, and removed points are tombstoned. The
+    tree is rebuilt once overlay plus tombstones exceed rebuild_threshold.
+    """
+
+    def __init__(self, leaf_size: int = 32, rebuild_threshold: int = 512):
+        self.leaf_size = leaf_size
+        self.rebuild_threshold = rebuild_threshold
+        self.ready = False
+        self._category_codes: Dict[Optional[str], int] = {}
+        self._entries: Dict[int, Tuple[float, float, int]] = {}
+        self._load([])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _code(self, category: Optional[str]) -> int:
+        return self._category_codes.setdefault(category, len(self._category_codes))
+
+    def _load(self, entries: List[Tuple[int, float, float, int]]) -> None:
+        """Build the static tree from (place_id, lat, lng, category_code) rows"""
+        n = len(entries)
+        ids = np.fromiter((e[0] for e in entries), dtype=np.int64, count=n)
+        lats = np.fromiter((e[1] for e in entries), dtype=np.float64, count=n)
+        lngs = np.fromiter((e[2] for e in entries), dtype=np.float64, count=n)
+        codes = np.fromiter((e[3] for e in entries), dtype=np.int32, count=n)
+        points = to_unit_sphere(lats, lngs).reshape(n, 3)
+
+        order = np.arange(n)
+        # Node arrays: contiguous [start, end) range of `order`, children, box
+        starts, ends, lefts, rights, lows, highs = [], [], [], [], [], []
+
+        def new_node(start: int, end: int) -> int:
+            block = points[order[start:end]]
+            starts.append(start)
+            ends.append(end)
+            lefts.append(-1)
+            rights.append(-1)
+            lows.append(block.min(axis=0) if end > start else np.zeros(3))
+            highs.append(block.max(axis=0) if end > start else np.zeros(3))
+            return len(starts) - 1
+
+        stack = [new_node(0, n)]
+        while stack:
+            node = stack.pop()
+            start, end = starts[node], ends[node]
+            if end - start <= self.leaf_size:
+                continue
+            axis = int(np.argmax(highs[node] - lows[node]))
+            mid = (start + end) // 2
+            segment = order[start:end]
+            order[start:end] = segment[np.argpartition(points[segment, axis], mid - start)]
+            lefts[node] = new_node(start, mid)
+            rights[node] = new_node(mid, end)
+            stack.extend([lefts[node], rights[node]])
+
+        self._ids = ids[order]
+        self._points = points[order]
+        self._codes = codes[order]
+        self._dead = np.zeros(n, dtype=bool)
+        self._dead_count = 0
+        self._position_of = {int(place_id): i for i, place_id in enumerate(self._ids.tolist())}
+        self._starts, self._ends = starts, ends
+        self._lefts, self._rights = lefts, rights
+        self._lows = np.array(lows).reshape(-1, 3)
+        self._highs = np.array(highs).reshape(-1, 3)
+        self._overlay: Dict[int, Tuple[np.ndarray, int]] = {}
+
+    def _rebuild(self) -> None:
+        self._load([(place_id, lat, lng, code) for place_id, (lat, lng, code) in self._entries.items()])
+
+    def build(self, places) -> None:
+        self._category_codes = {}
+        self._entries = {
+            place.id: (place.latitude, place.longitude, self._code(place.category))
+            for place in places
+            if place.latitude is not None and place.longitude is not None
+        }
+        self._rebuild()
+        self.ready = True
+
+    def add(self, place: Place) -> None:
+        if place.latitude is None or place.longitude is None:
+            return
+        code = self._code(place.category)
+        self._entries[place.id] = (place.latitude, place.longitude, code)
+        point = to_unit_sphere(np.array([place.latitude]), np.array([place.longitude]))[0]
+        self._overlay[place.id] = (point, code)
+        self._maybe_rebuild()
+
+    def discard(self, place_id: int) -> None:
+        if self._entries.pop(place_id, None) is None:
+            return
+        self._overlay.pop(place_id, None)
+        position = self._position_of.get(place_id)
+        if position is not None and not self._dead[position]:
+            self._dead[position] = True
+            self._dead_count += 1
+            self._maybe_rebuild()
+
+    def _maybe_rebuild(self) -> None:
+        if len(self._overlay) + self._dead_count > self.rebuild_threshold:
+            self._rebuild()
+
+    def query(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        category: Optional[str] = None,
+        after: Optional[Cursor] = None
+    ) -> List[Cursor]:
+        """
+        The k closest places ordered by (chord_sq, id), optionally restricted
+        to a category and to entries strictly after a previous page's cursor
+        """
+        if k <= 0:
+            return []
+        code = None
+        if category is not None:
+            code = self._category_codes.get(category)
+            if code is None:
+                return []
+
+        target = to_unit_sphere(latitude, longitude)
+        after_sq, after_id = after if after is not None else (-1.0, -1)
+        best: List[Tuple[float, int]] = []  # max-heap of (-chord_sq, -id)
+
+        def worst() -> float:
+            return -best[0][0] if len(best) == k else math.inf
+
+        def offer(chord_sq: np.ndarray, ids: np.ndarray, keep: np.ndarray) -> None:
+            keep &= (chord_sq > after_sq) | ((chord_sq == after_sq) & (ids > after_id))
+            for d, place_id in zip(chord_sq[keep].tolist(), ids[keep].tolist()):
+                item = (-d, -place_id)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+
+        # Writes since the last build
+        if self._overlay:
+            ids = np.fromiter(self._overlay.keys(), dtype=np.int64, count=len(self._overlay))
+            points = np.array([point for point, _ in self._overlay.values()])
+            codes = np.fromiter((c for _, c in self._overlay.values()), dtype=np.int32, count=len(ids))
+            keep = np.ones(len(ids), dtype=bool) if code is None else codes == code
+            offer(((points - target) ** 2).sum(axis=1), ids, keep)
+
+        if len(self._ids):
+            # Best-first traversal ordered by the minimum distance to each box
+            frontier = [(self._box_min_sq(0, target), 0)]
+            while frontier:
+                min_sq, node = heapq.heappop(frontier)
+                if min_sq > worst():
+                    break
+                if self._box_max_sq(node, target) < after_sq:
+                    continue  # every point in the box precedes the cursor
+                left = self._lefts[node]
+                if left == -1:
+                    start, end = self._starts[node], self._ends[node]
+                    keep = ~self._dead[start:end]
+                    if code is not None:
+                        keep &= self._codes[start:end] == code
+                    chord_sq = ((self._points[start:end] - target) ** 2).sum(axis=1)
+                    offer(chord_sq, self._ids[start:end], keep)
+                    continue
+                for child in (left, self._rights[node]):
+                    heapq.heappush(frontier, (self._box_min_sq(child, target), child))
+
+        return sorted((-d, -place_id) for d, place_id in best)
+
+    def _box_min_sq(self, node: int, target: np.ndarray) -> float:
+        gap = np.maximum(np.maximum(self._lows[node] - target, target - self._highs[node]), 0.0)
+        return float((gap ** 2).sum())
+
+    def _box_max_sq(self, node: int, target: np.ndarray) -> float:
+        span = np.maximum(np.abs(target - self._lows[node]), np.abs(target - self._highs[node]))
+        return float((span ** 2).sum())
+
+
+place_knn = register_index(KDTreeIndex())
@@ -1,20 +1,41 @@
 """
 Service functions for location-based operations
 """
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, distinct, or_
+from sqlalchemy import distinct, func, or_
+from core.config import config
 from models.place import Place
+from services.geo import bounding_box, nearest_within
+from services.spatial_index import place_grid
+from services.indexes import index_lock
+from services.knn import Cursor, KDTreeIndex, chord_to_km, place_knn
+from services.clusters import ClusterIndex, place_clusters
+from services.fulltext import get_search_backend
+from services.autocomplete import CompletionIndex, place_completions
+from services.cities import catalog_etag, city_catalog, city_clause
+from services.facets import facet_columns, place_facets, tally
 import math
+import numpy as np
 
 
-def get_all_cities(db: Session) -> List[str]:
-    """Get list of all unique cities in the database"""
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards in a value matched with a backslash escape character"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def get_all_cities(db: Session) -> Tuple[List[str], str]:
+    """Get list of all unique cities in the database, with its ETag"""
+    if city_catalog.ready:
+        return city_catalog.snapshot()
+    
     cities = db.query(distinct(Place.city)).filter(
         Place.is_active == True,
         Place.city.isnot(None)
-    ).order_by(Place.city).all()
-    return [city[0] for city in cities if city[0]]
+    ).all()
+    # Sorted like the catalog so both produce the same ETag
+    cities = sorted(city[0] for city in cities if city[0])
+    return cities, catalog_etag(cities)
 
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -40,29 +61,160 @@ def get_places_near_location(
     latitude: float,
     longitude: float,
     radius_km: float = 10.0,
-    limit: int = 100
+    limit: int = 100,
+    options: Sequence = ()
 ) -> List[Tuple[Place, float]]:
     """
     Get places near a specific location within a radius
-    Returns list of (Place, distance) tuples sorted by distance
+    Returns list of (Place, distance) tuples sorted by distance.
+    `options` are loader options for the Place rows, e.g. a column projection.
     """
-    # Get all active places with coordinates
-    places = db.query(Place).filter(
+    if place_grid.ready:
+        return _nearby_from_grid(db, latitude, longitude, radius_km, limit, options)
+
+    # Only rows inside the bounding box of the circle can be within the radius
+    places = _places_in_bounding_box(db, latitude, longitude, radius_km, options)
+    if not places:
+        return []
+    
+    lats = np.fromiter((place.latitude for place in places), dtype=np.float64, count=len(places))
+    lngs = np.fromiter((place.longitude for place in places), dtype=np.float64, count=len(places))
+    positions, distances = nearest_within(latitude, longitude, lats, lngs, radius_km, limit)
+    return [(places[i], distance) for i, distance in zip(positions.tolist(), distances.tolist())]
+
+
+def _places_in_bounding_box(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    options: Sequence = ()
+) -> List[Place]:
+    """
+    Load active places inside the lat/lng box around the search circle.
+    Served by the (is_active, latitude, longitude) index.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    return db.query(Place).options(*options).filter(
         Place.is_active == True,
-        Place.latitude.isnot(None),
-        Place.longitude.isnot(None)
+        Place.latitude.between(min_lat, max_lat),
+        Place.longitude.between(min_lng, max_lng)
     ).all()
+
+
+def _nearby_from_grid(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    limit: int,
+    options: Sequence = ()
+) -> List[Tuple[Place, float]]:
+    """
+    Answer a radius query from the grid index and load only the winning rows
+    """
+    with index_lock:
+        hits = place_grid.nearest(latitude, longitude, radius_km, limit)
+    if not hits:
+        return []
+    
+    # Primary-key lookup only; an is_active predicate here lets SQLite pick
+    # the (is_active, latitude, longitude) index and scan every active row
+    places = db.query(Place).options(*options).filter(Place.id.in_([place_id for place_id, _ in hits])).all()
+    places_by_id = {place.id: place for place in places if place.is_active}
+    return [(places_by_id[place_id], distance) for place_id, distance in hits if place_id in places_by_id]
+
+
+def get_nearest_places(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    k: int = 20,
+    category: Optional[str] = None,
+    after: Optional[Cursor] = None
+) -> Tuple[List[Tuple[Place, float]], Optional[Cursor]]:
+    """
+    Get the k closest active places, optionally of one category, starting
+    after the (distance, id) cursor of a previous page.
+    Returns ((Place, distance) tuples sorted by distance, cursor for the next
+    page or None when the results are exhausted)
+    """
+    index = place_knn
+    if not index.ready:
+        # No startup index: build a throwaway tree over the active coordinates
+        rows = db.query(Place.id, Place.latitude, Place.longitude, Place.category).filter(
+            Place.is_active == True,
+            Place.latitude.isnot(None),
+            Place.longitude.isnot(None)
+        ).all()
+        index = KDTreeIndex()
+        index.build(rows)
     
-    # Calculate distances and filter by radius
-    places_with_distance = []
-    for place in places:
-        distance = calculate_distance(latitude, longitude, place.latitude, place.longitude)
-        if distance <= radius_km:
-            places_with_distance.append((place, distance))
+    hits = index.query(latitude, longitude, k, category=category, after=after)
+    if not hits:
+        return [], None
     
-    # Sort by distance and limit results
-    places_with_distance.sort(key=lambda x: x[1])
-    return places_with_distance[:limit]
+    places = db.query(Place).filter(Place.id.in_([place_id for _, place_id in hits])).all()
+    places_by_id = {place.id: place for place in places if place.is_active}
+    results = [
+        (places_by_id[place_id], float(chord_to_km(chord_sq)))
+        for chord_sq, place_id in hits
+        if place_id in places_by_id
+    ]
+    return results, hits[-1] if len(hits) == k else None
+
+
+def get_viewport_clusters(
+    db: Session,
+    min_lng: float,
+    min_lat: float,
+    max_lng: float,
+    max_lat: float,
+    zoom: int
+) -> Tuple[int, List[dict]]:
+    """
+    Get marker clusters (count, centroid, top category) covering a map
+    viewport, with the zoom they were computed at: the requested one, or a
+    coarser one where the viewport would span more than
+    VIEWPORT_MAX_CELLS cells
+    """
+    zoom = place_clusters.fit_zoom(min_lng, min_lat, max_lng, max_lat, zoom, config.VIEWPORT_MAX_CELLS)
+    index = place_clusters
+    if not index.ready:
+        # No startup index: cluster the places inside the viewport on the fly
+        rows = db.query(Place.id, Place.latitude, Place.longitude, Place.category).filter(
+            Place.is_active == True,
+            Place.latitude.between(min_lat, max_lat),
+            Place.longitude.between(min_lng, max_lng)
+        ).all()
+        index = ClusterIndex(min_zoom=zoom, max_zoom=zoom)
+        index.build(rows)
+    
+    return zoom, index.query(min_lng, min_lat, max_lng, max_lat, zoom)
+
+
+def get_completions(db: Session, prefix: str, limit: int = 10) -> List[dict]:
+    """
+    Typeahead completions (place names, cities, postal codes) for a prefix
+    """
+    index = place_completions
+    if not index.ready:
+        # No startup index: complete over the places containing the prefix
+        pattern = f"%{escape_like(prefix.strip().lower())}%"
+        rows = db.query(
+            Place.id, Place.name, Place.city, Place.postal_code, Place.user_ratings_total
+        ).filter(
+            Place.is_active == True,
+            or_(
+                func.lower(Place.name).like(pattern, escape="\\"),
+                func.lower(Place.city).like(pattern, escape="\\"),
+                Place.postal_code.like(pattern, escape="\\")
+            )
+        ).all()
+        index = CompletionIndex()
+        index.build(rows)
+
+    return index.complete(prefix, limit)
 
 
 def search_places(
@@ -70,31 +222,65 @@ def search_places(
     query: str,
     city: Optional[str] = None,
     category: Optional[str] = None,
-    limit: int = 100
+    limit: int = 100,
+    fuzzy: bool = False,
+    options: Sequence = ()
 ) -> List[Place]:
     """
-    Search places by name, description, address with optional filters
+    Search places by name, description, address with optional filters.
+    With fuzzy, words also match spellings a few typos away. `options` are
+    loader options for the Place rows.
     """
-    filters = [Place.is_active == True]
-    
-    # Text search
     if query:
-        normalized_query = query.lower()
-        search_filter = or_(
-            func.lower(Place.name).contains(normalized_query),
-            func.lower(Place.description).contains(normalized_query),
-            func.lower(Place.address).contains(normalized_query),
-            func.lower(Place.city).contains(normalized_query),
-            func.lower(Place.postal_code).contains(normalized_query)
-        )
-        filters.append(search_filter)
+        return get_search_backend(db, fuzzy=fuzzy).search(db, query, city, category, limit, options)
+    
+    filters = [Place.is_active == True]
     
     # City filter
     if city:
-        filters.append(Place.city == city)
+        filters.append(city_clause(city))
     
     # Category filter
     if category:
         filters.append(Place.category == category)
     
-    return db.query(Place).filter(*filters).limit(limit).all()
+    return db.query(Place).options(*options).filter(*filters).limit(limit).all()
+
+
+def get_search_facets(
+    db: Session,
+    query: Optional[str] = None,
+    city: Optional[str] = None,
+    category: Optional[str] = None,
+    fuzzy: bool = False
+) -> Dict[str, List[dict]]:
+    """
+    Category, city and price level counts over every place the search
+    matches, not just the returned page
+    """
+    if query:
+        return get_search_backend(db, fuzzy=fuzzy).facets(db, query, city, category)
+    if not city and not category and place_facets.ready:
+        return place_facets.counts()
+    
+    filters = [Place.is_active == True]
+    if city:
+        filters.append(city_clause(city))
+    if category:
+        filters.append(Place.category == category)
+    return tally(db.query(*facet_columns()).filter(*filters))
+
+
+def search_places_with_facets(
+    db: Session,
+    query: Optional[str] = None,
+    city: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = 100,
+    fuzzy: bool = False
+) -> Tuple[List[Place], Dict[str, List[dict]]]:
+    """search_places and get_search_facets together, matching the query once"""
+    if query:
+        return get_search_backend(db, fuzzy=fuzzy).faceted(db, query, city, category, limit)
+    places = search_places(db, query=query, city=city, category=category, limit=limit)
+    return places, get_search_facets(db, city=city, category=category)
@@ -0,0 +1,91 @@
+"""
+LRU cache of serialized place JSON, keyed by (place_id, updated_at)
+"""
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+import orjson
+from fastapi.responses import Response
+from core.config import config
+from models.place import Place
+from schemas.place import Place as PlaceSchema
+from services.indexes import register_index
+from services.serialization import ORJSON_OPTIONS, RawJSONResponse, encode_rows, encode_with_distance, row_encoder
+from services.views import VIEW_SCHEMAS, PlaceView
+
+# (JSON bytes, ETag)
+Entry = Tuple[bytes, str]
+
+
+def place_etag(place_id: int, body: bytes) -> str:
+    """Content hash of a place's JSON, stable across restarts and workers"""
+    return f'"place-{place_id}-{hashlib.sha1(body).hexdigest()[:16]}"'
+
+
+class PlaceJSONCache:
+    """
+    Bounded LRU of each place's PlaceSchema JSON and ETag. An entry is only
+    served for the updated_at it was encoded at, so writes from other
+    workers are picked up on the next read; the place write routes also
+    drop it through the index registry, which covers updates within the
+    same second. Entries are encoded on first read, not at build time.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[int, Tuple[Optional[datetime], Entry]]" = OrderedDict()
+
+    def build(self, places) -> None:
+        self._entries.clear()
+
+    def add(self, place: Place) -> None:
+        pass
+
+    def discard(self, place_id: int) -> None:
+        self._entries.pop(place_id, None)
+
+    def lookup(self, place_id: int, updated_at: Optional[datetime]) -> Optional[Entry]:
+        cached = self._entries.get(place_id)
+        if cached is None or cached[0] != updated_at:
+            return None
+        self._entries.move_to_end(place_id)
+        return cached[1]
+
+    def store(self, place: Place) -> Entry:
+        body = orjson.dumps(row_encoder(PlaceSchema)(place), option=ORJSON_OPTIONS)
+        entry = (body, place_etag(place.id, body))
+        self._entries[place.id] = (place.updated_at, entry)
+        self._entries.move_to_end(place.id)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def encode(self, place: Place) -> bytes:
+        """JSON of a loaded place, from the cache while it is unchanged"""
+        entry = self.lookup(place.id, place.updated_at) or self.store(place)
+        return entry[0]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+place_json_cache = register_index(PlaceJSONCache(config.PLACE_CACHE_SIZE))
+
+
+def encode_places(places: Iterable[Place], view: PlaceView, headers=None) -> Response:
+    """FAST_JSON list response; full places are spliced in from the cache"""
+    if view != "full":
+        return encode_rows(places, VIEW_SCHEMAS[view], headers=headers)
+    return RawJSONResponse(b"[" + b",".join(map(place_json_cache.encode, places)) + b"]", headers=headers)
+
+
+def encode_places_with_distance(rows: Iterable[Tuple[Place, float]], view: PlaceView) -> Response:
+    """FAST_JSON nearby response of (place, distance_km) pairs"""
+    if view != "full":
+        return encode_with_distance(rows, VIEW_SCHEMAS[view])
+    items = [
+        b'{"place":' + place_json_cache.encode(place) + b',"distance_km":' + orjson.dumps(round(distance, 2)) + b"}"
+        for place, distance in rows
+    ]
+    return RawJSONResponse(b"[" + b",".join(items) + b"]")
@@ -0,0 +1,132 @@
+"""
+Who is checked in where: active check-ins per place, with an expiry heap
+"""
+import heapq
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from models.checkin import CheckIn
+
+logger = logging.getLogger(__name__)
+
+
+class Presence(NamedTuple):
+    checkin_id: int
+    user_id: int
+    place_id: int
+    message: Optional[str]
+    duration_hours: int
+    check_in_time: datetime
+    expires_at: datetime
+
+
+def naive_utc(moment: datetime) -> datetime:
+    """Naive UTC like datetime.utcnow(); PostgreSQL returns aware timestamps"""
+    if moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def expiry_of(checkin: CheckIn) -> datetime:
+    return naive_utc(checkin.check_in_time) + timedelta(hours=checkin.duration_hours)
+
+
+class PresenceRegistry:
+    """
+    Active check-ins by place, loaded from the database at startup and
+    kept current by the check-in write routes. Check-ins leave when they
+    are ended or deleted; once their duration has run out, reads skip
+    them but they stay registered until the sweeper ends them in the
+    database, so it can schedule and report them. Expiry is tracked in a
+    min-heap so finding the next one never scans the rest. Reads don't
+    write to the database. Until it is loaded, callers query check-ins
+    directly.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._checkins: Dict[int, Presence] = {}
+        self._by_place: Dict[int, Dict[int, Presence]] = {}
+        # (expires_at, checkin_id); entries of removed check-ins are skipped when popped
+        self._expiry: List[Tuple[datetime, int]] = []
+
+    def load(self, db: Session) -> None:
+        self._checkins = {}
+        self._by_place = {}
+        self._expiry = []
+        for checkin in db.query(CheckIn).filter(CheckIn.status == "active").order_by(CheckIn.id):
+            self.add(checkin)
+        self.ready = True
+        logger.info(f"Loaded {len(self._checkins)} active check-ins")
+
+    def add(self, checkin: CheckIn) -> None:
+        self.discard(checkin.id)
+        presence = Presence(
+            checkin.id, checkin.user_id, checkin.place_id, checkin.message,
+            checkin.duration_hours, naive_utc(checkin.check_in_time), expiry_of(checkin),
+        )
+        self._checkins[presence.checkin_id] = presence
+        self._by_place.setdefault(presence.place_id, {})[presence.checkin_id] = presence
+        heapq.heappush(self._expiry, (presence.expires_at, presence.checkin_id))
+
+    def discard(self, checkin_id: int) -> Optional[Presence]:
+        presence = self._checkins.pop(checkin_id, None)
+        if presence is None:
+            return None
+        at_place = self._by_place[presence.place_id]
+        del at_place[checkin_id]
+        if not at_place:
+            del self._by_place[presence.place_id]
+        return presence
+
+    def next_expiry(self) -> Optional[datetime]:
+        """Earliest expiry of a registered check-in"""
+        while self._expiry:
+            expires_at, checkin_id = self._expiry[0]
+            presence = self._checkins.get(checkin_id)
+            if presence is not None and presence.expires_at == expires_at:
+                return expires_at
+            heapq.heappop(self._expiry)
+        return None
+
+    def at_place(self, place_id: int, now: datetime) -> List[Presence]:
+        """Active check-ins at a place that haven't run out by `now`, in check-in order"""
+        return [item for item in self._by_place.get(place_id, {}).values() if item.expires_at > now]
+
+    def counts(self, place_ids: Iterable[int], now: datetime) -> Dict[int, int]:
+        """Number of check-ins at each of the places that haven't run out by `now`"""
+        return {
+            place_id: sum(item.expires_at > now for item in self._by_place.get(place_id, {}).values())
+            for place_id in place_ids
+        }
+
+    def __len__(self) -> int:
+        return len(self._checkins)
+
+
+presence = PresenceRegistry()
+
+
+def occupancy(db: Session, place_ids: Iterable[int], now: Optional[datetime] = None) -> Dict[int, int]:
+    """
+    Active check-ins per place, 0 for places nobody is at. Read from the
+    registry; before it is loaded, from one query over the places' active
+    check-ins, skipping expired ones.
+    """
+    place_ids = list(dict.fromkeys(place_ids))
+    now = now or datetime.utcnow()
+    if presence.ready:
+        return presence.counts(place_ids, now)
+    if not place_ids:
+        return {}
+    rows = db.query(CheckIn.place_id, CheckIn.check_in_time, CheckIn.duration_hours).filter(
+        CheckIn.place_id.in_(place_ids),
+        CheckIn.status == "active"
+    )
+    counts = Counter(
+        place_id for place_id, check_in_time, hours in rows
+        if naive_utc(check_in_time) + timedelta(hours=hours) > now
+    )
+    return {place_id: counts[place_id] for place_id in place_ids}
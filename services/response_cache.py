@@ -0,0 +1,204 @@
+"""
+Shared cache of anonymous GET responses with tag-based invalidation
+
+Responses are stored under the normalized path and query plus the current
+version of every tag the route depends on. Write routes bump a tag's
+version, which makes every response cached under the old version
+unreachable at once; those entries then age out through the TTL (or the
+LRU bound of the memory backend).
+
+- memory: per-process LRU
+- redis: shared by all workers (REDIS_URL, needs the redis package)
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import orjson
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from core.config import config
+from core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Cached routes, below API_V1_STR, and the tags their responses depend on
+CACHED_ROUTES: Dict[str, Tuple[str, ...]] = {
+    "/places/": ("places",),
+    "/places/search/text": ("places",),
+    "/places/nearby/gps": ("places",),
+    "/checkins/": ("checkins",),
+}
+
+# Response headers that are recomputed rather than stored
+SKIPPED_HEADERS = {"content-length", "set-cookie", "x-cache"}
+
+
+class MemoryBackend:
+    """Per-process LRU of entries with expiry times, plus tag versions"""
+    name = "memory"
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_counters(self, keys: Sequence[str]) -> List[int]:
+        return [self._counters.get(key, 0) for key in keys]
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+
+class RedisBackend:
+    """Store shared by every worker; `client` is a redis.asyncio client or a stand-in"""
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        import redis.asyncio as redis
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self.client.set(key, value, ex=ttl)
+
+    async def get_counters(self, keys: Sequence[str]) -> List[int]:
+        return [int(value or 0) for value in await self.client.mget(keys)]
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+def backend_from_config():
+    """Backend named by RESPONSE_CACHE_BACKEND, None when caching is off"""
+    choice = config.RESPONSE_CACHE_BACKEND
+    if choice == "memory":
+        return MemoryBackend(config.RESPONSE_CACHE_SIZE)
+    if choice == "redis":
+        if not config.REDIS_URL:
+            raise ValueError("RESPONSE_CACHE_BACKEND=redis needs REDIS_URL")
+        return RedisBackend.from_url(config.REDIS_URL)
+    if choice == "off":
+        return None
+    raise ValueError(f"Unknown response cache backend {choice!r}")
+
+
+def normalized_query(request: Request) -> str:
+    """Query string with its parameters sorted, so ?a=1&b=2 and ?b=2&a=1 share an entry"""
+    return "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+
+
+def encode_entry(response: Response, body: bytes) -> bytes:
+    headers = [[name, value] for name, value in response.headers.items() if name not in SKIPPED_HEADERS]
+    return orjson.dumps({"status": response.status_code, "headers": headers}) + b"\n" + body
+
+
+def decode_entry(entry: bytes) -> Response:
+    meta, body = entry.split(b"\n", 1)
+    meta = orjson.loads(meta)
+    response = Response(body, status_code=meta["status"])
+    for name, value in meta["headers"]:
+        response.headers.append(name, value)
+    return response
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+
+    def tags_for(self, request: Request) -> Optional[Tuple[str, ...]]:
+        """Tags of a cacheable request: an anonymous GET of a cached route"""
+        if self.backend is None or request.method != "GET" or "authorization" in request.headers:
+            return None
+        path = request.url.path
+        if not path.startswith(config.API_V1_STR):
+            return None
+        return CACHED_ROUTES.get(path[len(config.API_V1_STR):])
+
+    async def key(self, request: Request, tags: Sequence[str]) -> str:
+        versions = await self.backend.get_counters([f"response-tag:{tag}" for tag in tags])
+        version = ".".join(map(str, versions))
+        return f"response:{request.url.path}?{normalized_query(request)}#{version}"
+
+    async def invalidate(self, *tags: str) -> None:
+        """Drop every cached response depending on any of `tags`; called by the write routes"""
+        if self.backend is None:
+            return
+        try:
+            for tag in tags:
+                await self.backend.incr(f"response-tag:{tag}")
+        except Exception as e:
+            metrics.incr("response_cache.errors")
+            logger.warning(f"Response cache invalidation of {tags} failed: {e}")
+        else:
+            metrics.incr("response_cache.invalidations", len(tags))
+
+
+response_cache = ResponseCache(backend_from_config(), config.RESPONSE_CACHE_TTL)
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """Serve cacheable requests from response_cache; marks responses X-Cache: HIT or MISS"""
+
+    async def dispatch(self, request: Request, call_next):
+        tags = response_cache.tags_for(request)
+        if tags is None:
+            return await call_next(request)
+
+        # A failing store must not fail the request
+        backend = response_cache.backend
+        try:
+            key = await response_cache.key(request, tags)
+            entry = await backend.get(key)
+        except Exception as e:
+            metrics.incr("response_cache.errors")
+            logger.warning(f"Response cache lookup failed: {e}")
+            return await call_next(request)
+
+        if entry is not None:
+            metrics.incr("response_cache.hits")
+            response = decode_entry(entry)
+            response.headers["X-Cache"] = "HIT"
+            return response
+
+        metrics.incr("response_cache.misses")
+        response = await call_next(request)
+        if response.status_code != 200 or "no-store" in response.headers.get("cache-control", ""):
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        entry = encode_entry(response, body)
+        try:
+            await backend.set(key, entry, response_cache.ttl)
+        except Exception as e:
+            metrics.incr("response_cache.errors")
+            logger.warning(f"Response cache store failed: {e}")
+        response = decode_entry(entry)
+        response.headers["X-Cache"] = "MISS"
+        return response
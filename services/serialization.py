@@ -0,0 +1,56 @@
+"""
+Fast JSON path for high-volume read endpoints (config.FAST_JSON)
+
+The default path validates every result through the route's response_model
+and encodes it with the stdlib json module. The fast path reads a schema's
+fields straight off the ORM rows and encodes them with orjson, producing
+the same JSON. Routes keep their response_model, so the OpenAPI schema is
+unchanged; rows are trusted to match it rather than validated.
+"""
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, Optional, Tuple, Type
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+# Aware UTC datetimes as ...Z, like pydantic
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+_encoders: Dict[Type[BaseModel], Callable[[object], Dict]] = {}
+
+
+class RawJSONResponse(Response):
+    """Already encoded JSON bytes"""
+    media_type = "application/json"
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def row_encoder(schema: Type[BaseModel]) -> Callable[[object], Dict]:
+    """Function reading the schema's fields off a row into a dict, in schema order"""
+    encoder = _encoders.get(schema)
+    if encoder is None:
+        fields = tuple(schema.model_fields)
+        getter = attrgetter(*fields)
+        if len(fields) == 1:
+            encoder = lambda row: {fields[0]: getter(row)}
+        else:
+            encoder = lambda row: dict(zip(fields, getter(row)))
+        _encoders[schema] = encoder
+    return encoder
+
+
+def encode_rows(rows: Iterable, schema: Type[BaseModel], headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    encode = row_encoder(schema)
+    return FastJSONResponse([encode(row) for row in rows], headers=headers)
+
+
+def encode_with_distance(rows: Iterable[Tuple[object, float]], schema: Type[BaseModel]) -> FastJSONResponse:
+    """(row, distance_km) pairs in the {"place": ..., "distance_km": ...} shape of the nearby routes"""
+    encode = row_encoder(schema)
+    return FastJSONResponse([{"place": encode(row), "distance_km": round(distance, 2)} for row, distance in rows])
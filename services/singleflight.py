@@ -0,0 +1,66 @@
+"""
+Request coalescing: concurrent identical calls share one computation
+"""
+import asyncio
+from typing import Callable, Dict, Hashable
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from core.config import config
+from core.metrics import metrics
+
+
+class SingleFlight:
+    """
+    Calls made with the key of a call still in flight await that call's
+    result instead of starting their own. Nothing is cached: a call that
+    arrives after the computation finished starts a new one.
+
+    The computation runs in the thread pool so the event loop keeps
+    accepting the identical requests it is meant to absorb, and as its own
+    task so a disconnecting first caller doesn't cancel it for the others.
+    Computations that read the place indexes take
+    services.indexes.index_lock around those reads, since the writes that
+    update the indexes run on the loop meanwhile.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """fn(*args, **kwargs), shared with every concurrent call of the same key"""
+        if not config.SINGLEFLIGHT_ENABLED:
+            return fn(*args, **kwargs)
+
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(run_in_threadpool(fn, *args, **kwargs))
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+            metrics.incr(f"singleflight.{self.name}.calls")
+        else:
+            metrics.incr(f"singleflight.{self.name}.coalesced")
+        return await asyncio.shield(call)
+
+    async def run_with_session(self, key: Hashable, bind, fn: Callable, *args, **kwargs):
+        """
+        fn(session, *args, **kwargs) on a session of its own, bound to
+        `bind`, shared like run(). The callers' request-scoped sessions are
+        not thread-safe, must not cross requests and are closed when their
+        client disconnects, so the computation never borrows one. The
+        session is closed before the result is shared: ORM rows come back
+        detached, with the attributes loaded by the query.
+        """
+        return await self.run(key, _in_own_session, bind, fn, *args, **kwargs)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+def _in_own_session(bind, fn: Callable, *args, **kwargs):
+    with Session(bind=bind) as session:
+        return fn(session, *args, **kwargs)
+
+
+nearby_flight = SingleFlight("nearby")
+search_flight = SingleFlight("search")
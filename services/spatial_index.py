@@ -0,0 +1,118 @@
+"""
+In-memory lat/lng grid index over active places
+"""
+import math
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+import numpy as np
+from models.place import Place
+from services.geo import bounding_box, nearest_within
+from services.indexes import register_index
+
+Cell = Tuple[int, int]
+
+
+class GridIndex:
+    """
+    Buckets place coordinates into fixed-size lat/lng cells so radius
+    queries only visit the cells overlapping the search circle.
+
+    Coordinates live in contiguous float64 arrays addressed by slot; cells
+    hold slot numbers, so a query gathers candidate slots and runs the
+    vectorized distance kernel over them in one pass.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.1, capacity: int = 1024):
+        self.cell_size_deg = cell_size_deg
+        self.ready = False
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.lats = np.zeros(capacity, dtype=np.float64)
+        self.lngs = np.zeros(capacity, dtype=np.float64)
+        self._size = 0
+        self._free: List[int] = []
+        self._slot_of: Dict[int, int] = {}
+        self._cells: Dict[Cell, Set[int]] = defaultdict(set)
+        self._cell_of: Dict[int, Cell] = {}
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def _cell(self, latitude: float, longitude: float) -> Cell:
+        return (
+            math.floor(latitude / self.cell_size_deg),
+            math.floor(longitude / self.cell_size_deg),
+        )
+
+    def _grow(self) -> None:
+        capacity = max(2 * len(self.ids), 1)
+        for name in ("ids", "lats", "lngs"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def build(self, places) -> None:
+        located = [place for place in places if place.latitude is not None and place.longitude is not None]
+        self._allocate(max(2 * len(located), 1024))
+        for place in located:
+            self.add(place)
+        self.ready = True
+
+    def add(self, place: Place) -> None:
+        if place.latitude is None or place.longitude is None:
+            return
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._size == len(self.ids):
+                self._grow()
+            slot = self._size
+            self._size += 1
+
+        self.ids[slot] = place.id
+        self.lats[slot] = place.latitude
+        self.lngs[slot] = place.longitude
+        self._slot_of[place.id] = slot
+
+        cell = self._cell(place.latitude, place.longitude)
+        self._cells[cell].add(slot)
+        self._cell_of[place.id] = cell
+
+    def discard(self, place_id: int) -> None:
+        slot = self._slot_of.pop(place_id, None)
+        if slot is None:
+            return
+        cell = self._cell_of.pop(place_id)
+        bucket = self._cells[cell]
+        bucket.discard(slot)
+        if not bucket:
+            del self._cells[cell]
+        self._free.append(slot)
+
+    def candidate_slots(self, latitude: float, longitude: float, radius_km: float) -> np.ndarray:
+        """Slots of every place in a cell overlapping the search circle's bounding box"""
+        min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+        min_row, min_col = self._cell(min_lat, min_lng)
+        max_row, max_col = self._cell(max_lat, max_lng)
+
+        slots: List[int] = []
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                bucket = self._cells.get((row, col))
+                if bucket:
+                    slots.extend(bucket)
+        return np.fromiter(slots, dtype=np.int64, count=len(slots))
+
+    def nearest(self, latitude: float, longitude: float, radius_km: float, limit: int) -> List[Tuple[int, float]]:
+        """(place_id, distance_km) of the closest places within the radius, nearest first"""
+        slots = self.candidate_slots(latitude, longitude, radius_km)
+        positions, distances = nearest_within(
+            latitude, longitude, self.lats[slots], self.lngs[slots], radius_km, limit
+        )
+        return list(zip(self.ids[slots[positions]].tolist(), distances.tolist()))
+
+
+place_grid = register_index(GridIndex())
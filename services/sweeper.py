@@ -0,0 +1,127 @@
+"""
+Background task ending check-ins whose duration has run out
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import func, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from core.config import config
+from core.metrics import metrics
+from db.session import SessionLocal
+from models.checkin import CheckIn
+from services.checkin_events import checkin_broker
+from services.presence import presence
+from services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# (checkin_id, place_id, user_id) of an ended check-in
+Closed = Tuple[int, int, int]
+
+
+def _ended_at(hours: int, dialect: str):
+    """check_in_time + duration as SQL; SQLite keeps datetimes as text"""
+    if dialect == "sqlite":
+        return func.datetime(CheckIn.check_in_time, f"+{hours} hours")
+    return CheckIn.check_in_time + timedelta(hours=hours)
+
+
+def sweep_expired(db: Session, now: datetime) -> List[Closed]:
+    """
+    End every active check-in whose duration ran out by `now`, checked out
+    at its end time, and commit. One UPDATE per distinct duration, each a
+    range scan of the (status, check_in_time) index.
+    """
+    dialect = db.get_bind().dialect.name
+    durations = [hours for hours, in db.query(CheckIn.duration_hours).filter(CheckIn.status == "active").distinct()]
+    closed: List[Closed] = []
+    for hours in durations:
+        if hours is None:
+            continue
+        statement = update(CheckIn).where(
+            CheckIn.status == "active",
+            CheckIn.duration_hours == hours,
+            CheckIn.check_in_time <= now - timedelta(hours=hours)
+        ).values(
+            status="ended", check_out_time=_ended_at(hours, dialect)
+        ).returning(CheckIn.id, CheckIn.place_id, CheckIn.user_id)
+        closed.extend(tuple(row) for row in db.execute(statement, execution_options={"synchronize_session": False}))
+    db.commit()
+    return closed
+
+
+class CheckinSweeper:
+    """
+    Ends expired check-ins on the event loop's schedule: it sleeps until
+    the earliest expiry in the presence registry, but never longer than
+    CHECKIN_SWEEP_INTERVAL so check-ins created by other workers are
+    caught too. The database work runs in the thread pool.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _sweep(self) -> List[Closed]:
+        db = self.session_factory()
+        try:
+            return sweep_expired(db, datetime.utcnow())
+        finally:
+            db.close()
+
+    async def sweep(self) -> List[Closed]:
+        started = time.perf_counter()
+        closed = await run_in_threadpool(self._sweep)
+        metrics.observe("checkin_sweeper.sweep", time.perf_counter() - started)
+        metrics.incr("checkin_sweeper.rows_closed", len(closed))
+        now = datetime.utcnow()
+        for checkin_id, place_id, user_id in closed:
+            ended = presence.discard(checkin_id)
+            checkin_broker.publish("checkout", checkin_id, place_id, user_id, ended.expires_at if ended else now)
+        if closed:
+            await response_cache.invalidate("checkins")
+        return closed
+
+    def delay(self, now: datetime) -> float:
+        """Seconds until the next sweep"""
+        next_expiry = presence.next_expiry()
+        if next_expiry is None:
+            return self.interval
+        return min(self.interval, max((next_expiry - now).total_seconds(), 0.0))
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except SQLAlchemyError as e:
+                metrics.incr("checkin_sweeper.errors")
+                logger.warning(f"Check-in sweep failed: {e}")
+            except Exception:
+                # Anything else must not end the loop either; cancellation
+                # (stop()) is not an Exception and still does
+                metrics.incr("checkin_sweeper.errors")
+                logger.exception("Check-in sweep failed")
+            await asyncio.sleep(max(self.delay(datetime.utcnow()), 1.0))
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+checkin_sweeper = CheckinSweeper(SessionLocal, config.CHECKIN_SWEEP_INTERVAL)
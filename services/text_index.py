@@ -0,0 +1,284 @@
+"""
+Inverted full-text index over active places
+"""
+import bisect
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from models.place import Place
+from services.indexes import register_index
+
+# How much a match in each field counts towards a place's score
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "city": 2.0,
+    "postal_code": 2.0,
+    "address": 1.0,
+    "description": 0.5,
+}
+
+# Query terms shorter than this only match whole words, not prefixes
+MIN_PREFIX_LENGTH = 3
+PREFIX_MATCH_WEIGHT = 0.5
+
+# Fuzzy matching: edits allowed per query word by length, and the weight
+# of a match per edit
+FUZZY_MAX_EDITS = ((8, 2), (4, 1))
+FUZZY_MATCH_WEIGHT = 0.4
+
+UMLAUTS = {"ä": "ae", "ö": "oe", "ü": "ue"}
+TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def strip_accents(text: str) -> str:
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def normalize(text: str) -> str:
+    """Lowercase, ß -> ss and umlauts/accents folded to their base letter"""
+    return strip_accents(text.lower().replace("ß", "ss"))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Normalized words of a text, as used for queries"""
+    if not text:
+        return []
+    return TOKEN_RE.findall(normalize(text))
+
+
+def index_terms(text: Optional[str]) -> List[str]:
+    """
+    Words of a text as stored in the index. Words with umlauts are stored
+    in both German spellings (München -> munchen and muenchen) so either
+    matches a query.
+    """
+    if not text:
+        return []
+    lowered = text.lower().replace("ß", "ss")
+    terms = TOKEN_RE.findall(strip_accents(lowered))
+    if any(umlaut in lowered for umlaut in UMLAUTS):
+        expanded = lowered
+        for umlaut, replacement in UMLAUTS.items():
+            expanded = expanded.replace(umlaut, replacement)
+        terms.extend(term for term in TOKEN_RE.findall(strip_accents(expanded)) if term not in terms)
+    return terms
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def allowed_edits(token: str) -> int:
+    for length, edits in FUZZY_MAX_EDITS:
+        if len(token) >= length:
+            return edits
+    return 0
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein distance counting an adjacent transposition as one edit
+    (Dusseldrof -> Dusseldorf). Returns limit + 1 once it exceeds limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class InvertedIndex:
+    """
+    Term -> {place_id: weighted term frequency} postings with a sorted
+    vocabulary for prefix lookups. Results are ranked by summed
+    tf-idf over the weighted fields.
+
+    For fuzzy queries a trigram -> terms index over the vocabulary finds
+    the terms within a few edits of a misspelled word, whose postings are
+    then used like those of an exact match.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._vocabulary: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        # place_id -> (city_id, city, category)
+        self._filters: Dict[int, Tuple[Optional[int], Optional[str], Optional[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def build(self, places) -> None:
+        self._postings = {}
+        self._vocabulary = []
+        self._trigrams = defaultdict(set)
+        self._doc_terms = {}
+        self._filters = {}
+        for place in places:
+            self._index(place)
+        # Sorted once; insort per new term would make the build quadratic
+        self._vocabulary = sorted(self._postings)
+        self.ready = True
+
+    def add(self, place: Place) -> None:
+        for term in self._index(place):
+            bisect.insort(self._vocabulary, term)
+
+    def _index(self, place: Place) -> List[str]:
+        """Record a place's postings and trigrams; returns the terms new to the index"""
+        new_terms = []
+        weights: Dict[str, float] = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in index_terms(getattr(place, field)):
+                weights[term] += weight
+
+        self._doc_terms[place.id] = dict(weights)
+        self._filters[place.id] = (place.city_id, place.city, place.category)
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                new_terms.append(term)
+                for gram in trigrams(term):
+                    self._trigrams[gram].add(term)
+            postings[place.id] = weight
+        return new_terms
+
+    def discard(self, place_id: int) -> None:
+        terms = self._doc_terms.pop(place_id, None)
+        if terms is None:
+            return
+        self._filters.pop(place_id, None)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(place_id, None)
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+                for gram in trigrams(term):
+                    terms_with_gram = self._trigrams[gram]
+                    terms_with_gram.discard(term)
+                    if not terms_with_gram:
+                        del self._trigrams[gram]
+
+    def expand(self, token: str) -> Iterable[Tuple[str, float]]:
+        """Index terms matching a query token: the word itself and, for longer tokens, words it prefixes"""
+        if token in self._postings:
+            yield token, 1.0
+        if len(token) < MIN_PREFIX_LENGTH:
+            return
+        vocabulary = self._vocabulary
+        # By index, without copying the tail of the vocabulary
+        for position in range(bisect.bisect_right(vocabulary, token), len(vocabulary)):
+            term = vocabulary[position]
+            if not term.startswith(token):
+                break
+            yield term, PREFIX_MATCH_WEIGHT
+
+    def fuzzy_expand(self, token: str) -> Iterable[Tuple[str, float]]:
+        """Exact and prefix matches plus index terms within a few edits of the token"""
+        matched = dict(self.expand(token))
+        yield from matched.items()
+
+        edits = allowed_edits(token)
+        if not edits:
+            return
+        grams = trigrams(token)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for term in self._trigrams.get(gram, ()):
+                shared[term] += 1
+
+        # An edit changes at most 3 trigrams, a transposition 4
+        required = len(grams) - 4 * edits
+        for term, count in shared.items():
+            if count < required or term in matched:
+                continue
+            distance = edit_distance(token, term, edits)
+            if distance <= edits:
+                yield term, FUZZY_MATCH_WEIGHT ** distance
+
+    def search(
+        self,
+        query: str,
+        city: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: int = 100,
+        fuzzy: bool = False,
+        city_id: Optional[int] = None
+    ) -> List[int]:
+        """Ids of places matching every query word, best first"""
+        scored = self.scored(query, city=city, category=category, fuzzy=fuzzy, city_id=city_id)
+        return [place_id for place_id, _ in scored[:limit]]
+
+    def scored(
+        self,
+        query: str,
+        city: Optional[str] = None,
+        category: Optional[str] = None,
+        fuzzy: bool = False,
+        city_id: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        (place_id, score) of every matching place, best first. A resolved
+        city_id filters by city id and takes precedence over the city string.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        total = max(len(self._doc_terms), 1)
+        expand = self.fuzzy_expand if fuzzy else self.expand
+        scores: Optional[Dict[int, float]] = None
+        for token in tokens:
+            token_scores: Dict[int, float] = defaultdict(float)
+            for term, match_weight in expand(token):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for place_id, weight in postings.items():
+                    token_scores[place_id] += match_weight * weight * idf
+
+            # Every query word has to match
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {place_id: score + token_scores[place_id] for place_id, score in scores.items() if place_id in token_scores}
+            if not scores:
+                return []
+
+        ranked = []
+        for place_id, score in scores.items():
+            place_city_id, place_city, place_category = self._filters[place_id]
+            if city_id is not None:
+                if place_city_id != city_id:
+                    continue
+            elif city is not None and place_city != city:
+                continue
+            if category is not None and place_category != category:
+                continue
+            ranked.append((place_id, score))
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+
+text_index = register_index(InvertedIndex())
@@ -0,0 +1,183 @@
+"""
+Pre-rendered z/x/y map tiles of active places, cached on local disk
+"""
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from core.config import config
+from models.place import Place
+from services.clusters import ClusterIndex, mercator, place_clusters
+from services.indexes import register_index
+
+MAX_TILE_ZOOM = 22
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(min_lng, min_lat, max_lng, max_lat) of an XYZ tile"""
+    n = 1 << z
+
+    def lat(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def tile_of(latitude: float, longitude: float, z: int) -> Tuple[int, int]:
+    n = 1 << z
+    x, y = mercator(latitude, longitude)
+    return int(x * n), int(y * n)
+
+
+class TileCache:
+    """
+    Renders tiles on first request and keeps them as files for up to `ttl`
+    seconds. Tiles at or above detail_zoom list individual places; lower
+    zooms carry the clusters of this process's index. Each process keeps
+    its own tiles under worker-<pid>/, since writes made through other
+    workers reach neither its indexes nor its invalidations; the TTL bounds
+    how long such writes go unseen. A place write deletes exactly the
+    tiles of this process that contain the place's old and new position,
+    at every zoom.
+    """
+
+    def __init__(self, directory: str, ttl: int, detail_zoom: int = 13):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.detail_zoom = detail_zoom
+        self._positions: Dict[int, Tuple[float, float]] = {}
+        # Bumped on every invalidation, so a tile stored while a write landed is dropped
+        self._generation = 0
+
+    @property
+    def root(self) -> Path:
+        return self.directory / f"worker-{os.getpid()}"
+
+    def path(self, z: int, x: int, y: int) -> Path:
+        return self.root / str(z) / str(x) / f"{y}.json"
+
+    def build(self, places) -> None:
+        # Writes made while the app was down are unknown; start from empty
+        self._remove_stale_roots()
+        self._positions = {
+            place.id: (place.latitude, place.longitude)
+            for place in places
+            if place.latitude is not None and place.longitude is not None
+        }
+        self._generation += 1
+
+    def _remove_stale_roots(self) -> None:
+        """Drop this process's tiles and those of processes that have exited"""
+        if not self.directory.is_dir():
+            return
+        for root in self.directory.glob("worker-*"):
+            pid = root.name[len("worker-"):]
+            if root == self.root or (pid.isdigit() and not _process_alive(int(pid))):
+                shutil.rmtree(root, ignore_errors=True)
+
+    def add(self, place: Place) -> None:
+        if place.latitude is None or place.longitude is None:
+            return
+        self._positions[place.id] = (place.latitude, place.longitude)
+        self._invalidate(place.latitude, place.longitude)
+
+    def discard(self, place_id: int) -> None:
+        position = self._positions.pop(place_id, None)
+        if position is not None:
+            self._invalidate(*position)
+
+    def _invalidate(self, latitude: float, longitude: float) -> None:
+        self._generation += 1
+        for z in range(MAX_TILE_ZOOM + 1):
+            x, y = tile_of(latitude, longitude, z)
+            try:
+                self.path(z, x, y).unlink()
+            except FileNotFoundError:
+                pass
+
+    async def get(self, db: Session, z: int, x: int, y: int) -> bytes:
+        """JSON of the tile, rendered and stored first on a cache miss; file I/O runs in the thread pool"""
+        path = self.path(z, x, y)
+        body = await run_in_threadpool(self._read, path)
+        if body is not None:
+            return body
+
+        generation = self._generation
+        body = json.dumps(self.render(db, z, x, y), separators=(",", ":")).encode()
+        await run_in_threadpool(self._write, path, body)
+        if generation != self._generation:
+            # A place write landed while the tile was being stored and may not be in it
+            await run_in_threadpool(path.unlink, True)
+        return body
+
+    def _read(self, path: Path) -> Optional[bytes]:
+        """The stored tile, None when missing or older than the TTL"""
+        try:
+            if time.time() - path.stat().st_mtime < self.ttl:
+                # Read rather than handing out the path: a write may unlink it any time
+                return path.read_bytes()
+        except FileNotFoundError:
+            pass
+        return None
+
+    def _write(self, path: Path, body: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+
+    def render(self, db: Session, z: int, x: int, y: int) -> dict:
+        min_lng, min_lat, max_lng, max_lat = tile_bounds(z, x, y)
+
+        if z < self.detail_zoom:
+            index = place_clusters
+            if not index.ready or not index.min_zoom <= z <= index.max_zoom:
+                rows = _places_in_bounds(db, min_lng, min_lat, max_lng, max_lat)
+                index = ClusterIndex(min_zoom=z, max_zoom=z)
+                index.build(rows)
+            clusters = index.tile(z, x, y)
+            return {
+                "z": z, "x": x, "y": y,
+                "clusters": [
+                    [round(c["latitude"], 6), round(c["longitude"], 6), c["count"], c["top_category"], c["place_id"]]
+                    for c in clusters
+                ],
+            }
+
+        rows = _places_in_bounds(db, min_lng, min_lat, max_lng, max_lat)
+        return {
+            "z": z, "x": x, "y": y,
+            "places": [
+                [row.id, row.latitude, row.longitude, row.category, row.name]
+                for row in rows
+                # Tiles are half-open so a place on an edge belongs to one tile
+                if tile_of(row.latitude, row.longitude, z) == (x, y)
+            ],
+        }
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _places_in_bounds(db: Session, min_lng: float, min_lat: float, max_lng: float, max_lat: float):
+    return db.query(Place.id, Place.latitude, Place.longitude, Place.category, Place.name).filter(
+        Place.is_active == True,
+        Place.latitude.between(min_lat, max_lat),
+        Place.longitude.between(min_lng, max_lng)
+    ).all()
+
+
+tile_cache = register_index(TileCache(config.TILE_CACHE_DIR, config.TILE_CACHE_TTL))
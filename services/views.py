@@ -0,0 +1,32 @@
+"""
+Named projections of place responses (view=full or view=card)
+"""
+from typing import List, Literal, Sequence
+from sqlalchemy.orm import load_only
+from models.place import Place
+from schemas.place import Place as PlaceSchema, PlaceCard
+
+PlaceView = Literal["full", "card"]
+
+# Columns of the card projection, kept in step with its schema
+CARD_COLUMNS = tuple(getattr(Place, field) for field in PlaceCard.model_fields)
+
+VIEW_SCHEMAS = {"full": PlaceSchema, "card": PlaceCard}
+
+
+def place_load_options(view: PlaceView) -> list:
+    """Loader options selecting only the columns the view serializes"""
+    if view == "card":
+        # is_active too: the index-backed nearby and search paths check it on the loaded rows
+        return [load_only(*CARD_COLUMNS, Place.is_active)]
+    return []
+
+
+def project_places(places: Sequence[Place], view: PlaceView) -> List:
+    """
+    Places as the view's schema. Card models are built here so response
+    validation never touches (and lazy-loads) the columns left out.
+    """
+    if view == "card":
+        return [PlaceCard.model_validate(place) for place in places]
+    return list(places)
@@ -0,0 +1,114 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core.deps import get_current_active_user
+from db.session import Base, get_db
+from main import app
+from models.place import Place
+from models.user import User
+from services.cities import CityDirectory, assign_city, city_directory
+from services.indexes import build_indexes
+from services.presence import PresenceRegistry, presence
+from services.response_cache import response_cache
+from services.tiles import tile_cache
+
+
+@pytest.fixture(autouse=True)
+def tile_directory(tmp_path, monkeypatch):
+    """Keep rendered tiles out of the working tree"""
+    monkeypatch.setattr(tile_cache, "directory", tmp_path / "tiles")
+    return tmp_path / "tiles"
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch):
+    """Tests write to the database behind the routes' back; enable the cache where it is under test"""
+    monkeypatch.setattr(response_cache, "backend", None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_city_directory(monkeypatch):
+    """Don't leak city ids from one test database into the next"""
+    for name, value in vars(CityDirectory()).items():
+        monkeypatch.setattr(city_directory, name, value)
+
+
+@pytest.fixture(autouse=True)
+def fresh_presence(monkeypatch):
+    """Start every test with an unloaded presence registry"""
+    for name, value in vars(PresenceRegistry()).items():
+        monkeypatch.setattr(presence, name, value)
+
+
+@pytest.fixture
+def db():
+    """Fresh in-memory database per test"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="tester@example.com", username="tester", hashed_password="x", is_active=True)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def make_place(db):
+    """Factory adding an active place with sensible defaults, linked to its city like the write routes do"""
+    def _make_place(**fields):
+        data = {
+            "name": "Test Place",
+            "address": "Teststraße 1",
+            "city": "Berlin",
+            "latitude": 52.52,
+            "longitude": 13.405,
+            "category": "cafe",
+            "is_active": True,
+        }
+        data.update(fields)
+        place = Place(**data)
+        db.add(place)
+        assign_city(db, place)
+        db.commit()
+        db.refresh(place)
+        return place
+    return _make_place
+
+
+@pytest.fixture
+def client(db, user):
+    """API client bound to the test database and authenticated as `user`"""
+    def override_get_db():
+        yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    city_directory.load(db)
+    build_indexes(db)
+    presence.load(db)
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
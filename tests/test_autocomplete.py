@@ -0,0 +1,96 @@
+"""
+Tests for the typeahead completion index behind /places/autocomplete
+"""
+from services.autocomplete import CompletionIndex, completion_keys, place_completions
+from services.indexes import build_indexes
+from services.location import get_completions
+
+
+def texts(completions):
+    return [completion["text"] for completion in completions]
+
+
+def test_completion_keys():
+    assert completion_keys("Café Einstein", words=True) == ["cafe einstein", "einstein"]
+    assert completion_keys("München") == ["munchen", "muenchen"]
+    assert completion_keys(None) == []
+
+
+def test_ranked_by_popularity(make_place):
+    quiet = make_place(name="Berliner Kaffeerösterei", city="Potsdam", user_ratings_total=3)
+    popular = make_place(name="Bergmann Café", city="Potsdam", user_ratings_total=900)
+    make_place(name="Bar Nord", city="Berlin")
+    make_place(name="Bar Süd", city="Berlin")
+    index = CompletionIndex()
+    index.build([quiet, popular])
+
+    assert texts(index.complete("ber")) == ["Bergmann Café", "Berliner Kaffeerösterei"]
+    assert index.complete("ber")[0]["place_id"] == popular.id
+    assert index.complete("pots") == [{"text": "Potsdam", "kind": "city", "place_id": None, "score": 2}]
+    assert texts(index.complete("kaffee")) == ["Berliner Kaffeerösterei"]
+    assert texts(index.complete("roest")) == []
+    assert index.complete("   ") == []
+
+
+def test_incremental_updates_refresh_cached_prefixes(make_place):
+    first = make_place(name="Hafenbar", city="Hamburg", postal_code="20095")
+    second = make_place(name="Hafencafé", city="Hamburg", postal_code="20095", user_ratings_total=5)
+    index = CompletionIndex()
+    index.build([first, second])
+
+    assert texts(index.complete("ha", limit=3)) == ["Hafencafé", "Hamburg", "Hafenbar"]
+    assert index.complete("200")[0]["score"] == 2
+
+    index.discard(second.id)
+    assert texts(index.complete("ha", limit=3)) == ["Hamburg", "Hafenbar"]
+    assert index.complete("200")[0]["score"] == 1
+
+    index.discard(first.id)
+    first.name = "Hafenkneipe"
+    first.city = "Kiel"
+    index.add(first)
+    assert texts(index.complete("ha")) == ["Hafenkneipe"]
+    assert texts(index.complete("ki")) == ["Kiel"]
+
+
+def test_batched_writes_match_a_build(make_place):
+    places = [make_place(name=f"Kiosk {n}", city="Kiel", user_ratings_total=n) for n in range(6)]
+    built = CompletionIndex()
+    built.build(places)
+    index = CompletionIndex()
+    index.build(places[:2])
+
+    for place in places[2:]:
+        index.add(place)
+    index.discard(places[0].id)
+    index.add(places[0])
+    assert index.complete("ki", limit=10) == built.complete("ki", limit=10)
+    assert index._keys == built._keys
+    assert index._scores.tolist() == built._scores.tolist()
+
+
+def test_fallback_escapes_like_wildcards(db, make_place):
+    make_place(name="Alte Bar", city="Kiel")
+    place_completions.ready = False
+    assert texts(get_completions(db, "a")) == ["Alte Bar"]
+    assert get_completions(db, "a_") == []
+    assert get_completions(db, "%") == []
+
+
+def test_autocomplete_endpoint(client, db, make_place):
+    make_place(name="Kaffeehaus Müller", city="Düsseldorf", user_ratings_total=40)
+    build_indexes(db)
+
+    response = client.get("/api/v1/places/autocomplete", params={"prefix": "muel"})
+    assert response.status_code == 200
+    assert texts(response.json()) == ["Kaffeehaus Müller"]
+
+    client.post("/api/v1/places/", json={
+        "name": "Düsseldorfer Brauhaus", "address": "Altstadt 1", "city": "Düsseldorf",
+        "latitude": 51.22, "longitude": 6.77, "category": "bar",
+    })
+    completions = client.get("/api/v1/places/autocomplete", params={"prefix": "duess"}).json()
+    assert completions[0] == {"text": "Düsseldorf", "kind": "city", "place_id": None, "score": 2}
+    assert texts(completions) == ["Düsseldorf", "Düsseldorfer Brauhaus"]
+
+    assert client.get("/api/v1/places/autocomplete", params={"prefix": ""}).status_code == 422
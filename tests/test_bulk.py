@@ -0,0 +1,113 @@
+"""
+Tests for POST and PATCH /places/bulk
+"""
+from sqlalchemy import event
+
+from core.config import config
+from models.place import Place
+from schemas.place import PlaceCreate
+from services.bulk import bulk_create
+from services.cities import city_directory
+from services.text_index import text_index
+
+
+def _place(name, city="Berlin", **fields):
+    return {
+        "name": name, "address": "Weg 1", "city": city,
+        "latitude": 52.52, "longitude": 13.405, "category": "cafe", **fields,
+    }
+
+
+def _statements(db):
+    statements = []
+
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()[:3]).upper())
+
+    return statements
+
+
+def test_bulk_create_inserts_in_one_statement(client, db):
+    statements = _statements(db)
+    batch = [_place(f"Café {i}", city="München" if i % 2 else "Berlin") for i in range(5)]
+    response = client.post("/api/v1/places/bulk", json=batch)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 5
+    assert [item["index"] for item in body["items"]] == list(range(5))
+    assert statements.count("INSERT INTO PLACES") == 1
+    ids = [item["id"] for item in body["items"]]
+    places = {place.id: place for place in db.query(Place).filter(Place.id.in_(ids))}
+    assert [places[place_id].name for place_id in ids] == [item["name"] for item in batch]
+    assert places[ids[1]].city_id == city_directory.resolve("Muenchen")
+
+    # Indexes are synced, so the new places are searchable
+    assert set(text_index.search("café", limit=10)) == set(ids)
+
+
+def test_bulk_update_reports_missing_places(client, db, make_place):
+    first, second = make_place(name="Alt"), make_place(name="Auch alt")
+    response = client.patch("/api/v1/places/bulk", json=[
+        {"id": first.id, "name": "Neu"},
+        {"id": 999, "name": "Niemand"},
+        {"id": second.id, "city": "Köln", "rating": 4.5},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["updated"] == 2
+    assert [(item["index"], item["status"]) for item in body["items"]] == [
+        (0, "updated"), (1, "not_found"), (2, "updated"),
+    ]
+    db.expire_all()
+    assert first.name == "Neu"
+    assert first.city == "Berlin"  # untouched fields stay
+    assert (second.city, second.rating) == ("Köln", 4.5)
+    assert second.city_id == city_directory.resolve("Koeln")
+    assert [place["id"] for place in client.get("/api/v1/places/", params={"city": "Köln"}).json()] == [second.id]
+
+
+def test_bulk_update_deactivates(client, db, make_place):
+    place = make_place(name="Zu")
+    client.patch("/api/v1/places/bulk", json=[{"id": place.id, "is_active": False}])
+    assert client.get("/api/v1/places/").json() == []
+
+
+def test_batch_limits(client, monkeypatch):
+    monkeypatch.setattr(config, "BULK_MAX_ITEMS", 2)
+    assert client.post("/api/v1/places/bulk", json=[_place(str(i)) for i in range(3)]).status_code == 413
+    # One invalid item rejects the whole batch before anything is written
+    assert client.post("/api/v1/places/bulk", json=[_place("ok"), {"name": "no address"}]).status_code == 422
+    assert client.get("/api/v1/places/").json() == []
+
+
+def test_bulk_update_is_one_executemany(client, db, make_place):
+    places = [make_place(name=f"Place {i}") for i in range(4)]
+    db.execute(Place.__table__.update().values(updated_at=None))
+    db.commit()
+    statements = _statements(db)
+    client.patch("/api/v1/places/bulk", json=[{"id": place.id, "rating": 4.0} for place in places])
+    assert statements.count("UPDATE PLACES SET") == 1
+    db.expire_all()
+    assert all(place.updated_at is not None and place.rating == 4.0 for place in places)
+
+
+def test_bulk_create_ids_follow_items_on_other_databases(db, monkeypatch):
+    # Elsewhere the ids come back through sort_by_parameter_order
+    monkeypatch.setattr(db.get_bind().dialect, "name", "postgresql")
+    items = [PlaceCreate(**_place(f"Café {i}")) for i in range(3)]
+    ids = bulk_create(db, items)
+    monkeypatch.undo()
+    names = dict(db.query(Place.id, Place.name).filter(Place.id.in_(ids)).all())
+    assert [names[place_id] for place_id in ids] == ["Café 0", "Café 1", "Café 2"]
+
+
+def test_bulk_update_rejects_null_required_fields(client, make_place):
+    place = make_place(name="Bleibt")
+    response = client.patch("/api/v1/places/bulk", json=[{"id": place.id, "name": None}])
+    assert response.status_code == 422
+    # Nulls are fine where a place may lack the value
+    assert client.patch("/api/v1/places/bulk", json=[{"id": place.id, "rating": None}]).status_code == 200
+    assert [item["name"] for item in client.get("/api/v1/places/").json()] == ["Bleibt"]
@@ -0,0 +1,95 @@
+"""
+Query-plan tests: the hot check-in queries are served by the indexes of
+the migrated schema, not by table scans or sorts
+"""
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, event, inspect
+
+from services.presence import presence
+from tests.test_migrations import alembic_config
+
+NEW_INDEXES = {"ix_checkins_user_status", "ix_checkins_place_status", "ix_checkins_time_id"}
+
+
+@pytest.fixture
+def migrated(tmp_path):
+    """Engine of an empty database upgraded to the head revision"""
+    url = f"sqlite:///{tmp_path / 'plans.db'}"
+    command.upgrade(alembic_config(url), "head")
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+def _checkin_selects(db, request):
+    """(statement, parameters) of the SELECTs on checkins that `request()` runs"""
+    captured = []
+
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM checkins" in statement:
+            captured.append((statement, parameters))
+
+    request()
+    event.remove(db.get_bind(), "before_cursor_execute", capture)
+    assert captured
+    return captured
+
+
+def _plan(engine, statement, parameters) -> str:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+def _assert_indexed(engine, statements, index):
+    for statement, parameters in statements:
+        plan = _plan(engine, statement, parameters)
+        assert index in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+        scans = [step for step in plan.split(" | ") if step.startswith("SCAN") and "INDEX" not in step]
+        assert not scans, plan
+
+
+def test_create_checkin_guard_uses_user_status_index(client, db, make_place, migrated):
+    place = make_place()
+    statements = _checkin_selects(db, lambda: client.post("/api/v1/checkins/", json={"place_id": place.id}))
+    guard = [(statement, parameters) for statement, parameters in statements if "WHERE checkins.user_id" in statement]
+    assert len(guard) == 1
+    _assert_indexed(migrated, guard, "ix_checkins_user_status")
+
+
+def test_active_at_place_uses_place_status_index(client, db, make_place, migrated):
+    place = make_place()
+    presence.ready = False  # The database paths are the ones before the registry is loaded
+    _assert_indexed(migrated, _checkin_selects(
+        db, lambda: client.get(f"/api/v1/checkins/place/{place.id}/active")
+    ), "ix_checkins_place_status")
+    _assert_indexed(migrated, _checkin_selects(
+        db, lambda: client.get("/api/v1/checkins/occupancy", params={"place_ids": f"{place.id},{place.id + 1}"})
+    ), "ix_checkins_place_status")
+
+
+def test_listings_are_sorted_by_index(client, db, migrated):
+    for path, params, index in (
+        ("/api/v1/checkins/", {}, "ix_checkins_status_time_id"),
+        ("/api/v1/checkins/", {"active_only": "false"}, "ix_checkins_time_id"),
+        ("/api/v1/checkins/my", {}, "ix_checkins_user_time_id"),
+    ):
+        statements = _checkin_selects(db, lambda: client.get(path, params=params))
+        _assert_indexed(migrated, statements, index)
+
+
+def test_migration_adds_and_drops_lookup_indexes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'indexes.db'}"
+    cfg = alembic_config(url)
+    command.upgrade(cfg, "0006")
+    engine = create_engine(url)
+    assert NEW_INDEXES <= {index["name"] for index in inspect(engine).get_indexes("checkins")}
+
+    command.downgrade(cfg, "0005")
+    indexes = {index["name"] for index in inspect(engine).get_indexes("checkins")}
+    assert not NEW_INDEXES & indexes
+    assert "ix_checkins_status_time_id" in indexes
+    engine.dispose()
@@ -0,0 +1,119 @@
+"""
+Tests for live check-in events (/checkins/stream)
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from core.metrics import metrics
+from services.checkin_events import CheckinBroker, checkin_broker, sse_events
+from services.cities import city_directory
+from services.indexes import build_indexes
+
+AT = datetime(2026, 5, 1, 12, 0)
+
+
+@pytest.fixture
+def places(db, make_place):
+    berlin = make_place(city="Berlin", latitude=52.52, longitude=13.405)
+    munich = make_place(city="München", latitude=48.14, longitude=11.58)
+    city_directory.load(db)
+    build_indexes(db)
+    return berlin, munich
+
+
+def test_events_reach_place_city_and_bbox_subscribers(places):
+    berlin, munich = places
+
+    async def scenario():
+        broker = CheckinBroker()
+        by_place = broker.subscribe(place_id=berlin.id)
+        by_city = broker.subscribe(city="Muenchen")
+        by_bbox = broker.subscribe(bbox=(13.0, 52.0, 14.0, 53.0))
+        assert len(broker) == 3
+
+        assert broker.publish("checkin", 1, berlin.id, 7, AT) == 2
+        assert broker.publish("checkout", 2, munich.id, 8, AT) == 1
+
+        assert [event["checkin_id"] for event in (by_place.queue.get_nowait(), by_bbox.queue.get_nowait())] == [1, 1]
+        event = by_city.queue.get_nowait()
+        assert event == {
+            "type": "checkout", "checkin_id": 2, "place_id": munich.id, "user_id": 8,
+            "city": "München", "at": "2026-05-01T12:00:00",
+        }
+
+        for subscription in (by_place, by_city, by_bbox):
+            broker.unsubscribe(subscription)
+        assert len(broker) == 0
+        assert broker.publish("checkin", 3, berlin.id, 7, AT) == 0
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscribers_drop_oldest_events(places):
+    berlin, _ = places
+
+    async def scenario():
+        broker = CheckinBroker(queue_size=2)
+        subscription = broker.subscribe(place_id=berlin.id)
+        for checkin_id in range(3):
+            broker.publish("checkin", checkin_id, berlin.id, 7, AT)
+        return [subscription.queue.get_nowait()["checkin_id"] for _ in range(2)]
+
+    metrics.reset()
+    assert asyncio.run(scenario()) == [1, 2]
+    assert metrics.get("checkin_stream.dropped") == 1
+
+
+def test_sse_stream_format_and_cleanup(places, monkeypatch):
+    berlin, _ = places
+
+    async def scenario():
+        broker = CheckinBroker()
+        monkeypatch.setattr("services.checkin_events.checkin_broker", broker)
+        stream = sse_events(0.01, place_id=berlin.id)
+        chunks = [await stream.__anext__(), await stream.__anext__()]
+        broker.publish("checkin", 5, berlin.id, 7, AT)
+        chunks.append(await stream.__anext__())
+        await stream.aclose()
+        return chunks, len(broker)
+
+    chunks, remaining = asyncio.run(scenario())
+    assert chunks[:2] == [": connected\n\n", ": keepalive\n\n"]
+    assert chunks[2].startswith("event: checkin\nid: 5\ndata: {")
+    assert chunks[2].endswith("}\n\n")
+    assert remaining == 0
+
+
+def test_stream_never_started_leaves_no_subscription(places, monkeypatch):
+    berlin, _ = places
+    broker = CheckinBroker()
+    monkeypatch.setattr("services.checkin_events.checkin_broker", broker)
+
+    async def scenario():
+        # The client disconnected before the first chunk was sent
+        stream = sse_events(0.01, place_id=berlin.id)
+        await stream.aclose()
+        return len(broker)
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_write_routes_publish(client, db, places, monkeypatch):
+    berlin, _ = places
+    published = []
+    monkeypatch.setattr(checkin_broker, "publish", lambda *args: published.append(args[:3]))
+
+    created = client.post("/api/v1/checkins/", json={"place_id": berlin.id}).json()
+    client.post(f"/api/v1/checkins/{created['id']}/end")
+    client.delete(f"/api/v1/checkins/{created['id']}")  # already ended: no second checkout
+    assert published == [("checkin", created["id"], berlin.id), ("checkout", created["id"], berlin.id)]
+
+
+def test_stream_requires_one_valid_filter(client):
+    assert client.get("/api/v1/checkins/stream").status_code == 400
+    assert client.get("/api/v1/checkins/stream", params={"place_id": 1, "city": "Berlin"}).status_code == 400
+    assert client.get("/api/v1/checkins/stream", params={"bbox": "1,2,3"}).status_code == 400
+    assert client.get("/api/v1/checkins/stream", params={"bbox": "3,2,1,4"}).status_code == 400
+    assert len(checkin_broker) == 0
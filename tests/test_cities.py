@@ -0,0 +1,112 @@
+"""
+Tests for the city alias directory and city filters
+"""
+from alembic import command
+from sqlalchemy import create_engine, inspect, text
+
+from core.cities import CITY_ALTERNATIVES
+from models.city import City, CityAlias
+from services.cities import city_clause, city_directory, city_keys, ensure_city
+from services.indexes import build_indexes
+from tests.test_migrations import alembic_config
+
+
+def test_city_keys():
+    assert city_keys("München") == ["munchen", "muenchen"]
+    assert city_keys("K-Town") == ["k town"]
+    assert city_keys("  ") == []
+
+
+def test_ensure_city_merges_spellings(db):
+    munich = ensure_city(db, "Munich", CITY_ALTERNATIVES["Munich"])
+    assert ensure_city(db, "München").id == munich.id
+    assert ensure_city(db, "Muenchen").id == munich.id
+    assert ensure_city(db, "Berlin").id != munich.id
+    db.commit()
+
+    assert db.query(City).count() == 2
+    assert {alias.key for alias in munich.aliases} == {"munich", "munchen", "muenchen"}
+    assert db.query(CityAlias).filter(CityAlias.key == "berlin").one().city_id != munich.id
+
+
+def test_known_alternatives_are_seeded_without_migrations(db):
+    # The db fixture is built with create_all, so no aliases were backfilled
+    munich = ensure_city(db, "Munich")
+    assert ensure_city(db, "München").id == munich.id
+    assert ensure_city(db, "Muenchen").id == munich.id
+    assert ensure_city(db, "Köln").id == ensure_city(db, "Cologne").id != munich.id
+
+
+def test_city_clause_falls_back_to_strings(db):
+    assert str(city_clause("Munich").compile()) == "places.city = :city_1"
+    ensure_city(db, "Munich", ["München"])
+    db.commit()
+    city_directory.load(db)
+    assert str(city_clause("MÜNCHEN").compile()) == "places.city_id = :city_id_1"
+
+
+def test_filters_match_any_spelling(client, db):
+    ensure_city(db, "Munich", CITY_ALTERNATIVES["Munich"])
+    db.commit()
+    city_directory.load(db)
+    created = client.post("/api/v1/places/", json={
+        "name": "Kaffeehaus am Markt", "address": "Marienplatz 1", "city": "Munich",
+        "latitude": 48.137, "longitude": 11.575, "category": "cafe",
+    }).json()
+
+    for city in ("München", "Muenchen", "munich"):
+        listed = client.get("/api/v1/places/", params={"city": city}).json()
+        assert [place["id"] for place in listed] == [created["id"]]
+        found = client.get("/api/v1/places/search/text", params={"q": "kaffeehaus", "city": city}).json()
+        assert [place["id"] for place in found] == [created["id"]]
+
+    build_indexes(db)
+    found = client.get("/api/v1/places/search/text", params={"q": "kaffeehaus", "city": "München"}).json()
+    assert [place["id"] for place in found] == [created["id"]]
+    assert client.get("/api/v1/places/", params={"city": "Berlin"}).json() == []
+
+
+def test_update_moves_place_to_new_city(client, db):
+    created = client.post("/api/v1/places/", json={
+        "name": "Wanderbar", "address": "Weg 1", "city": "Köln",
+        "latitude": 50.94, "longitude": 6.96, "category": "bar",
+    }).json()
+    client.put(f"/api/v1/places/{created['id']}", json={"city": "Koeln"})
+    assert [place["id"] for place in client.get("/api/v1/places/", params={"city": "Köln"}).json()] == [created["id"]]
+
+    client.put(f"/api/v1/places/{created['id']}", json={"city": "Bonn"})
+    assert client.get("/api/v1/places/", params={"city": "Köln"}).json() == []
+    assert len(client.get("/api/v1/places/", params={"city": "bonn"}).json()) == 1
+
+
+def test_migration_backfills_city_ids(tmp_path):
+    url = f"sqlite:///{tmp_path / 'cities.db'}"
+    cfg = alembic_config(url)
+    command.upgrade(cfg, "0003")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO places (name, city, is_active) VALUES ('Biergarten', 'München', 1), ('Späti', 'Berlin', 1)"
+        ))
+
+    command.upgrade(cfg, "head")
+    with engine.connect() as connection:
+        rows = dict(connection.execute(text(
+            "SELECT places.city, cities.name FROM places JOIN cities ON cities.id = places.city_id"
+        )).all())
+        triggers = connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars().all()
+    assert rows == {"München": "Munich", "Berlin": "Berlin"}
+    # Adding the column must not rebuild places and lose the full-text triggers
+    assert {"places_fts_ai", "places_fts_ad", "places_fts_au"} <= set(triggers)
+    assert "ix_places_city_id" in {index["name"] for index in inspect(engine).get_indexes("places")}
+    foreign_keys = inspect(engine).get_foreign_keys("places")
+    assert [(key["constrained_columns"], key["referred_table"]) for key in foreign_keys] == [(["city_id"], "cities")]
+
+    # The rebuild that adds the foreign key keeps places searchable
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO places (name, city, is_active) VALUES ('Weinstube', 'Mainz', 1)"))
+        found = connection.execute(text("SELECT rowid FROM places_fts WHERE places_fts MATCH 'weinstube'")).all()
+    assert len(found) == 1
+    command.downgrade(cfg, "0003")
+    assert "city_id" not in {column["name"] for column in inspect(engine).get_columns("places")}
+    engine.dispose()
@@ -0,0 +1,68 @@
+"""
+Tests for the cached city list behind /places/cities/all
+"""
+from services.cities import CityCatalog, city_catalog
+from services.indexes import build_indexes
+
+
+def test_snapshot_changes_only_with_the_set_of_cities(make_place):
+    first = make_place(city="Berlin")
+    second = make_place(city="Berlin")
+    catalog = CityCatalog()
+    catalog.build([first, second])
+    cities, etag = catalog.snapshot()
+    assert cities == ["Berlin"]
+
+    catalog.discard(first.id)
+    assert catalog.snapshot() == (cities, etag)
+    assert catalog.snapshot()[0] is cities  # not recomputed
+
+    hamburg = make_place(city="Hamburg")
+    catalog.add(hamburg)
+    assert catalog.snapshot()[0] == ["Berlin", "Hamburg"]
+
+    catalog.discard(hamburg.id)
+    catalog.discard(second.id)
+    assert catalog.snapshot()[0] == []
+
+
+def test_endpoint_etag_and_not_modified(client, db, make_place):
+    make_place(city="Leipzig")
+    make_place(city="Dresden")
+    build_indexes(db)
+
+    response = client.get("/api/v1/places/cities/all")
+    assert response.json() == ["Dresden", "Leipzig"]
+    etag = response.headers["etag"]
+
+    cached = client.get("/api/v1/places/cities/all", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    # Another place in a known city keeps the ETag
+    client.post("/api/v1/places/", json={
+        "name": "Auerbachs Keller", "address": "Mädlerpassage", "city": "Leipzig",
+        "latitude": 51.34, "longitude": 12.37, "category": "restaurant",
+    })
+    assert client.get("/api/v1/places/cities/all", headers={"If-None-Match": etag}).status_code == 304
+
+    created = client.post("/api/v1/places/", json={
+        "name": "Zwinger Café", "address": "Theaterplatz", "city": "Chemnitz",
+        "latitude": 50.83, "longitude": 12.92, "category": "cafe",
+    }).json()
+    changed = client.get("/api/v1/places/cities/all", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json() == ["Chemnitz", "Dresden", "Leipzig"]
+
+    client.delete(f"/api/v1/places/{created['id']}")
+    assert client.get("/api/v1/places/cities/all").headers["etag"] == etag
+
+
+def test_endpoint_without_catalog_uses_same_etag(client, db, make_place, monkeypatch):
+    make_place(city="Leipzig")
+    build_indexes(db)
+    etag = client.get("/api/v1/places/cities/all").headers["etag"]
+
+    monkeypatch.setattr(city_catalog, "ready", False)
+    response = client.get("/api/v1/places/cities/all", headers={"If-None-Match": f'W/{etag}'})
+    assert response.status_code == 304
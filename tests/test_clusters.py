@@ -0,0 +1,88 @@
+"""
+Tests for the per-zoom cluster index behind /places/viewport
+"""
+import pytest
+
+from core.config import config
+from services.clusters import ClusterIndex, place_clusters
+from services.indexes import build_indexes
+
+BERLIN_BBOX = "13.0,52.3,13.8,52.7"
+
+
+def test_clusters_merge_at_low_zoom_and_split_at_high_zoom(make_place):
+    a = make_place(latitude=52.520, longitude=13.400, category="cafe")
+    b = make_place(latitude=52.521, longitude=13.401, category="cafe")
+    c = make_place(latitude=52.515, longitude=13.450, category="bar")
+
+    index = ClusterIndex()
+    index.build([a, b, c])
+
+    low = index.query(13.0, 52.3, 13.8, 52.7, zoom=5)
+    assert len(low) == 1
+    assert low[0]["count"] == 3
+    assert low[0]["top_category"] == "cafe"
+    assert low[0]["place_id"] is None
+
+    high = index.query(13.0, 52.3, 13.8, 52.7, zoom=15)
+    assert sorted(cluster["place_id"] for cluster in high) == sorted([a.id, b.id, c.id])
+
+
+def test_clusters_follow_discard(make_place):
+    a = make_place(latitude=52.520, longitude=13.400)
+    b = make_place(latitude=52.521, longitude=13.401)
+    index = ClusterIndex()
+    index.build([a, b])
+
+    index.discard(a.id)
+    [cluster] = index.query(13.0, 52.3, 13.8, 52.7, zoom=5)
+    assert cluster["count"] == 1
+    assert cluster["place_id"] == b.id
+    assert cluster["latitude"] == pytest.approx(b.latitude)
+
+    index.discard(b.id)
+    assert index.query(13.0, 52.3, 13.8, 52.7, zoom=5) == []
+
+
+def test_viewport_endpoint(client, db, make_place):
+    make_place(latitude=52.520, longitude=13.400)
+    make_place(latitude=48.137, longitude=11.575, city="Munich")
+    build_indexes(db)
+
+    body = client.get("/api/v1/places/viewport", params={"bbox": BERLIN_BBOX, "zoom": 10}).json()
+    assert body["zoom"] == 10
+    assert [cluster["count"] for cluster in body["clusters"]] == [1]
+
+    created = client.post("/api/v1/places/", json={
+        "name": "Neu", "address": "Weg 1", "city": "Berlin",
+        "latitude": 52.521, "longitude": 13.401, "category": "bar",
+    }).json()
+    body = client.get("/api/v1/places/viewport", params={"bbox": BERLIN_BBOX, "zoom": 10}).json()
+    assert [cluster["count"] for cluster in body["clusters"]] == [2]
+
+    client.delete(f"/api/v1/places/{created['id']}")
+    body = client.get("/api/v1/places/viewport", params={"bbox": BERLIN_BBOX, "zoom": 10}).json()
+    assert [cluster["count"] for cluster in body["clusters"]] == [1]
+
+
+def test_viewport_rejects_malformed_bbox(client):
+    assert client.get("/api/v1/places/viewport", params={"bbox": "1,2,3", "zoom": 5}).status_code == 400
+    assert client.get("/api/v1/places/viewport", params={"bbox": "14,52,13,53", "zoom": 5}).status_code == 400
+
+
+def test_large_viewport_is_clustered_at_a_coarser_zoom(client, db, make_place, monkeypatch):
+    for i in range(30):
+        make_place(latitude=47.5 + i * 0.25, longitude=6.0 + i * 0.3)
+    build_indexes(db)
+    # Small viewports keep the requested zoom
+    assert client.get("/api/v1/places/viewport", params={"bbox": BERLIN_BBOX, "zoom": 10}).json()["zoom"] == 10
+
+    monkeypatch.setattr(config, "VIEWPORT_MAX_CELLS", 64)
+    germany = "5.8,47.2,15.1,55.1"
+
+    for ready in (True, False):
+        monkeypatch.setattr(place_clusters, "ready", ready)
+        body = client.get("/api/v1/places/viewport", params={"bbox": germany, "zoom": 15}).json()
+        assert body["zoom"] < 15
+        assert len(body["clusters"]) <= 64
+        assert sum(cluster["count"] for cluster in body["clusters"]) == 30
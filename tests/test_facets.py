@@ -0,0 +1,85 @@
+"""
+Tests for search facet counts
+"""
+from services.facets import FacetIndex, tally
+from services.fulltext import LikeBackend, SqliteFts5Backend
+from services.indexes import build_indexes
+from services.text_index import text_index
+
+
+def counts(facet):
+    return {entry["value"]: entry["count"] for entry in facet}
+
+
+def test_tally_orders_by_count():
+    facets = tally([
+        ("cafe", None, "Berlin", 1),
+        ("bar", None, "Berlin", None),
+        ("cafe", None, "Hamburg", 2),
+    ])
+    assert facets["category"] == [{"value": "cafe", "count": 2}, {"value": "bar", "count": 1}]
+    assert facets["city"][0] == {"value": "Berlin", "count": 2}
+    assert [entry["value"] for entry in facets["price_level"]] == [1, 2, None]
+
+
+def test_index_counters_follow_writes(make_place):
+    cafe = make_place(category="cafe", price_level=1)
+    bar = make_place(category="bar", city="Hamburg")
+    index = FacetIndex()
+    index.build([cafe, bar])
+
+    assert counts(index.counts()["city"]) == {"Berlin": 1, "Hamburg": 1}
+    index.discard(bar.id)
+    assert counts(index.counts()["category"]) == {"cafe": 1}
+    assert counts(index.count_ids([cafe.id, bar.id])["price_level"]) == {1: 1}
+
+
+def test_backends_count_the_same_candidates(db, make_place):
+    make_place(name="Café Eins", category="cafe", price_level=1)
+    make_place(name="Café Zwei", category="cafe", city="Hamburg", price_level=2)
+    make_place(name="Bar Café", category="bar", city="Hamburg")
+    make_place(name="Bar Drei", category="bar")
+
+    for backend in (SqliteFts5Backend(), LikeBackend()):
+        facets = backend.facets(db, "café", None, None)
+        assert counts(facets["category"]) == {"cafe": 2, "bar": 1}
+        assert counts(facets["city"]) == {"Hamburg": 2, "Berlin": 1}
+        assert counts(backend.facets(db, "café", "Hamburg", None)["category"]) == {"cafe": 1, "bar": 1}
+
+
+def test_faceted_endpoint(client, db, make_place):
+    make_place(name="Kaffeebar", category="cafe", city="Köln")
+    make_place(name="Kaffeehaus", category="cafe", city="Koeln", price_level=2)
+    make_place(name="Weinbar", category="bar", city="Berlin")
+    build_indexes(db)
+
+    body = client.get("/api/v1/places/search/faceted", params={"q": "kaffee", "limit": 1}).json()
+    assert len(body["items"]) == 1
+    # Both spellings of Köln are one city
+    assert body["facets"]["city"] == [{"value": "Köln", "count": 2}]
+    assert counts(body["facets"]["price_level"]) == {2: 1, None: 1}
+
+    unfiltered = client.get("/api/v1/places/search/faceted").json()["facets"]
+    assert counts(unfiltered["category"]) == {"cafe": 2, "bar": 1}
+
+    by_city = client.get("/api/v1/places/search/faceted", params={"city": "Koeln"}).json()["facets"]
+    assert counts(by_city["category"]) == {"cafe": 2}
+
+
+def test_faceted_search_scores_candidates_once(client, db, make_place, monkeypatch):
+    make_place(name="Kaffeebar", category="cafe")
+    make_place(name="Kaffeehaus", category="cafe", city="Hamburg")
+    build_indexes(db)
+    calls = []
+    scored = text_index.scored
+    monkeypatch.setattr(text_index, "scored", lambda *args, **kwargs: calls.append(args) or scored(*args, **kwargs))
+
+    body = client.get("/api/v1/places/search/faceted", params={"q": "kaffee", "limit": 1}).json()
+    assert len(calls) == 1
+    assert [item["name"] for item in body["items"]] == ["Kaffeebar"]
+    assert counts(body["facets"]["city"]) == {"Berlin": 1, "Hamburg": 1}
+
+    for backend in (SqliteFts5Backend(), LikeBackend()):
+        places, facets = backend.faceted(db, "kaffee", None, "cafe", 1)
+        assert len(places) == 1
+        assert facets == backend.facets(db, "kaffee", None, "cafe")
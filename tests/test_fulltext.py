@@ -0,0 +1,90 @@
+"""
+Tests for the pluggable text search backends
+"""
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from services.fulltext import (
+    LikeBackend,
+    PostgresTsvectorBackend,
+    SqliteFts5Backend,
+    get_search_backend,
+)
+from services.text_index import text_index
+from tests.test_migrations import alembic_config
+
+
+@pytest.fixture
+def fts():
+    return SqliteFts5Backend()
+
+
+def names(places):
+    return [place.name for place in places]
+
+
+def test_fts5_spellings_and_ranking(db, make_place, fts):
+    in_description = make_place(name="Bücherei", city="München", description="Gemütliches Café")
+    in_name = make_place(name="Café Einstein", description="Wiener Kaffeehaus")
+    make_place(name="Eckkneipe", address="Straße des 17. Juni 1")
+
+    assert names(fts.search(db, "cafe", None, None, 10)) == [in_name.name, in_description.name]
+    for query in ("München", "muenchen", "munch"):
+        assert names(fts.search(db, query, None, None, 10)) == ["Bücherei"]
+    for query in ("strasse", "Straße"):
+        assert names(fts.search(db, query, None, None, 10)) == ["Eckkneipe"]
+    assert fts.search(db, "kaffeehaus berlin", None, None, 10) == [in_name]
+    assert fts.search(db, "cafe", "München", None, 10) == [in_description]
+
+
+def test_fts5_follows_writes_through_triggers(db, make_place, fts):
+    place = make_place(name="Altes Café")
+    hidden = make_place(name="Café Geschlossen", is_active=False)
+
+    place.name = "Neue Bar"
+    db.commit()
+    assert fts.search(db, "cafe", None, None, 10) == []
+    assert fts.search(db, "bar", None, None, 10) == [place]
+
+    db.delete(place)
+    db.delete(hidden)
+    db.commit()
+    assert fts.search(db, "bar", None, None, 10) == []
+
+
+def test_postgres_tsquery():
+    assert PostgresTsvectorBackend().tsquery("Müller Straße 10") == "(muller:*) & (strasse:*) & (10)"
+    assert PostgresTsvectorBackend().tsquery("muenchen") == "(muenchen:* | munchen:*)"
+    assert PostgresTsvectorBackend().tsquery("!!") is None
+
+
+def test_backend_selection(db, monkeypatch):
+    monkeypatch.setattr(text_index, "ready", False)
+    assert isinstance(get_search_backend(db), SqliteFts5Backend)
+    assert isinstance(get_search_backend(db, "memory"), LikeBackend)
+    assert isinstance(get_search_backend(db, "like"), LikeBackend)
+
+    monkeypatch.setattr(text_index, "ready", True)
+    assert get_search_backend(db).name == "memory"
+    assert isinstance(get_search_backend(db, "native"), SqliteFts5Backend)
+    with pytest.raises(ValueError):
+        get_search_backend(db, "elastic")
+
+
+def test_migration_indexes_existing_rows(tmp_path, fts):
+    url = f"sqlite:///{tmp_path / 'search.db'}"
+    cfg = alembic_config(url)
+    command.upgrade(cfg, "0002")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO places (name, city, is_active) VALUES ('Kaffeerösterei', 'Köln', 1)"
+        ))
+
+    command.upgrade(cfg, "head")
+    db = sessionmaker(bind=engine)()
+    assert names(fts.search(db, "koeln", None, None, 10)) == ["Kaffeerösterei"]
+    db.close()
+    engine.dispose()
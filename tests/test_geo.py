@@ -0,0 +1,43 @@
+"""
+Tests for the vectorized distance kernel
+"""
+import random
+
+import numpy as np
+
+from services.geo import bounding_box, haversine_km, nearest_within
+from services.location import calculate_distance
+
+
+def test_haversine_matches_scalar_distance():
+    rng = random.Random(1)
+    lats = np.array([rng.uniform(-80, 80) for _ in range(2000)])
+    lngs = np.array([rng.uniform(-180, 180) for _ in range(2000)])
+
+    vectorized = haversine_km(50.11, 8.68, lats, lngs)
+    scalar = [calculate_distance(50.11, 8.68, lat, lng) for lat, lng in zip(lats, lngs)]
+
+    np.testing.assert_allclose(vectorized, scalar, rtol=1e-9, atol=1e-6)
+
+
+def test_nearest_within_applies_radius_and_limit():
+    lats = np.array([50.0, 50.01, 50.2, 50.05, 51.0])
+    lngs = np.array([8.0, 8.0, 8.0, 8.0, 8.0])
+
+    positions, distances = nearest_within(50.0, 8.0, lats, lngs, radius_km=30, limit=3)
+
+    assert positions.tolist() == [0, 1, 3]
+    assert np.all(np.diff(distances) >= 0)
+    assert distances[0] == 0
+
+
+def test_nearest_within_empty_inputs():
+    positions, distances = nearest_within(50.0, 8.0, np.array([]), np.array([]), radius_km=5, limit=10)
+    assert positions.size == 0 and distances.size == 0
+
+
+def test_bounding_box_contains_radius():
+    min_lat, max_lat, min_lng, max_lng = bounding_box(52.52, 13.405, 10)
+    assert calculate_distance(52.52, 13.405, max_lat, 13.405) >= 9.99
+    assert calculate_distance(52.52, 13.405, 52.52, max_lng) >= 10
+    assert min_lat < 52.52 < max_lat and min_lng < 13.405 < max_lng
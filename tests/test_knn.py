@@ -0,0 +1,97 @@
+"""
+Tests for the KD-tree behind /places/nearby/knn
+"""
+import random
+
+import numpy as np
+
+from services.geo import haversine_km
+from services.indexes import build_indexes
+from services.knn import KDTreeIndex, chord_to_km
+
+
+def random_places(make_place, count, seed=3):
+    rng = random.Random(seed)
+    return [
+        make_place(
+            name=f"Place {i}",
+            latitude=rng.uniform(47.5, 54.5),
+            longitude=rng.uniform(6.0, 14.5),
+            category=rng.choice(["cafe", "bar", "library"]),
+        )
+        for i in range(count)
+    ]
+
+
+def brute_force(places, lat, lng, k, category=None):
+    candidates = [p for p in places if category is None or p.category == category]
+    distances = haversine_km(lat, lng, np.array([p.latitude for p in candidates]), np.array([p.longitude for p in candidates]))
+    order = sorted(range(len(candidates)), key=lambda i: (distances[i], candidates[i].id))
+    return [candidates[i].id for i in order[:k]]
+
+
+def test_kdtree_matches_brute_force(make_place):
+    places = random_places(make_place, 400)
+    index = KDTreeIndex(leaf_size=8)
+    index.build(places)
+
+    for lat, lng, category in [(50.1, 8.7, None), (52.5, 13.4, "cafe"), (48.1, 11.6, "library")]:
+        hits = index.query(lat, lng, 25, category=category)
+        assert [place_id for _, place_id in hits] == brute_force(places, lat, lng, 25, category)
+
+
+def test_kdtree_cursor_pages_outward(make_place):
+    places = random_places(make_place, 200)
+    index = KDTreeIndex(leaf_size=8)
+    index.build(places)
+
+    paged, after = [], None
+    while True:
+        page = index.query(51.0, 10.0, 30, after=after)
+        if not page:
+            break
+        paged.extend(place_id for _, place_id in page)
+        after = page[-1]
+
+    assert paged == brute_force(places, 51.0, 10.0, 200)
+
+
+def test_kdtree_overlay_and_tombstones(make_place):
+    places = random_places(make_place, 50)
+    index = KDTreeIndex(leaf_size=4, rebuild_threshold=1000)
+    index.build(places[:40])
+    for place in places[40:]:
+        index.add(place)
+    for place in places[:10]:
+        index.discard(place.id)
+
+    hits = index.query(50.0, 9.0, 100)
+    assert [place_id for _, place_id in hits] == brute_force(places[10:], 50.0, 9.0, 100)
+
+    nearest = next(p for p in places if p.id == hits[0][1])
+    expected_km = haversine_km(50.0, 9.0, np.array([nearest.latitude]), np.array([nearest.longitude]))[0]
+    assert abs(chord_to_km(hits[0][0]) - expected_km) < 1e-6
+
+
+def test_nearest_endpoint_pagination(client, db, make_place):
+    for i in range(5):
+        make_place(name=f"Cafe {i}", latitude=52.50 + i / 1000, longitude=13.40)
+    make_place(name="Bar", latitude=52.5005, longitude=13.40, category="bar")
+
+    build_indexes(db)
+
+    first = client.get("/api/v1/places/nearby/knn", params={"lat": 52.5, "lng": 13.4, "k": 3, "category": "cafe"}).json()
+    assert [item["place"]["name"] for item in first["items"]] == ["Cafe 0", "Cafe 1", "Cafe 2"]
+    assert first["next_cursor"]
+
+    second = client.get(
+        "/api/v1/places/nearby/knn",
+        params={"lat": 52.5, "lng": 13.4, "k": 3, "category": "cafe", "cursor": first["next_cursor"]},
+    ).json()
+    assert [item["place"]["name"] for item in second["items"]] == ["Cafe 3", "Cafe 4"]
+    assert second["next_cursor"] is None
+
+
+def test_nearest_endpoint_rejects_bad_cursor(client):
+    response = client.get("/api/v1/places/nearby/knn", params={"lat": 52.5, "lng": 13.4, "cursor": "!!"})
+    assert response.status_code == 400
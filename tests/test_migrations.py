@@ -0,0 +1,58 @@
+"""
+Tests that the Alembic migrations apply cleanly to an empty database
+"""
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+
+from db.session import Base
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def alembic_config(url: str) -> Config:
+    cfg = Config(str(ROOT / "alembic.ini"))
+    cfg.set_main_option("script_location", str(ROOT / "migrations"))
+    cfg.set_main_option("sqlalchemy.url", url)
+    cfg.attributes["configure_logger"] = False
+    return cfg
+
+
+def test_upgrade_and_downgrade(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    cfg = alembic_config(url)
+
+    command.upgrade(cfg, "head")
+    inspector = inspect(create_engine(url))
+    assert {"users", "places", "checkins"} <= set(inspector.get_table_names())
+    place_indexes = {index["name"] for index in inspector.get_indexes("places")}
+    assert "ix_places_active_lat_lng" in place_indexes
+
+    command.downgrade(cfg, "base")
+    assert "places" not in inspect(create_engine(url)).get_table_names()
+
+
+def test_upgrade_over_create_all(tmp_path):
+    """Databases built from the models, as the import scripts do, can still be migrated"""
+    url = f"sqlite:///{tmp_path / 'create_all.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+
+    command.upgrade(alembic_config(url), "head")
+    place_indexes = {index["name"] for index in inspect(engine).get_indexes("places")}
+    assert "ix_places_active_lat_lng" in place_indexes
+    checkin_indexes = {index["name"] for index in inspect(engine).get_indexes("checkins")}
+    assert {
+        "ix_checkins_status_time_id", "ix_checkins_user_time_id",
+        "ix_checkins_user_status", "ix_checkins_place_status", "ix_checkins_time_id",
+    } <= checkin_indexes
+    engine.dispose()
+
+
+def test_head_matches_models(tmp_path):
+    """Autogenerate finds nothing to do at head, full-text tables aside"""
+    cfg = alembic_config(f"sqlite:///{tmp_path / 'check.db'}")
+    command.upgrade(cfg, "head")
+    command.check(cfg)
@@ -0,0 +1,87 @@
+"""
+Tests for active check-in counts per place (/checkins/occupancy)
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from core.config import config
+from models.checkin import CheckIn
+from services.indexes import build_indexes
+from services.presence import occupancy, presence
+from services.response_cache import MemoryBackend, response_cache
+
+
+def _check_in(db, place, user_id, hours_ago=0.0, hours=2):
+    checkin = CheckIn(
+        user_id=user_id, place_id=place.id, status="active", duration_hours=hours,
+        check_in_time=datetime.utcnow() - timedelta(hours=hours_ago),
+    )
+    db.add(checkin)
+    db.commit()
+    presence.add(checkin)
+    return checkin
+
+
+def test_counts_from_registry_without_queries(client, db, user, make_place):
+    busy, quiet, expired = make_place(name="Busy"), make_place(name="Quiet"), make_place(name="Expired")
+    _check_in(db, busy, user.id)
+    _check_in(db, busy, user.id + 1)
+    _check_in(db, expired, user.id + 2, hours_ago=3)
+    ids = f"{busy.id},{quiet.id},{expired.id},{busy.id}"
+    statements = []
+
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    response = client.get("/api/v1/checkins/occupancy", params={"place_ids": ids})
+    assert response.status_code == 200
+    assert response.json() == {str(busy.id): 2, str(quiet.id): 0, str(expired.id): 0}
+    assert statements == []
+
+
+def test_fallback_matches_registry(db, user, make_place):
+    first, second = make_place(name="First"), make_place(name="Second")
+    _check_in(db, first, user.id)
+    _check_in(db, first, user.id + 1, hours_ago=3)
+    _check_in(db, second, user.id + 2, hours_ago=1.5)
+    ended = _check_in(db, second, user.id + 3)
+    ended.status = "ended"
+    db.commit()
+    presence.discard(ended.id)
+
+    expected = {first.id: 1, second.id: 1, 999: 0}
+    assert occupancy(db, [first.id, second.id, 999]) == expected
+    presence.ready = False
+    assert occupancy(db, [first.id, second.id, 999]) == expected
+    assert occupancy(db, []) == {}
+
+
+def test_invalid_or_too_many_ids_are_rejected(client, monkeypatch):
+    assert client.get("/api/v1/checkins/occupancy", params={"place_ids": "1,x"}).status_code == 400
+    monkeypatch.setattr(config, "OCCUPANCY_MAX_PLACES", 2)
+    assert client.get("/api/v1/checkins/occupancy", params={"place_ids": "1,2,3"}).status_code == 400
+    assert client.get("/api/v1/checkins/occupancy", params={"place_ids": "1,2,2"}).status_code == 200
+
+
+def test_counts_for_a_page_of_cards(client, db, user, make_place, monkeypatch):
+    busy = make_place(name="Busy", latitude=52.52, longitude=13.405)
+    make_place(name="Quiet", latitude=52.521, longitude=13.405)
+    build_indexes(db)
+    _check_in(db, busy, user.id)
+    monkeypatch.setattr(response_cache, "backend", MemoryBackend(16))
+
+    for path, params in (
+        ("/api/v1/places/", {"view": "card"}),
+        ("/api/v1/places/nearby/gps", {"lat": 52.52, "lng": 13.405, "view": "card"}),
+    ):
+        page = client.get(path, params=params)
+        # Listings carry no counts and stay cacheable
+        assert "x-occupancy" not in page.headers
+        assert "no-store" not in page.headers.get("cache-control", "")
+        items = page.json()
+        ids = [item.get("place", item)["id"] for item in items]
+        counts = client.get("/api/v1/checkins/occupancy", params={"place_ids": ",".join(map(str, ids))}).json()
+        assert len(ids) == 2
+        assert counts == {str(place_id): int(place_id == busy.id) for place_id in ids}
@@ -0,0 +1,112 @@
+"""
+Tests for keyset (cursor) pagination of the list endpoints
+"""
+from datetime import datetime
+
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, inspect, text
+
+from models.checkin import CheckIn
+from services.pagination import decode_keyset, encode_keyset, paginate
+from tests.test_migrations import alembic_config
+
+
+def _walk(client, path, **params):
+    """Follow X-Next-Cursor to the last page, returning every page's ids"""
+    pages = []
+    response = client.get(path, params=params)
+    while True:
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return pages
+        response = client.get(path, params={**params, "cursor": cursor})
+
+
+def test_places_pages_follow_the_cursor(client, make_place):
+    ids = [make_place(name=f"Place {i}").id for i in range(7)]
+    assert _walk(client, "/api/v1/places/", limit=3) == [ids[0:3], ids[3:6], ids[6:7]]
+    # Cursor pages apply the same filters as the first one
+    make_place(name="Elsewhere", city="Hamburg")
+    assert sum(_walk(client, "/api/v1/places/", limit=2, city="Berlin"), []) == ids
+
+
+def test_skip_still_works_without_cursor(client, make_place):
+    ids = [make_place(name=f"Place {i}").id for i in range(4)]
+    response = client.get("/api/v1/places/", params={"skip": 1, "limit": 2})
+    assert [place["id"] for place in response.json()] == ids[1:3]
+    assert "x-next-cursor" in response.headers
+
+
+def test_checkins_newest_first_across_equal_timestamps(client, db, user, make_place):
+    place = make_place()
+    same_time = datetime(2026, 5, 1, 12, 0, 0)
+    checkins = [CheckIn(user_id=user.id, place_id=place.id, check_in_time=same_time) for _ in range(3)]
+    checkins.append(CheckIn(user_id=user.id, place_id=place.id, check_in_time=datetime(2026, 5, 1, 12, 0, 0, 500)))
+    # server_default timestamp, stored without fractional seconds
+    checkins.append(CheckIn(user_id=user.id, place_id=place.id))
+    db.add_all(checkins)
+    db.commit()
+
+    newest_first = [checkins[4].id, checkins[3].id, checkins[2].id, checkins[1].id, checkins[0].id]
+    for path in ("/api/v1/checkins/", "/api/v1/checkins/my"):
+        pages = _walk(client, path, limit=2)
+        assert pages == [newest_first[0:2], newest_first[2:4], newest_first[4:5]]
+
+
+def test_invalid_cursor_is_rejected(client):
+    for cursor in ("not-a-cursor", "WzFd", "WyJ4Il0="):  # garbage, [1] on two keys, ["x"]
+        assert client.get("/api/v1/checkins/", params={"cursor": cursor}).status_code == 400
+    assert client.get("/api/v1/users/", params={"cursor": "e30="}).status_code == 400  # {}
+
+
+def test_datetime_keys_need_iso_strings():
+    keys = (CheckIn.check_in_time, CheckIn.id)
+    for dialect, values in (
+        ("sqlite", [123, 5]), ("postgresql", [123, 5]),
+        ("postgresql", [["2026-10-17"], 5]), ("postgresql", ["yesterday", 5]),
+    ):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_keyset(encode_keyset(values), keys, dialect)
+    moment = datetime(2026, 10, 17, 12, 30)
+    assert decode_keyset(encode_keyset([moment, 5]), keys, "postgresql") == [moment, 5]
+
+
+def test_checkin_cursor_query_uses_index(db, user, monkeypatch):
+    query = db.query(CheckIn).filter(CheckIn.status == "active")
+    _, cursor = paginate(query, (CheckIn.check_in_time, CheckIn.id), 1, descending=True)
+    assert cursor is None
+
+    db.add_all([CheckIn(user_id=user.id, place_id=1, status="active") for _ in range(2)])
+    db.commit()
+    _, cursor = paginate(query, (CheckIn.check_in_time, CheckIn.id), 1, descending=True)
+
+    captured = []
+    original = type(query).all
+
+    def explain(self):
+        statement = self.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+        captured.append(db.execute(text(f"EXPLAIN QUERY PLAN {statement}")).all())
+        return original(self)
+
+    monkeypatch.setattr(type(query), "all", explain)
+    paginate(query, (CheckIn.check_in_time, CheckIn.id), 1, cursor=cursor, descending=True)
+    plan = " ".join(row[-1] for row in captured[0])
+    assert "ix_checkins_status_time_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_migration_adds_checkin_indexes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pagination.db'}"
+    cfg = alembic_config(url)
+    command.upgrade(cfg, "0005")
+    engine = create_engine(url)
+    indexes = {index["name"] for index in inspect(engine).get_indexes("checkins")}
+    assert {"ix_checkins_status_time_id", "ix_checkins_user_time_id"} <= indexes
+
+    command.downgrade(cfg, "0004")
+    indexes = {index["name"] for index in inspect(engine).get_indexes("checkins")}
+    assert "ix_checkins_status_time_id" not in indexes
+    engine.dispose()
@@ -0,0 +1,71 @@
+"""
+Tests for the serialized place cache behind /places/{id}
+"""
+from datetime import datetime
+
+from core.config import config
+from schemas.place import Place as PlaceSchema
+from services.indexes import build_indexes
+from services.place_cache import PlaceJSONCache, place_json_cache
+
+
+def test_get_place_etag_and_not_modified(client, db, make_place):
+    place = make_place(name="Kaffeekommune", opening_hours={"mon": "8-18"})
+    response = client.get(f"/api/v1/places/{place.id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == PlaceSchema.model_validate(place).model_dump(mode="json")
+    etag = response.headers["etag"]
+
+    cached = client.get(f"/api/v1/places/{place.id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    # Same-second updates keep updated_at but still drop the entry
+    client.put(f"/api/v1/places/{place.id}", json={"name": "Kaffeekommune II"})
+    changed = client.get(f"/api/v1/places/{place.id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["name"] == "Kaffeekommune II"
+    assert changed.headers["etag"] != etag
+
+    client.delete(f"/api/v1/places/{place.id}")
+    assert client.get(f"/api/v1/places/{place.id}").json()["is_active"] is False
+    assert client.get("/api/v1/places/999").status_code == 404
+
+
+def test_entry_follows_updated_at(db, make_place):
+    place = make_place()
+    cache = PlaceJSONCache(maxsize=10)
+    body, etag = cache.store(place)
+    assert cache.lookup(place.id, place.updated_at) == (body, etag)
+
+    # Changed by another worker: the stored version no longer matches
+    db.execute(place.__table__.update().values(name="Elsewhere", updated_at=datetime(2030, 1, 1)))
+    db.commit()
+    db.refresh(place)
+    assert cache.lookup(place.id, place.updated_at) is None
+    assert b"Elsewhere" in cache.encode(place)
+
+
+def test_lru_eviction(make_place):
+    places = [make_place(name=f"Place {i}") for i in range(3)]
+    cache = PlaceJSONCache(maxsize=2)
+    for place in places:
+        cache.encode(place)
+    cache.lookup(places[1].id, places[1].updated_at)
+    cache.encode(places[0])
+    assert len(cache) == 2
+    assert cache.lookup(places[2].id, places[2].updated_at) is None
+    assert cache.lookup(places[1].id, places[1].updated_at) is not None
+
+
+def test_fast_list_reuses_cached_places(client, db, make_place, monkeypatch):
+    place = make_place(name="Kaffeekommune")
+    build_indexes(db)
+    client.get(f"/api/v1/places/{place.id}")
+    body = place_json_cache.lookup(place.id, place.updated_at)[0]
+
+    monkeypatch.setattr(config, "FAST_JSON", True)
+    assert client.get("/api/v1/places/").content == b"[" + body + b"]"
+    nearby = client.get("/api/v1/places/nearby/gps", params={"lat": place.latitude, "lng": place.longitude})
+    assert nearby.content == b'[{"place":' + body + b',"distance_km":0.0}]'
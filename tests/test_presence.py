@@ -0,0 +1,94 @@
+"""
+Tests for the in-memory registry of active check-ins
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models.checkin import CheckIn
+from services.presence import PresenceRegistry, presence
+
+NOW = datetime(2026, 5, 1, 12, 0)
+
+
+def _checkin(id, place_id=1, user_id=1, minutes_ago=0, hours=2):
+    return CheckIn(
+        id=id, user_id=user_id, place_id=place_id, status="active", duration_hours=hours,
+        check_in_time=NOW - timedelta(minutes=minutes_ago),
+    )
+
+
+def test_registry_tracks_places_and_expiry():
+    registry = PresenceRegistry()
+    registry.add(_checkin(1, place_id=1, minutes_ago=150))  # expired 30 minutes ago
+    registry.add(_checkin(2, place_id=1, minutes_ago=30))
+    registry.add(_checkin(3, place_id=2, minutes_ago=10, hours=1))
+
+    assert [item.checkin_id for item in registry.at_place(1, NOW)] == [2]
+    assert registry.counts([1, 2, 3], NOW) == {1: 1, 2: 1, 3: 0}
+    # Run-out check-ins are skipped, not removed: the sweeper ends them
+    assert len(registry) == 3
+    assert registry.next_expiry() == NOW - timedelta(minutes=30)
+
+    registry.discard(1)
+    registry.discard(2)
+    assert registry.at_place(1, NOW) == []
+    # Their heap entries are stale and skipped
+    assert registry.next_expiry() == NOW + timedelta(minutes=50)
+    assert registry.counts([2], NOW + timedelta(hours=1)) == {2: 0}
+
+
+def test_re_adding_a_checkin_replaces_its_expiry():
+    registry = PresenceRegistry()
+    checkin = _checkin(1, minutes_ago=110)
+    registry.add(checkin)
+    checkin.duration_hours = 4
+    registry.add(checkin)
+    assert [item.checkin_id for item in registry.at_place(1, NOW)] == [1]
+
+
+@pytest.fixture
+def checked_in(client, db, user, make_place):
+    place = make_place()
+    client.post("/api/v1/checkins/", json={"place_id": place.id, "message": "Am Fenster"})
+    return place
+
+
+def test_active_users_come_from_registry(client, db, checked_in):
+    place_id = checked_in.id
+    statements = []
+
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    [active] = client.get(f"/api/v1/checkins/place/{place_id}/active").json()
+    assert active["username"] == "tester"
+    assert active["message"] == "Am Fenster"
+    assert active["hours_left"] == 1 and active["minutes_left"] >= 58
+    # Only the users are read; no check-in query and no writes
+    assert len(statements) == 1 and "FROM users" in statements[0]
+
+
+def test_end_and_delete_leave_the_place(client, db, checked_in):
+    [checkin] = client.get("/api/v1/checkins/my").json()
+    client.post(f"/api/v1/checkins/{checkin['id']}/end")
+    assert client.get(f"/api/v1/checkins/place/{checked_in.id}/active").json() == []
+
+    created = client.post("/api/v1/checkins/", json={"place_id": checked_in.id}).json()
+    assert len(client.get(f"/api/v1/checkins/place/{checked_in.id}/active").json()) == 1
+    client.delete(f"/api/v1/checkins/{created['id']}")
+    assert client.get(f"/api/v1/checkins/place/{checked_in.id}/active").json() == []
+
+
+def test_expired_checkins_are_hidden_without_writes(client, db, checked_in, monkeypatch):
+    db.query(CheckIn).update({CheckIn.check_in_time: datetime.utcnow() - timedelta(hours=3)})
+    db.commit()
+    presence.load(db)
+    assert client.get(f"/api/v1/checkins/place/{checked_in.id}/active").json() == []
+    assert db.query(CheckIn).one().status == "active"
+
+    # Same answer straight from the database while the registry isn't loaded
+    monkeypatch.setattr(presence, "ready", False)
+    assert client.get(f"/api/v1/checkins/place/{checked_in.id}/active").json() == []
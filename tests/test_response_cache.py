@@ -0,0 +1,122 @@
+"""
+Tests for the anonymous GET response cache
+"""
+import asyncio
+
+import pytest
+
+from core.metrics import metrics
+from services.indexes import build_indexes
+from services.response_cache import MemoryBackend, RedisBackend, response_cache
+
+
+class FakeRedis:
+    """Local stand-in for a redis.asyncio client; shared by every 'worker' holding it"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    async def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request, monkeypatch):
+    backend = MemoryBackend(maxsize=100) if request.param == "memory" else RedisBackend(FakeRedis())
+    monkeypatch.setattr(response_cache, "backend", backend)
+    metrics.reset()
+    return backend
+
+
+PLACE = {
+    "name": "Kaffeekommune", "address": "Hof 1", "city": "Berlin",
+    "latitude": 52.52, "longitude": 13.405, "category": "cafe",
+}
+
+
+def test_hit_after_miss_with_normalized_query(client, backend, make_place):
+    make_place()
+    first = client.get("/api/v1/places/?limit=5&category=cafe")
+    assert first.headers["x-cache"] == "MISS"
+
+    second = client.get("/api/v1/places/?category=cafe&limit=5")
+    assert second.headers["x-cache"] == "HIT"
+    assert second.content == first.content
+    assert second.headers["content-type"] == "application/json"
+    assert metrics.get("response_cache.hits") == 1
+    assert metrics.get("response_cache.misses") == 1
+
+
+def test_writes_invalidate_by_tag(client, db, backend, make_place):
+    make_place()
+    build_indexes(db)
+    client.get("/api/v1/places/")
+    client.get("/api/v1/checkins/")
+
+    created = client.post("/api/v1/places/", json=PLACE).json()
+    places = client.get("/api/v1/places/")
+    assert places.headers["x-cache"] == "MISS"
+    assert created["id"] in [place["id"] for place in places.json()]
+    # Check-in listings don't depend on places
+    assert client.get("/api/v1/checkins/").headers["x-cache"] == "HIT"
+
+    client.post("/api/v1/checkins/", json={"place_id": created["id"]})
+    assert len(client.get("/api/v1/checkins/").json()) == 1
+    assert client.get("/api/v1/places/").headers["x-cache"] == "HIT"
+
+
+def test_authenticated_and_uncached_requests_bypass(client, backend, make_place):
+    make_place()
+    headers = {"Authorization": "Bearer token"}
+    client.get("/api/v1/places/", headers=headers)
+    assert "x-cache" not in client.get("/api/v1/places/", headers=headers).headers
+    assert "x-cache" not in client.get("/api/v1/places/cities/all").headers
+    # Only successful responses are stored
+    client.get("/api/v1/places/", params={"cursor": "bad"})
+    assert client.get("/api/v1/places/", params={"cursor": "bad"}).status_code == 400
+    assert metrics.get("response_cache.hits") == 0
+
+
+def test_store_failure_serves_uncached(client, backend, make_place, monkeypatch):
+    make_place()
+
+    async def broken(*args):
+        raise ConnectionError("store down")
+
+    monkeypatch.setattr(backend, "get", broken)
+    response = client.get("/api/v1/places/")
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert metrics.get("response_cache.errors") == 1
+
+
+def test_metrics_endpoint(client, backend, make_place):
+    make_place()
+    client.get("/api/v1/places/")
+    client.get("/api/v1/places/")
+    body = client.get("/api/v1/health/metrics").json()
+    assert body["response_cache_backend"] == backend.name
+    assert body["counters"]["response_cache.hits"] == 1
+
+
+def test_memory_backend_expiry_and_bound():
+    async def scenario():
+        backend = MemoryBackend(maxsize=2)
+        await backend.set("a", b"1", ttl=0)
+        assert await backend.get("a") is None
+        for key in "bcd":
+            await backend.set(key, key.encode(), ttl=60)
+        assert await backend.get("b") is None
+        assert await backend.get("d") == b"d"
+
+    asyncio.run(scenario())
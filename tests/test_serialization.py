@@ -0,0 +1,57 @@
+"""
+Tests for the orjson fast path (FAST_JSON) of the place listings
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from core.config import config
+from main import app
+from models.place import Place
+from schemas.place import Place as PlaceSchema
+from services.indexes import build_indexes
+from services.serialization import FastJSONResponse, row_encoder
+
+
+@pytest.fixture
+def places(db, make_place):
+    make_place(name="Kaffeekommune", opening_hours={"mon": "8-18"}, rating=4.5, price_level=2)
+    make_place(name="Späti", opening_hours=["Mo-Fr 10-22"], description=None, latitude=52.5201)
+    build_indexes(db)
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/v1/places/", {"limit": 500}),
+    ("/api/v1/places/", {"limit": 1}),
+    ("/api/v1/places/", {"view": "card"}),
+    ("/api/v1/places/nearby/gps", {"lat": 52.52, "lng": 13.405, "limit": 500}),
+    ("/api/v1/places/nearby/gps", {"lat": 52.52, "lng": 13.405, "view": "card"}),
+])
+def test_fast_path_matches_validated_responses(client, places, monkeypatch, path, params):
+    validated = client.get(path, params=params)
+    monkeypatch.setattr(config, "FAST_JSON", True)
+    fast = client.get(path, params=params)
+
+    assert fast.status_code == validated.status_code == 200
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.json() == validated.json()
+    assert [list(item) for item in fast.json()] == [list(item) for item in validated.json()]
+    assert fast.headers.get("x-next-cursor") == validated.headers.get("x-next-cursor")
+
+
+def test_openapi_schema_is_unchanged(monkeypatch):
+    app.openapi_schema = None
+    default = app.openapi()
+    monkeypatch.setattr(config, "FAST_JSON", True)
+    app.openapi_schema = None
+    assert app.openapi() == default
+    app.openapi_schema = None
+
+
+def test_encoder_matches_pydantic_datetimes():
+    place = Place(
+        id=1, name="Kiosk", address="Ecke", city="Berlin", country="Germany", latitude=52.5, longitude=13.4, category="cafe",
+        is_active=True, created_at=datetime(2026, 5, 1, 12, 0, 0, 500, tzinfo=timezone.utc), updated_at=None,
+    )
+    expected = PlaceSchema.model_validate(place).model_dump_json().encode()
+    assert FastJSONResponse(row_encoder(PlaceSchema)(place)).body == expected
@@ -0,0 +1,205 @@
+"""
+Tests for coalescing concurrent identical requests
+"""
+import asyncio
+import sys
+import threading
+import time
+
+import httpx
+from sqlalchemy import inspect
+from sqlalchemy.orm import sessionmaker
+
+from core.metrics import metrics
+from db.session import get_db
+from main import app
+from models.place import Place
+from services import location
+from services.indexes import build_indexes, sync_place
+from services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        time.sleep(0.05)
+        return [value]
+
+    async def scenario():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.run("key", compute, 1) for _ in range(5)), flight.run("other", compute, 2))
+        assert flight.in_flight() == 0
+        # Finished calls are not cached
+        await flight.run("key", compute, 3)
+        return results
+
+    metrics.reset()
+    results = asyncio.run(scenario())
+    assert results[:5] == [[1]] * 5
+    assert results[0] is results[4]
+    assert results[5] == [2]
+    assert calls == [1, 2, 3]
+    assert metrics.get("singleflight.test.coalesced") == 4
+    assert metrics.get("singleflight.test.calls") == 3
+
+
+def test_errors_reach_every_waiter():
+    def fail():
+        time.sleep(0.02)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        flight = SingleFlight("test")
+        return await asyncio.gather(*(flight.run("key", fail) for _ in range(3)), return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(scenario())] == [RuntimeError] * 3
+
+
+def test_first_caller_cancelled_others_still_get_result():
+    release = threading.Event()
+
+    async def scenario():
+        flight = SingleFlight("test")
+        first = asyncio.ensure_future(flight.run("key", lambda: release.wait(1) and "done"))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.run("key", lambda: "other"))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_identical_nearby_requests_run_one_query(client, db, make_place, monkeypatch):
+    make_place(latitude=52.52, longitude=13.405)
+    build_indexes(db)
+    calls = []
+    nearby = location.get_places_near_location
+
+    def slow_nearby(*args, **kwargs):
+        calls.append(kwargs)
+        time.sleep(0.05)
+        return nearby(*args, **kwargs)
+
+    monkeypatch.setattr("routes.places.get_places_near_location", slow_nearby)
+    metrics.reset()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            params = {"lat": 52.52, "lng": 13.405}
+            return await asyncio.gather(*(http.get("/api/v1/places/nearby/gps", params=params) for _ in range(4)))
+
+    responses = asyncio.run(scenario())
+    assert [len(response.json()) for response in responses] == [1] * 4
+    assert len(calls) == 1
+    assert metrics.get("singleflight.nearby.coalesced") == 3
+
+
+def test_leader_disconnect_leaves_followers_a_working_session(client, db, make_place, monkeypatch):
+    make_place(latitude=52.52, longitude=13.405)
+    build_indexes(db)
+    # Request-scoped sessions, closed when their request ends, as in production
+    request_sessions = []
+    session_factory = sessionmaker(bind=db.get_bind())
+
+    def per_request_db():
+        session = session_factory()
+        request_sessions.append(session)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = per_request_db
+    started, release = threading.Event(), threading.Event()
+    used_sessions = []
+    nearby = location.get_places_near_location
+
+    def slow_nearby(session, **kwargs):
+        used_sessions.append(session)
+        started.set()
+        release.wait(1)
+        return nearby(session, **kwargs)
+
+    monkeypatch.setattr("routes.places.get_places_near_location", slow_nearby)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            params = {"lat": 52.52, "lng": 13.405}
+            leader = asyncio.ensure_future(http.get("/api/v1/places/nearby/gps", params=params))
+            while not started.is_set():
+                await asyncio.sleep(0.005)
+            follower = asyncio.ensure_future(http.get("/api/v1/places/nearby/gps", params=params))
+            await asyncio.sleep(0.02)
+            leader.cancel()
+            await asyncio.sleep(0.02)
+            release.set()
+            return await follower
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    # The shared query ran on a session of its own, not on a request's
+    [session] = used_sessions
+    assert all(session is not request_session for request_session in request_sessions)
+
+
+def test_rows_come_back_detached(db, make_place):
+    make_place(name="Kiezcafé")
+
+    async def scenario():
+        return await SingleFlight("test").run_with_session(
+            "key", db.get_bind(), lambda session: session.query(Place).all()
+        )
+
+    [place] = asyncio.run(scenario())
+    assert inspect(place).detached
+    assert place.name == "Kiezcafé"
+
+
+def test_searches_in_the_pool_see_consistent_indexes(db, make_place):
+    """The coalesced reads run in threads while writes update the indexes on the loop"""
+    for n in range(200):
+        make_place(name=f"Kaffee {n}", latitude=52.5 + n / 10000, longitude=13.4)
+    build_indexes(db)
+    written = [
+        Place(id=10000 + n, name=f"Kaffee Neu {n}", city="Berlin", category="cafe",
+              latitude=52.5 + n / 10000, longitude=13.4, is_active=True)
+        for n in range(200)
+    ]
+    errors = []
+    done = threading.Event()
+
+    def read():
+        session = sessionmaker(bind=db.get_bind())()
+        try:
+            while not done.is_set():
+                location.search_places(session, "kaffee")
+                location.get_places_near_location(session, 52.51, 13.4, radius_km=5)
+        except Exception as e:  # noqa: BLE001  anything raised is the failure
+            errors.append(e)
+        finally:
+            session.close()
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads often enough to hit a write mid-read
+    try:
+        for reader in readers:
+            reader.start()
+        for _ in range(5):
+            for place in written:
+                sync_place(place)
+            for place in written:
+                place.is_active = not place.is_active
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+        sys.setswitchinterval(interval)
+    assert errors == []
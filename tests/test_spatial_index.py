@@ -0,0 +1,79 @@
+"""
+Tests for the in-memory grid index behind /places/nearby/gps
+"""
+import random
+
+from services.indexes import build_indexes
+from services.location import calculate_distance, get_places_near_location
+from services.spatial_index import GridIndex, place_grid
+
+
+def test_grid_matches_full_scan(db, make_place):
+    rng = random.Random(42)
+    for i in range(300):
+        make_place(
+            name=f"Place {i}",
+            latitude=rng.uniform(50.0, 53.0),
+            longitude=rng.uniform(8.0, 14.0),
+        )
+
+    place_grid.ready = False
+    expected = get_places_near_location(db, 51.5, 11.0, radius_km=40, limit=500)
+
+    build_indexes(db)
+    actual = get_places_near_location(db, 51.5, 11.0, radius_km=40, limit=500)
+
+    assert expected
+    assert [place.id for place, _ in actual] == [place.id for place, _ in expected]
+
+
+def test_grid_reuses_slots_after_discard(make_place):
+    places = [make_place(latitude=52.5 + i / 100, longitude=13.4) for i in range(3)]
+    grid = GridIndex(capacity=2)
+    grid.build(places[:2])
+    grid.discard(places[0].id)
+    grid.add(places[2])
+
+    assert len(grid) == 2
+    assert sorted(place_id for place_id, _ in grid.nearest(52.5, 13.4, 50, 10)) == [places[1].id, places[2].id]
+
+
+def test_grid_candidates_only_visit_nearby_cells(make_place):
+    near = make_place(latitude=52.52, longitude=13.405)
+    far = make_place(latitude=48.137, longitude=11.575)
+
+    grid = GridIndex()
+    grid.build([near, far])
+
+    slots = grid.candidate_slots(52.5, 13.4, 5)
+    assert grid.ids[slots].tolist() == [near.id]
+    assert [place_id for place_id, _ in grid.nearest(52.5, 13.4, 600, 10)] == [near.id, far.id]
+
+
+def test_grid_follows_place_writes(client):
+    payload = {
+        "name": "Neues Café",
+        "address": "Torstraße 1",
+        "city": "Berlin",
+        "latitude": 52.529,
+        "longitude": 13.401,
+        "category": "cafe",
+    }
+    created = client.post("/api/v1/places/", json=payload).json()
+
+    nearby = client.get("/api/v1/places/nearby/gps", params={"lat": 52.53, "lng": 13.40, "radius": 1}).json()
+    assert [item["place"]["id"] for item in nearby] == [created["id"]]
+
+    # Moving the place far away drops it from the old neighbourhood
+    client.put(f"/api/v1/places/{created['id']}", json={"latitude": 48.137, "longitude": 11.575})
+    nearby = client.get("/api/v1/places/nearby/gps", params={"lat": 52.53, "lng": 13.40, "radius": 1}).json()
+    assert nearby == []
+
+    client.delete(f"/api/v1/places/{created['id']}")
+    nearby = client.get("/api/v1/places/nearby/gps", params={"lat": 48.137, "lng": 11.575, "radius": 1}).json()
+    assert nearby == []
+    assert created["id"] not in place_grid.ids[place_grid.candidate_slots(48.137, 11.575, 1)]
+
+
+def test_calculate_distance_berlin_munich():
+    assert abs(calculate_distance(52.52, 13.405, 48.137, 11.575) - 504) < 2
@@ -0,0 +1,143 @@
+"""
+Tests for the background sweeper ending expired check-ins
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from core.metrics import metrics
+from models.checkin import CheckIn
+from services.checkin_events import checkin_broker
+from services.presence import presence
+from services.sweeper import CheckinSweeper, sweep_expired
+
+
+def _checkin(db, user, place_id, hours, started):
+    checkin = CheckIn(user_id=user.id, place_id=place_id, status="active", duration_hours=hours, check_in_time=started)
+    db.add(checkin)
+    db.commit()
+    return checkin
+
+
+def test_sweep_ends_only_expired_checkins(db, user):
+    now = datetime(2026, 5, 1, 12, 0)
+    expired = _checkin(db, user, 1, 2, now - timedelta(hours=2, microseconds=500))
+    running = _checkin(db, user, 2, 3, now - timedelta(hours=2))
+    long_expired = _checkin(db, user, 3, 1, now - timedelta(hours=5))
+    ended = _checkin(db, user, 4, 1, now - timedelta(hours=5))
+    ended.status = "ended"
+    db.commit()
+
+    closed = sweep_expired(db, now)
+    assert sorted(closed) == sorted([(expired.id, 1, user.id), (long_expired.id, 3, user.id)])
+
+    db.expire_all()
+    assert [checkin.status for checkin in (expired, running, long_expired)] == ["ended", "active", "ended"]
+    # Checked out when the duration ran out, not when the sweep happened
+    assert long_expired.check_out_time == now - timedelta(hours=4)
+    assert ended.check_out_time is None
+    assert sweep_expired(db, now) == []
+
+
+def test_sweeper_updates_presence_and_metrics(db, user):
+    started = datetime.utcnow() - timedelta(hours=3)
+    checkin = _checkin(db, user, 1, 2, started)
+    presence.add(checkin)
+    metrics.reset()
+
+    sweeper = CheckinSweeper(sessionmaker(bind=db.get_bind()), interval=60)
+    closed = asyncio.run(sweeper.sweep())
+    assert closed == [(checkin.id, 1, user.id)]
+    assert len(presence) == 0
+    assert metrics.get("checkin_sweeper.rows_closed") == 1
+    assert metrics.get("checkin_sweeper.sweep.count") == 1
+    assert metrics.get("checkin_sweeper.sweep.last_ms") > 0
+
+
+def test_run_out_checkins_stay_registered_for_the_sweeper(db, user, monkeypatch):
+    started = datetime.utcnow() - timedelta(hours=3)
+    checkin = _checkin(db, user, 1, 2, started)
+    presence.add(checkin)
+    published = []
+    monkeypatch.setattr(checkin_broker, "publish", lambda *event: published.append(event))
+
+    # Reads hide it without dropping it, so it is still scheduled...
+    assert presence.at_place(1, datetime.utcnow()) == []
+    assert presence.counts([1], datetime.utcnow()) == {1: 0}
+    assert presence.next_expiry() == started + timedelta(hours=2)
+
+    # ...and its checkout is reported at the time it ran out
+    asyncio.run(CheckinSweeper(sessionmaker(bind=db.get_bind()), interval=60).sweep())
+    assert published == [("checkout", checkin.id, 1, user.id, started + timedelta(hours=2))]
+    assert presence.next_expiry() is None
+
+
+def test_sweeper_wakes_at_next_expiry(db, user):
+    now = datetime.utcnow()
+    sweeper = CheckinSweeper(sessionmaker(bind=db.get_bind()), interval=60)
+    assert sweeper.delay(now) == 60
+
+    soon = _checkin(db, user, 1, 1, now - timedelta(minutes=59, seconds=50))
+    presence.add(soon)
+    assert 9 <= sweeper.delay(now) <= 10
+
+    # A removed check-in's heap entry doesn't wake the sweeper
+    presence.discard(soon.id)
+    assert sweeper.delay(now) == 60
+
+
+def test_guard_ends_expired_checkins_not_yet_swept(client, db, user, make_place):
+    place = make_place()
+    expired = _checkin(db, user, place.id, 1, datetime.utcnow() - timedelta(hours=2))
+    response = client.post("/api/v1/checkins/", json={"place_id": place.id})
+    assert response.status_code == 201
+
+    db.expire_all()
+    assert expired.status == "ended"
+    assert expired.check_out_time is not None
+    assert [item.checkin_id for item in presence.at_place(place.id, datetime.utcnow())] == [response.json()["id"]]
+    # The new one is still running
+    assert client.post("/api/v1/checkins/", json={"place_id": place.id}).status_code == 400
+
+    asyncio.run(CheckinSweeper(sessionmaker(bind=db.get_bind()), interval=60).sweep())
+    assert client.post("/api/v1/checkins/", json={"place_id": place.id}).status_code == 400
+
+
+def test_start_and_stop(db):
+    async def scenario():
+        sweeper = CheckinSweeper(sessionmaker(bind=db.get_bind()), interval=60)
+        task = sweeper.start()
+        await asyncio.sleep(0.05)
+        await sweeper.stop()
+        return task
+
+    metrics.reset()
+    assert asyncio.run(scenario()).cancelled()
+    assert metrics.get("checkin_sweeper.sweep.count") == 1
+
+
+def test_unexpected_errors_keep_the_loop_running(db, monkeypatch):
+    sweeper = CheckinSweeper(sessionmaker(bind=db.get_bind()), interval=60)
+    calls = []
+
+    async def sweep():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RuntimeError("broker down")
+        return []
+
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(sweeper, "sweep", sweep)
+    monkeypatch.setattr(asyncio, "sleep", lambda seconds: real_sleep(0))
+
+    async def scenario():
+        task = sweeper.start()
+        while len(calls) < 2:
+            await real_sleep(0)
+        await sweeper.stop()
+        return task
+
+    metrics.reset()
+    assert asyncio.run(scenario()).cancelled()
+    assert metrics.get("checkin_sweeper.errors") == 1
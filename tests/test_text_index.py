@@ -0,0 +1,123 @@
+"""
+Tests for the inverted index behind /places/search/text
+"""
+from services.indexes import build_indexes
+from services.text_index import InvertedIndex, edit_distance, index_terms, normalize, tokenize
+
+
+def test_german_normalization():
+    assert normalize("Straße") == "strasse"
+    assert tokenize("Café Müller, 10115 Berlin") == ["cafe", "muller", "10115", "berlin"]
+    assert set(index_terms("München")) == {"munchen", "muenchen"}
+
+
+def test_umlaut_spellings_match(make_place):
+    place = make_place(name="Kaffeehaus", city="München")
+    index = InvertedIndex()
+    index.build([place])
+
+    for query in ("München", "Muenchen", "munchen", "MÜNCHEN"):
+        assert index.search(query) == [place.id]
+
+
+def test_ranking_prefers_name_matches(make_place):
+    in_description = make_place(name="Bücherei", description="Gemütliches Café im Hinterhof")
+    in_name = make_place(name="Café Einstein", description="Wiener Kaffeehaus")
+    index = InvertedIndex()
+    index.build([in_description, in_name])
+
+    assert index.search("cafe") == [in_name.id, in_description.id]
+
+
+def test_all_words_must_match_and_prefixes(make_place):
+    berlin = make_place(name="Kaffeebar", city="Berlin", postal_code="10115")
+    hamburg = make_place(name="Kaffeebar", city="Hamburg", postal_code="20095")
+    index = InvertedIndex()
+    index.build([berlin, hamburg])
+
+    assert index.search("kaffee berlin") == [berlin.id]
+    assert index.search("101") == [berlin.id]
+    assert index.search("ka") == []  # too short for a prefix match
+    assert index.search("kaffeebar", city="Hamburg") == [hamburg.id]
+
+
+def test_index_follows_writes(make_place):
+    place = make_place(name="Altes Café")
+    index = InvertedIndex()
+    index.build([place])
+
+    index.discard(place.id)
+    place.name = "Neue Bar"
+    index.add(place)
+
+    assert index.search("cafe") == []
+    assert index.search("bar") == [place.id]
+    index.discard(place.id)
+    assert index.search("bar") == [] and len(index) == 0
+
+
+def test_built_and_incremental_vocabularies_agree(make_place):
+    places = [make_place(name=name) for name in ("Kaffeehaus Mitte", "Kaffeebar", "Bäckerei Kaiser", "Weinbar")]
+    built = InvertedIndex()
+    built.build(places)
+    added = InvertedIndex()
+    for place in reversed(places):
+        added.add(place)
+
+    assert built._vocabulary == added._vocabulary == sorted(built._vocabulary)
+    assert [term for term, _ in built.expand("kaff")] == ["kaffeebar", "kaffeehaus"]
+    assert built.search("kaff") == added.search("kaff")
+
+
+def test_edit_distance():
+    assert edit_distance("dusseldorf", "dusseldorf", 2) == 0
+    assert edit_distance("dusseldrof", "dusseldorf", 2) == 1
+    assert edit_distance("kafeehaus", "kaffeehaus", 2) == 1
+    assert edit_distance("berlin", "hamburg", 2) == 3
+
+
+def test_fuzzy_search(make_place):
+    duesseldorf = make_place(name="Rheinblick", city="Düsseldorf")
+    koeln = make_place(name="Kaffeehaus Einstein", city="Köln")
+    index = InvertedIndex()
+    index.build([duesseldorf, koeln])
+
+    assert index.search("Dusseldrof") == []
+    assert index.search("Dusseldrof", fuzzy=True) == [duesseldorf.id]
+    assert index.search("kafeehaus koln", fuzzy=True) == [koeln.id]
+    assert index.search("Einstien", fuzzy=True) == [koeln.id]
+    # Short words must match exactly
+    assert index.search("kol", fuzzy=True) == [koeln.id]
+    assert index.search("kil", fuzzy=True) == []
+
+
+def test_fuzzy_ranks_exact_matches_first(make_place):
+    exact = make_place(name="Café Sonne")
+    typo = make_place(name="Café Sunne")
+    index = InvertedIndex()
+    index.build([typo, exact])
+
+    assert index.search("sonne", fuzzy=True) == [exact.id, typo.id]
+    index.discard(exact.id)
+    assert index.search("sonne", fuzzy=True) == [typo.id]
+
+
+def test_search_endpoint_uses_index(client, db, make_place):
+    make_place(name="Rösterei Kreuzberg", city="Berlin")
+    make_place(name="Hafencafé", city="Hamburg")
+    build_indexes(db)
+
+    results = client.get("/api/v1/places/search/text", params={"q": "roesterei"}).json()
+    assert [place["name"] for place in results] == ["Rösterei Kreuzberg"]
+
+    created = client.post("/api/v1/places/", json={
+        "name": "Rösterei Mitte", "address": "Weg 1", "city": "Berlin",
+        "latitude": 52.5, "longitude": 13.4, "category": "cafe",
+    }).json()
+    results = client.get("/api/v1/places/search/text", params={"q": "rösterei", "city": "Berlin"}).json()
+    assert {place["id"] for place in results} >= {created["id"]}
+    assert len(results) == 2
+
+    results = client.get("/api/v1/places/search/text", params={"q": "rösteri", "fuzzy": True}).json()
+    assert len(results) == 2
+    assert client.get("/api/v1/places/search/text", params={"q": "rösteri"}).json() == []
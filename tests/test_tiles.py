@@ -0,0 +1,132 @@
+"""
+Tests for the on-disk place tile cache
+"""
+import os
+import time
+
+from models.place import Place
+from services import tiles
+from services.indexes import build_indexes
+from services.tiles import tile_bounds, tile_cache, tile_of
+
+BERLIN = (52.52, 13.405)
+
+
+def tile_url(z, x, y):
+    return f"/api/v1/places/tiles/{z}/{x}/{y}.json"
+
+
+def test_tile_bounds_contain_point():
+    x, y = tile_of(*BERLIN, 14)
+    min_lng, min_lat, max_lng, max_lat = tile_bounds(14, x, y)
+    assert min_lat <= BERLIN[0] <= max_lat
+    assert min_lng <= BERLIN[1] <= max_lng
+
+
+def test_detail_tile_is_cached_and_invalidated(client, db, make_place):
+    place = make_place(name="Kiezcafé", latitude=BERLIN[0], longitude=BERLIN[1])
+    build_indexes(db)
+    x, y = tile_of(*BERLIN, 15)
+
+    response = client.get(tile_url(15, x, y))
+    assert response.status_code == 200
+    assert "max-age" in response.headers["cache-control"]
+    assert response.json()["places"] == [[place.id, BERLIN[0], BERLIN[1], "cafe", "Kiezcafé"]]
+    assert tile_cache.path(15, x, y).exists()
+
+    client.put(f"/api/v1/places/{place.id}", json={"name": "Kiezcafé Neu"})
+    assert not tile_cache.path(15, x, y).exists()
+    assert client.get(tile_url(15, x, y)).json()["places"][0][4] == "Kiezcafé Neu"
+
+    client.delete(f"/api/v1/places/{place.id}")
+    assert client.get(tile_url(15, x, y)).json()["places"] == []
+
+
+def test_unrelated_write_keeps_tile(client, db, make_place):
+    make_place(latitude=BERLIN[0], longitude=BERLIN[1])
+    build_indexes(db)
+    x, y = tile_of(*BERLIN, 15)
+    client.get(tile_url(15, x, y))
+
+    client.post("/api/v1/places/", json={
+        "name": "Weit weg", "address": "Marienplatz 1", "city": "Munich",
+        "latitude": 48.137, "longitude": 11.575, "category": "bar",
+    })
+    assert tile_cache.path(15, x, y).exists()
+
+
+def test_low_zoom_tile_carries_clusters(client, db, make_place):
+    make_place(latitude=52.520, longitude=13.400)
+    make_place(latitude=52.521, longitude=13.401)
+    build_indexes(db)
+    x, y = tile_of(*BERLIN, 6)
+
+    clusters = client.get(tile_url(6, x, y)).json()["clusters"]
+    assert [cluster[2] for cluster in clusters] == [2]
+
+
+def test_out_of_range_tile(client):
+    assert client.get(tile_url(3, 8, 0)).status_code == 404
+
+
+def test_tile_unlinked_before_send_is_still_served(client, db, make_place, monkeypatch):
+    place = make_place(latitude=BERLIN[0], longitude=BERLIN[1])
+    build_indexes(db)
+    x, y = tile_of(*BERLIN, 15)
+
+    # A write from another worker unlinks the file right after it was stored
+    replace = os.replace
+
+    def replace_then_unlink(src, dst):
+        replace(src, dst)
+        os.unlink(dst)
+
+    monkeypatch.setattr(tiles.os, "replace", replace_then_unlink)
+    response = client.get(tile_url(15, x, y))
+    assert response.status_code == 200
+    assert response.json()["places"][0][0] == place.id
+    assert not tile_cache.path(15, x, y).exists()
+
+
+def test_tiles_are_kept_per_process(client, db, make_place, monkeypatch):
+    make_place(latitude=52.520, longitude=13.400)
+    build_indexes(db)
+    for z in (6, 15):
+        x, y = tile_of(*BERLIN, z)
+        client.get(tile_url(z, x, y))
+        assert tile_cache.path(z, x, y).exists()
+
+    # Another worker, whose indexes and invalidations may not have seen the same writes
+    pid = os.getpid()
+    monkeypatch.setattr(tiles.os, "getpid", lambda: pid + 1)
+    for z in (6, 15):
+        assert not tile_cache.path(z, *tile_of(*BERLIN, z)).exists()
+
+
+def test_tiles_age_out(client, db, make_place):
+    make_place(name="Alt", latitude=BERLIN[0], longitude=BERLIN[1])
+    build_indexes(db)
+    x, y = tile_of(*BERLIN, 15)
+    client.get(tile_url(15, x, y))
+    # Renamed through another worker: this one's tile is not invalidated
+    db.query(Place).update({"name": "Neu"})
+    db.commit()
+    assert client.get(tile_url(15, x, y)).json()["places"][0][4] == "Alt"
+
+    expired = time.time() - tile_cache.ttl - 1
+    os.utime(tile_cache.path(15, x, y), (expired, expired))
+    assert client.get(tile_url(15, x, y)).json()["places"][0][4] == "Neu"
+
+
+def test_build_only_removes_own_and_dead_workers_tiles(db, tmp_path, monkeypatch):
+    cache = tiles.TileCache(str(tmp_path / "shared"), ttl=60)
+    live, dead = cache.directory / "worker-1", cache.directory / "worker-999999999"
+    other = cache.directory / "notes.txt"
+    for root in (cache.root, live, dead):
+        (root / "1").mkdir(parents=True)
+    other.write_text("keep")
+    monkeypatch.setattr(tiles, "_process_alive", lambda pid: pid == 1)
+
+    cache.build([])
+    assert not cache.root.exists() and not dead.exists()
+    assert live.exists() and other.read_text() == "keep"
@@ -0,0 +1,67 @@
+"""
+Tests for the card projection (view=card) of place responses
+"""
+from sqlalchemy import event
+
+from schemas.place import PlaceCard
+from services.indexes import build_indexes
+
+CARD_FIELDS = set(PlaceCard.model_fields)
+
+
+def _selects(db):
+    """Capture the SELECT statements run on the test engine"""
+    statements = []
+
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    return statements
+
+
+def test_card_view_selects_and_returns_only_card_fields(client, db, make_place):
+    make_place(name="Kaffeekommune", opening_hours={"mon": "8-18"}, description="Lange Beschreibung")
+    db.expunge_all()  # Nothing preloaded in the identity map
+    statements = _selects(db)
+
+    response = client.get("/api/v1/places/", params={"view": "card"})
+    assert response.status_code == 200
+    [card] = response.json()
+    assert set(card) == CARD_FIELDS
+    assert card["name"] == "Kaffeekommune"
+
+    place_selects = [statement for statement in statements if "FROM places" in statement]
+    assert len(place_selects) == 1
+    assert "opening_hours" not in place_selects[0]
+    assert "description" not in place_selects[0]
+
+
+def test_full_view_is_the_default(client, make_place):
+    make_place(name="Kaffeekommune", opening_hours={"mon": "8-18"})
+    [place] = client.get("/api/v1/places/").json()
+    assert place["opening_hours"] == {"mon": "8-18"}
+    assert CARD_FIELDS < set(place)
+
+
+def test_card_view_on_search_and_nearby(client, db, make_place):
+    for i in range(5):
+        make_place(name=f"Kaffeekommune {i}", latitude=52.52, longitude=13.405 + i / 1000)
+    build_indexes(db)
+    db.expunge_all()
+    statements = _selects(db)
+
+    cards = client.get("/api/v1/places/search/text", params={"q": "kaffee", "view": "card"}).json()
+    assert len(cards) == 5
+    assert all(set(card) == CARD_FIELDS for card in cards)
+
+    hits = client.get("/api/v1/places/nearby/gps", params={"lat": 52.52, "lng": 13.405, "view": "card"}).json()
+    assert all(set(hit["place"]) == CARD_FIELDS for hit in hits)
+    assert hits[0]["distance_km"] == 0
+
+    # One SELECT each, no lazy load per row
+    place_selects = [statement for statement in statements if "FROM places" in statement]
+    assert len(place_selects) == 2
+
+    assert client.get("/api/v1/places/", params={"view": "tiny"}).status_code == 422